@@ -0,0 +1,214 @@
+"""
+Interactive chart alignment overlay for the analysis notebooks.
+
+The figure is built once with a persistent chart image artist and HR line
+artist. Moving the offset/scale/range/opacity sliders only updates the image's
+extent and alpha. The axis limits are fitted to the current extent and the
+HR data. On the ipympl widget backend (`%matplotlib widget`) slider ticks
+are blitted while the image stays inside those limits: the static background
+(axes, grid, labels) is cached after a full draw and each tick just restores
+it and redraws the two artists. A tick that pushes the image outside the
+limits refits them and falls back to one full redraw, which caches the new
+background. On the inline backend the limits are refitted on every change and
+the existing figure is re-displayed after a short debounce.
+
+The "Save alignment" button records the parameters in the user registry so
+later steps and batch renderers reuse them; `save_plot` writes the overlay
+as aligned_hr_data.png.
+"""
+
+import asyncio
+import os
+
+import matplotlib.pyplot as plt
+import ipywidgets as widgets
+from IPython.display import display
+
+from downsample import plot_hr
+from station_editor import is_widget_canvas
+from user_registry import DEFAULT_ALIGNMENT, chart_extent, save_alignment
+
+
+class AlignmentOverlay:
+    """
+    Overlay of the cropped Garmin chart and the parsed HR data.
+
+    Args:
+        df: Session DataFrame with elapsed_min and the column to plot
+        user_id: User being aligned
+        img: Chart image array
+        alignment: Initial alignment dict (defaults to DEFAULT_ALIGNMENT)
+        y_column: HR column to draw ('hr_smooth' or 'heart_rate')
+        label: Legend label for the HR line
+        color: HR line colour
+        on_change: Optional callback receiving the alignment dict on every change
+        debounce_sec: Quiet period before re-displaying on the inline backend
+        plots_dir: Directory for aligned_hr_data.png
+    """
+
+    def __init__(self, df, user_id, img, alignment=None, y_column='hr_smooth',
+                 label='Smoothed HR Data', color='red', on_change=None, debounce_sec=0.05, plots_dir=None):
+        self.df = df
+        self.user_id = user_id
+        self.img = img
+        self.alignment = dict(DEFAULT_ALIGNMENT, **(alignment or {}))
+        self.y_column = y_column
+        self.plots_dir = plots_dir or f'output/plots/user_{user_id}'
+        self.on_change = on_change
+        self.debounce_sec = debounce_sec
+        self.session_max = df['elapsed_min'].max()
+
+        self._background = None
+        self._pending_redraw = None
+        self.output = widgets.Output()
+        self.status = widgets.Label()
+        self.sliders = self._build_sliders()
+        self.save_button = widgets.Button(
+            description='Save alignment',
+            button_style='success',
+            layout=widgets.Layout(width='200px')
+        )
+        self.save_button.on_click(lambda _: self.save())
+
+        self.fig, self.ax, self.image, self.line = self._build_figure(label, color)
+        self.blit = is_widget_canvas(self.fig) and getattr(self.fig.canvas, 'supports_blit', False)
+        if self.blit:
+            self.image.set_animated(True)
+            self.line.set_animated(True)
+            self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+        for name, slider in self.sliders.items():
+            slider.observe(lambda change, name=name: self._on_slider(name, change['new']), names='value')
+
+    def _build_sliders(self):
+        slider_layout = widgets.Layout(width='500px')
+        a = self.alignment
+        return {
+            'x_offset': widgets.FloatSlider(min=-5, max=5, step=0.1, value=a['x_offset'],
+                                            description='X Offset:', layout=slider_layout),
+            'x_scale': widgets.FloatSlider(min=0.5, max=1.5, step=0.01, value=a['x_scale'],
+                                           description='X Scale:', layout=slider_layout),
+            'y_min': widgets.IntSlider(min=0, max=150, step=5, value=a['y_min'],
+                                       description='Y Min:', layout=slider_layout),
+            'y_max': widgets.IntSlider(min=150, max=250, step=5, value=a['y_max'],
+                                       description='Y Max:', layout=slider_layout),
+            'alpha': widgets.FloatSlider(min=0.1, max=1.0, step=0.05, value=a['alpha'],
+                                         description='Opacity:', layout=slider_layout),
+        }
+
+    def _build_figure(self, label, color):
+        with plt.ioff():
+            fig, ax = plt.subplots(figsize=(14, 5))
+
+        image = ax.imshow(self.img, aspect='auto',
+                          extent=chart_extent(self.alignment, self.session_max),
+                          alpha=self.alignment['alpha'], zorder=0, interpolation='bilinear')
+        line = plot_hr(ax, self.df['elapsed_min'], self.df[self.y_column], color=color,
+                       linewidth=2.5, label=label, zorder=1)
+        ax.set_xlabel('Elapsed Minutes', fontsize=12)
+        ax.set_ylabel('Heart Rate (BPM)', fontsize=12)
+        ax.set_title(f'Overlay: Cropped Chart vs {label} (User {self.user_id})', fontsize=14)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.legend(loc='upper right')
+        self._fit_limits(ax)
+        fig.tight_layout()
+        return fig, ax, image, line
+
+    def _fitted_limits(self):
+        """Axis limits covering the HR data and the chart image at the current alignment."""
+        extent = chart_extent(self.alignment, self.session_max)
+        hr = self.df[self.y_column]
+        return ((min(extent[0], 0), max(extent[1], self.session_max)),
+                (min(extent[2], hr.min()), max(extent[3], hr.max())))
+
+    def _fit_limits(self, ax=None):
+        ax = ax or self.ax
+        xlim, ylim = self._fitted_limits()
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+
+    def _image_inside_limits(self):
+        """True while the chart image lies within the current axis limits (so a blit shows all of it)."""
+        x0, x1, y0, y1 = chart_extent(self.alignment, self.session_max)
+        (left, right), (bottom, top) = self.ax.get_xlim(), self.ax.get_ylim()
+        return left <= x0 and x1 <= right and bottom <= y0 and y1 <= top
+
+    def _on_draw(self, event):
+        """After a full draw, cache the static background and paint the artists on top."""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.fig.draw_artist(self.image)
+        self.fig.draw_artist(self.line)
+
+    def _on_slider(self, name, value):
+        self.alignment[name] = value
+        self.image.set_extent(chart_extent(self.alignment, self.session_max))
+        self.image.set_alpha(self.alignment['alpha'])
+        if self.on_change is not None:
+            self.on_change(dict(self.alignment))
+        self.status.value = (f"x_offset={self.alignment['x_offset']}, x_scale={self.alignment['x_scale']}, "
+                             f"y_min={self.alignment['y_min']}, y_max={self.alignment['y_max']}, "
+                             f"alpha={self.alignment['alpha']} (unsaved)")
+        self.update()
+
+    def update(self):
+        """Push the current artist state to the screen: a blit on the widget backend, else a re-display."""
+        if not self.blit:
+            self._fit_limits()
+            self._schedule_redisplay()
+        elif self._background is not None and self._image_inside_limits():
+            canvas = self.fig.canvas
+            canvas.restore_region(self._background)
+            self.fig.draw_artist(self.image)
+            self.fig.draw_artist(self.line)
+            canvas.blit(self.fig.bbox)
+        else:
+            # No background cached yet, or the cached one has the old limits:
+            # refit and let the full draw cache a new background
+            self._fit_limits()
+            self._background = None
+            self.fig.canvas.draw_idle()
+
+    def _schedule_redisplay(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._redisplay()
+            return
+        if self._pending_redraw is not None:
+            self._pending_redraw.cancel()
+        self._pending_redraw = loop.call_later(self.debounce_sec, self._redisplay)
+
+    def _redisplay(self):
+        self._pending_redraw = None
+        with self.output:
+            self.output.clear_output(wait=True)
+            display(self.fig)
+
+    def save(self):
+        """Record the current alignment in the user registry."""
+        save_alignment(self.user_id, self.alignment)
+        self.status.value = f"Saved alignment for User {self.user_id}: {self.alignment}"
+
+    def save_plot(self):
+        """Save aligned_hr_data.png for the current alignment; returns its path."""
+        os.makedirs(self.plots_dir, exist_ok=True)
+        plot_path = f'{self.plots_dir}/aligned_hr_data.png'
+        # Animated (blitted) artists are left out of an ordinary draw
+        self.image.set_animated(False)
+        self.line.set_animated(False)
+        try:
+            self.fig.savefig(plot_path, dpi=300, bbox_inches='tight')
+        finally:
+            self.image.set_animated(self.blit)
+            self.line.set_animated(self.blit)
+        if self.blit:
+            # The save's draw event cached a background at the file's resolution
+            self.fig.canvas.draw_idle()
+        return plot_path
+
+    def display(self):
+        """Show the sliders, save button and overlay."""
+        display(widgets.VBox(list(self.sliders.values()) + [widgets.HBox([self.save_button, self.status])]))
+        display(self.output)
+        with self.output:
+            display(self.fig.canvas if is_widget_canvas(self.fig) else self.fig)
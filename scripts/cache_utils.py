@@ -0,0 +1,53 @@
+"""
+Shared helpers for the content-addressed caches under output/cache/.
+
+Cache entries are keyed by the SHA-256 of the source file, so a cached value
+is reused exactly as long as the underlying TCX/PDF bytes are unchanged.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+CACHE_ROOT = 'output/cache'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_json(path, default=None):
+    """Load a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path, data):
+    """Write JSON through a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        # mkstemp creates the file owner-only; give it normal file permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def json_sha256(data):
+    """Return the hex SHA-256 of a JSON-serialisable value (key order independent)."""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check how long the notebook templates take to reach the data-loaded state.
+
+Each template's cells are executed, up to and including the cell that loads
+the session (the first cell calling load_session), in a fresh Python process
+with USER_ID injected after the parameters cell, as run_all_notebooks.py
+does. IPython is imported before the clock starts because a kernel already
+has it loaded. The first run per template warms the session cache; the
+second run is the one measured against the budget.
+
+The report lists the heavy libraries that were imported on the way, which
+should be none besides pandas and numpy (see notebook_setup.py).
+
+Usage:
+    python scripts/check_startup_time.py
+    python scripts/check_startup_time.py --user 12 --budget 0.8
+
+Exits with status 1 if any template is over budget.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from render_plots import find_users
+
+TEMPLATES = {
+    'data_exploration': 'notebooks/data_exploration/template_data_exploration.ipynb',
+    'peak_exploration': 'notebooks/templates/template_peak_detection_high_quality.ipynb',
+    'low_quality': 'notebooks/templates/template_low_quality_data_clean.ipynb',
+}
+DEFAULT_BUDGET_SEC = 1.0
+
+# Should only be imported once a step needs them
+HEAVY_MODULES = ('matplotlib', 'scipy', 'ipywidgets', 'plotly')
+
+DRIVER = """
+import json, sys, time
+import IPython.display
+cells, user_id = json.loads(sys.stdin.read())
+namespace = {'__name__': '__main__'}
+start = time.perf_counter()
+for i, source in enumerate(cells):
+    exec(compile(source, f'<cell {i}>', 'exec'), namespace)
+    if i == 0:
+        namespace['USER_ID'] = user_id
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed_sec': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+def startup_cells(path):
+    """Code cells up to and including the one that loads the session; the parameters cell first."""
+    with open(path, 'r', encoding='utf-8') as f:
+        nb = json.load(f)
+    cells = [''.join(cell['source']) for cell in nb['cells'] if cell['cell_type'] == 'code']
+    for i, source in enumerate(cells):
+        if 'load_session(' in source:
+            return cells[:i + 1]
+    raise ValueError(f"{path} has no cell calling load_session")
+
+
+def time_startup(path, user_id):
+    """Run the startup cells in a fresh interpreter; returns (seconds, heavy modules imported)."""
+    cells = startup_cells(path)
+    proc = subprocess.run([sys.executable, '-c', DRIVER], input=json.dumps([cells, user_id]),
+                          capture_output=True, text=True, cwd=os.getcwd())
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'driver failed')
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    heavy = sorted({name.split('.')[0] for name in result['modules']} & set(HEAVY_MODULES))
+    return result['elapsed_sec'], heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check notebook template time to the data-loaded state')
+    parser.add_argument('--user', type=int, help='User to load (default: the first user with a TCX file)')
+    parser.add_argument('--family', action='append', choices=list(TEMPLATES),
+                        help='Template to check (repeatable; default: all)')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_SEC,
+                        help=f'Seconds allowed to reach the loaded data (default: {DEFAULT_BUDGET_SEC})')
+    args = parser.parse_args()
+
+    user_id = args.user
+    if user_id is None:
+        users = find_users()
+        if not users:
+            print("❌ No TCX files found in data/")
+            return 1
+        user_id = users[0]
+
+    over = 0
+    for family in args.family or TEMPLATES:
+        path = TEMPLATES[family]
+        try:
+            cold, _ = time_startup(path, user_id)
+            warm, heavy = time_startup(path, user_id)
+        except (RuntimeError, ValueError) as e:
+            print(f"❌ {family}: {e}")
+            over += 1
+            continue
+        ok = warm <= args.budget
+        over += not ok
+        extra = f", also imported {', '.join(heavy)}" if heavy else ""
+        print(f"{'✅' if ok else '❌'} {family}: {warm:.2f}s to data loaded (cold cache {cold:.2f}s, "
+              f"budget {args.budget:.2f}s){extra}")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
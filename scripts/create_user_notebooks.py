@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
 Script to create new user data exploration notebooks from the template.
+
+Per-user copies are no longer needed to process a user:
+`python scripts/run_all_notebooks.py --templates --users N` executes the template with
+USER_ID injected. Use this only when a standalone copy is wanted.
 """
 
 import os
@@ -0,0 +1,117 @@
+"""
+Downsampling for heart rate plots.
+
+A 14-inch plot is only a few thousand pixels wide, so drawing every sample of
+a long session wastes render time and bloats the saved PNGs without changing
+what the plot looks like. `plot_hr` sits in front of the HR `plot` calls and
+reduces the series to roughly one point per horizontal pixel before drawing.
+
+- `lttb`: Largest-Triangle-Three-Buckets, keeps the visually important points
+  (peaks, troughs, sharp transitions) while dropping redundant ones
+- `minmax_envelope`: keeps the min and max of each bucket, so no extreme is
+  ever lost; useful for the noisiest sessions
+"""
+
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """
+    Downsample (x, y) to n_out points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Each remaining bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and sharp changes.
+
+    Returns:
+        (x_out, y_out) as numpy arrays; the input is returned unchanged when it
+        already has n_out points or fewer
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[prev] - next_x) * (bucket_y - y[prev])
+                       - (x[prev] - bucket_x) * (next_y - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+
+    return x[selected], y[selected]
+
+
+def minmax_envelope(x, y, n_bins):
+    """
+    Downsample (x, y) to the min and max of each of n_bins equal-count buckets.
+
+    Both extremes of every bucket are kept in time order, so the line still
+    reaches every peak and trough of the original series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if 2 * n_bins >= n or n_bins < 1:
+        return x, y
+
+    edges = np.linspace(0, n, n_bins + 1).astype(int)
+    starts = edges[:-1]
+    lengths = np.diff(edges)
+    bucket_ids = np.repeat(np.arange(n_bins), lengths)
+
+    # argmin/argmax per bucket via a sort on (bucket, value)
+    order = np.lexsort((y, bucket_ids))
+    min_idx = order[starts]
+    max_idx = order[starts + lengths - 1]
+
+    keep = np.sort(np.unique(np.concatenate([min_idx, max_idx, [0, n - 1]])))
+    return x[keep], y[keep]
+
+
+def axes_pixel_width(ax, dpi=None):
+    """Width of an Axes in pixels at `dpi` (defaults to the figure's dpi)."""
+    fig = ax.figure
+    width_in = ax.get_position().width * fig.get_figwidth()
+    return max(int(width_in * (dpi or fig.dpi)), 3)
+
+
+def downsample_for_plot(x, y, n_out, method='lttb'):
+    """Downsample with the named method ('lttb', 'minmax' or 'none')."""
+    if method == 'lttb':
+        return lttb(x, y, n_out)
+    if method == 'minmax':
+        return minmax_envelope(x, y, max(n_out // 2, 1))
+    if method == 'none':
+        return np.asarray(x), np.asarray(y)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def plot_hr(ax, x, y, *args, dpi=None, max_points=None, method='lttb', **kwargs):
+    """
+    Drop-in replacement for `ax.plot(x, y, ...)` for HR series.
+
+    The series is reduced to about one point per pixel of the Axes width at
+    `dpi` (pass the savefig dpi when the figure will be saved at a higher
+    resolution than it is displayed), or to `max_points` if given.
+
+    Returns:
+        The Line2D created by ax.plot
+    """
+    n_out = max_points or axes_pixel_width(ax, dpi)
+    x_ds, y_ds = downsample_for_plot(x, y, n_out, method)
+    (line,) = ax.plot(x_ds, y_ds, *args, **kwargs)
+    return line
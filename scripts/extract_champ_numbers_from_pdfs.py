@@ -1,42 +1,221 @@
 #!/usr/bin/env python3
 """
-Script to extract champ numbers from PDFs in the data folder and update metadata/user_metadata.csv.
+Script to extract champ numbers and Garmin summary values from the PDFs in the data folder.
 
-- Scans all *-d.pdf files in the data/ directory
+- Scans all *-d.pdf files in the data/ directory across a process pool
 - Extracts champ numbers in the format (champ##) from the PDF text
-- Updates the champ_number field in metadata/user_metadata.csv for each user
+- Extracts the Garmin-reported avg HR, max HR, duration and calories in the same pass
+- Stops reading a PDF at the first page where every field has been found
+- Caches extracted page text under output/cache/pdf_text/ keyed by PDF hash,
+  so re-runs only open PDFs that changed
+- Updates the champ_number field in metadata/user_metadata.csv (only if it changed)
+- Writes the summary values to metadata/pdf_report_summary.csv
+
+Usage:
+    python scripts/extract_champ_numbers_from_pdfs.py [--jobs N] [--dry-run]
 """
 
-import pdfplumber
-import pandas as pd
-import re
 import os
+import re
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from cache_utils import CACHE_ROOT, file_sha256, read_json, write_json_atomic
 
 metadata_path = 'metadata/user_metadata.csv'
+summary_path = 'metadata/pdf_report_summary.csv'
 data_dir = 'data'
+cache_dir = os.path.join(CACHE_ROOT, 'pdf_text')
+
+CHAMP_PATTERN = re.compile(r'\(champ(\d+)\)', re.IGNORECASE)
+
+# Garmin prints each value either after or before its label depending on the
+# report layout, so every field accepts both orders
+SUMMARY_PATTERNS = {
+    'avg_hr': [
+        r'Avg(?:erage)?\.?\s*HR\s*:?\s*(\d+)\s*bpm',
+        r'(\d+)\s*bpm\s*Avg(?:erage)?\.?\s*HR',
+        r'Avg(?:erage)?\.?\s*Heart\s*Rate\s*:?\s*(\d+)',
+    ],
+    'max_hr': [
+        r'Max(?:imum)?\.?\s*HR\s*:?\s*(\d+)\s*bpm',
+        r'(\d+)\s*bpm\s*Max(?:imum)?\.?\s*HR',
+        r'Max(?:imum)?\.?\s*Heart\s*Rate\s*:?\s*(\d+)',
+    ],
+    'duration': [
+        # The prefix is required: a bare 'Time' also labels the start clock time
+        r'(?:Total|Elapsed|Moving)\s*Time\s*:?\s*(\d{1,2}:\d{2}(?::\d{2})?)',
+        r'(\d{1,2}:\d{2}(?::\d{2})?)\s*(?:Total|Elapsed|Moving)\s*Time',
+    ],
+    'calories': [
+        r'(?:Total\s*)?Calories\s*:?\s*(\d[\d,]*)',
+        r'(\d[\d,]*)\s*(?:Total\s*)?Calories',
+    ],
+}
+SUMMARY_PATTERNS = {field: [re.compile(p, re.IGNORECASE) for p in patterns]
+                    for field, patterns in SUMMARY_PATTERNS.items()}
+
+SUMMARY_COLUMNS = ['user_id', 'champ_number', 'pdf_avg_hr', 'pdf_max_hr',
+                   'pdf_duration_min', 'pdf_calories', 'pdf_sha256']
+
+
+def parse_duration_min(text):
+    """Convert 'MM:SS' or 'H:MM:SS' into minutes."""
+    parts = [int(p) for p in text.split(':')]
+    if len(parts) == 2:
+        minutes, seconds = parts
+        return minutes + seconds / 60
+    hours, minutes, seconds = parts
+    return hours * 60 + minutes + seconds / 60
+
+
+def search_report_text(text):
+    """Search report text for the champ number and summary values; missing fields are None."""
+    result = {'champ_number': None, 'avg_hr': None, 'max_hr': None,
+              'duration_min': None, 'calories': None}
+
+    match = CHAMP_PATTERN.search(text)
+    if match:
+        result['champ_number'] = int(match.group(1))
+
+    for field, patterns in SUMMARY_PATTERNS.items():
+        for pattern in patterns:
+            match = pattern.search(text)
+            if not match:
+                continue
+            value = match.group(1)
+            if field == 'duration':
+                result['duration_min'] = parse_duration_min(value)
+            else:
+                result[field] = int(value.replace(',', ''))
+            break
+
+    return result
+
+
+def _all_found(result):
+    return all(value is not None for value in result.values())
+
 
-# Load metadata
-metadata_df = pd.read_csv(metadata_path)
+def extract_pdf_report(pdf_path, cache_dir=cache_dir):
+    """
+    Extract the champ number and Garmin summary values from one PDF.
+
+    Page text is cached by PDF hash. Pages are read in order and reading stops
+    at the first page where every field has been found; a later run with a
+    cache hit only opens the PDF again if fields are still missing and unread
+    pages remain.
+    """
+    user_id = int(os.path.basename(pdf_path).split('-')[0])
+    sha = file_sha256(pdf_path)
+    cache_path = os.path.join(cache_dir, f'{sha}.json')
+
+    cached = read_json(cache_path, default={})
+    pages = cached.get('pages', [])
+    complete = cached.get('complete', False)
+
+    result = search_report_text('\n'.join(pages))
+
+    if not _all_found(result) and not complete:
+        import pdfplumber
 
-for filename in os.listdir(data_dir):
-    if filename.endswith('-d.pdf'):
-        user_id = filename.split('-')[0]
-        pdf_path = os.path.join(data_dir, filename)
         with pdfplumber.open(pdf_path) as pdf:
-            text = ''
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-        # Find champ number
-        match = re.search(r'\(champ(\d+)\)', text)
-        if match:
-            champ_number = match.group(1)
-            print(f'User {user_id}: champ_number = {champ_number}')
-            metadata_df.loc[metadata_df['user_id'] == int(user_id), 'champ_number'] = champ_number
+            for page in pdf.pages[len(pages):]:
+                pages.append(page.extract_text() or '')
+                result = search_report_text('\n'.join(pages))
+                if _all_found(result):
+                    break
+            complete = len(pages) == len(pdf.pages)
+        write_json_atomic(cache_path, {'pages': pages, 'complete': complete})
+
+    return {
+        'user_id': user_id,
+        'champ_number': result['champ_number'],
+        'pdf_avg_hr': result['avg_hr'],
+        'pdf_max_hr': result['max_hr'],
+        'pdf_duration_min': result['duration_min'],
+        'pdf_calories': result['calories'],
+        'pdf_sha256': sha,
+    }
+
+
+def extract_all_reports(data_dir=data_dir, jobs=None, user_ids=None):
+    """Extract every data/*-d.pdf report across a process pool; returns a DataFrame."""
+    pdf_paths = sorted(glob.glob(os.path.join(data_dir, '*-d.pdf')))
+    if user_ids is not None:
+        wanted = {int(u) for u in user_ids}
+        pdf_paths = [p for p in pdf_paths if int(os.path.basename(p).split('-')[0]) in wanted]
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(extract_pdf_report, path): path for path in pdf_paths}
+        for future, path in futures.items():
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                print(f'User {os.path.basename(path).split("-")[0]}: ❌ Error reading {path}: {e}')
+
+    summary_df = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    for column in SUMMARY_COLUMNS:
+        if column not in ('pdf_duration_min', 'pdf_sha256'):
+            summary_df[column] = summary_df[column].astype('Int64')
+    return summary_df.sort_values('user_id').reset_index(drop=True)
+
+
+def update_metadata(summary_df, metadata_path=metadata_path):
+    """Write champ numbers into the metadata CSV; returns the number of users changed."""
+    metadata_df = pd.read_csv(metadata_path)
+    changed = 0
+    for row in summary_df.itertuples(index=False):
+        if pd.isna(row.champ_number):
+            continue
+        mask = metadata_df['user_id'] == row.user_id
+        current = metadata_df.loc[mask, 'champ_number']
+        if mask.any() and not (current == row.champ_number).all():
+            metadata_df.loc[mask, 'champ_number'] = row.champ_number
+            changed += 1
+    if changed:
+        metadata_df.to_csv(metadata_path, index=False)
+    return changed
+
+
+def write_summary(summary_df, summary_path=summary_path):
+    """Write the PDF summary CSV if its contents changed; returns True if written."""
+    new_csv = summary_df.to_csv(index=False)
+    if os.path.exists(summary_path):
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            if f.read() == new_csv:
+                return False
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(new_csv)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract champ numbers and summary values from Garmin PDFs')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Print results without writing metadata files')
+    args = parser.parse_args()
+
+    summary_df = extract_all_reports(jobs=args.jobs)
+
+    for row in summary_df.itertuples(index=False):
+        if pd.isna(row.champ_number):
+            print(f'User {row.user_id}: champ number not found in {row.user_id}-d.pdf')
         else:
-            print(f'User {user_id}: champ number not found in {filename}')
+            print(f'User {row.user_id}: champ_number = {row.champ_number}')
+
+    if args.dry_run:
+        return
+
+    changed = update_metadata(summary_df)
+    print(f'Metadata updated with champ numbers ({changed} users changed).')
+    if write_summary(summary_df):
+        print(f'PDF report summary saved to {summary_path}')
+
 
-# Save updated metadata
-metadata_df.to_csv(metadata_path, index=False)
-print('Metadata updated with champ numbers.') 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Extract the heart rate trace from the vector chart in a Garmin PDF report.
+
+Garmin renders the heart rate chart as vector paths, so instead of rasterizing
+the page and colour-masking the line we read the path segments directly with
+pdfplumber and map them through the axis tick labels into exact
+(elapsed_min, heart_rate) points.
+
+- The trace is the path (curve, or chain of line segments) with the most points
+- Y-axis ticks are the numeric labels stacked to the left of the trace
+- X-axis ticks are the numeric or time labels ("10", "10:00", "1:05:00") below it
+- Pixel -> value mapping is a least-squares linear fit through the tick labels
+
+Usage:
+    python scripts/extract_pdf_hr_trace.py --user 2
+    python scripts/extract_pdf_hr_trace.py --all
+"""
+
+import os
+import re
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+import pdfplumber
+
+TRACES_DIR = 'output/pdf_traces'
+
+_TIME_LABEL = re.compile(r'^(\d+):(\d{2})(?::(\d{2}))?$')
+_NUMBER_LABEL = re.compile(r'^-?\d+(?:\.\d+)?$')
+
+
+def parse_tick_label(text):
+    """
+    Parse an axis tick label into a number.
+    Time labels are returned in minutes ("10:00" -> 10.0, "1:05:00" -> 65.0),
+    plain numbers are returned as-is. Returns None for anything else.
+    """
+    text = text.strip()
+    match = _TIME_LABEL.match(text)
+    if match:
+        first, second, third = match.groups()
+        if third is None:
+            return int(first) + int(second) / 60
+        return int(first) * 60 + int(second) + int(third) / 60
+    if _NUMBER_LABEL.match(text):
+        return float(text)
+    return None
+
+
+def _chain_lines(lines, tol=0.5):
+    """Join consecutive line segments that share endpoints into polylines."""
+    polylines = []
+    current = []
+    for line in lines:
+        start = (line['x0'], line['top'])
+        end = (line['x1'], line['bottom'])
+        # pdfplumber normalizes x0 < x1 and top < bottom, so recover the
+        # original direction from the raw points when available
+        if line.get('pts'):
+            start, end = tuple(line['pts'][0]), tuple(line['pts'][-1])
+        if current and abs(current[-1][0] - start[0]) <= tol and abs(current[-1][1] - start[1]) <= tol:
+            current.append(end)
+        else:
+            if len(current) > 2:
+                polylines.append(current)
+            current = [start, end]
+    if len(current) > 2:
+        polylines.append(current)
+    return polylines
+
+
+def _monotonic_run(points):
+    """
+    Return the longest run of points with non-decreasing x.
+    Filled area charts close the path back along the baseline; this drops
+    that closing segment and keeps only the trace itself.
+    """
+    best_start, best_len = 0, 0
+    run_start = 0
+    for i in range(1, len(points) + 1):
+        if i == len(points) or points[i][0] < points[i - 1][0]:
+            if i - run_start > best_len:
+                best_start, best_len = run_start, i - run_start
+            run_start = i
+    return points[best_start:best_start + best_len]
+
+
+def find_trace_path(page):
+    """Return the most detailed path on the page as a list of (x, top) points."""
+    candidates = [[tuple(pt) for pt in curve['pts']] for curve in page.curves]
+    candidates.extend(_chain_lines(page.lines))
+
+    best = []
+    for points in candidates:
+        points = _monotonic_run(points)
+        distinct_x = len({round(x, 2) for x, _ in points})
+        if distinct_x > len({round(x, 2) for x, _ in best}):
+            best = points
+    return best
+
+
+def _group_words(words, key, tol=2.0):
+    """Group words whose `key` coordinate is within `tol` points of each other."""
+    groups = []
+    for word in sorted(words, key=lambda w: w[key]):
+        if groups and abs(groups[-1][-1][key] - word[key]) <= tol:
+            groups[-1].append(word)
+        else:
+            groups.append([word])
+    return groups
+
+
+def _fit_axis(ticks):
+    """Least-squares linear fit of tick value against page coordinate."""
+    positions = np.array([pos for pos, _ in ticks])
+    values = np.array([value for _, value in ticks])
+    if len(ticks) < 2 or np.ptp(positions) == 0:
+        raise ValueError("Need at least two distinct tick labels to calibrate an axis")
+    slope, intercept = np.polyfit(positions, values, 1)
+    return slope, intercept
+
+
+def find_axis_ticks(page, trace):
+    """
+    Locate the x and y tick labels around the trace.
+    Returns two lists of (page_coordinate, value) pairs: (x_ticks, y_ticks).
+    """
+    xs = [x for x, _ in trace]
+    tops = [top for _, top in trace]
+    trace_left, trace_right = min(xs), max(xs)
+    trace_bottom = max(tops)
+
+    words = []
+    for word in page.extract_words():
+        value = parse_tick_label(word['text'])
+        if value is not None:
+            words.append(dict(word, value=value))
+
+    # Y ticks: right-aligned column of labels left of the plot area
+    left_words = [w for w in words if w['x1'] <= trace_left + 1]
+    y_groups = [g for g in _group_words(left_words, 'x1') if len(g) >= 2]
+    if not y_groups:
+        raise ValueError("Could not find y-axis tick labels")
+    y_group = max(y_groups, key=lambda g: (len(g), g[0]['x1']))
+    y_ticks = [((w['top'] + w['bottom']) / 2, w['value']) for w in y_group]
+
+    # X ticks: row of labels below the lowest trace point, within the plot span
+    below_words = [w for w in words
+                   if w['top'] >= trace_bottom - 1
+                   and w['x0'] >= trace_left - 20 and w['x1'] <= trace_right + 20]
+    x_groups = [g for g in _group_words(below_words, 'top') if len(g) >= 2]
+    if not x_groups:
+        raise ValueError("Could not find x-axis tick labels")
+    x_group = max(x_groups, key=lambda g: (len(g), -g[0]['top']))
+    x_ticks = [((w['x0'] + w['x1']) / 2, w['value']) for w in x_group]
+
+    return x_ticks, y_ticks
+
+
+def extract_trace_from_page(page):
+    """Extract the heart rate trace from a single pdfplumber page."""
+    trace = find_trace_path(page)
+    if len(trace) < 3:
+        raise ValueError(f"No vector chart path found on page {page.page_number}")
+
+    x_ticks, y_ticks = find_axis_ticks(page, trace)
+    x_slope, x_intercept = _fit_axis(x_ticks)
+    y_slope, y_intercept = _fit_axis(y_ticks)
+
+    points = np.array(trace, dtype=float)
+    df = pd.DataFrame({
+        'elapsed_min': points[:, 0] * x_slope + x_intercept,
+        'heart_rate': points[:, 1] * y_slope + y_intercept,
+    })
+    return df.sort_values('elapsed_min', kind='stable').reset_index(drop=True)
+
+
+def extract_hr_trace(pdf_path, page_number=None):
+    """
+    Extract the heart rate trace from a Garmin PDF report.
+
+    Args:
+        pdf_path: Path to the Garmin PDF report (data/XX-d.pdf)
+        page_number: 1-based page to read; if None, every page is tried and
+            the first one with a calibratable chart is used
+
+    Returns:
+        DataFrame with elapsed_min and heart_rate columns, one row per path point
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = pdf.pages if page_number is None else [pdf.pages[page_number - 1]]
+        errors = []
+        for page in pages:
+            try:
+                return extract_trace_from_page(page)
+            except ValueError as e:
+                errors.append(str(e))
+    raise ValueError(f"No heart rate chart found in {pdf_path}: {'; '.join(errors)}")
+
+
+def extract_user_trace(user_id, data_dir='data', output_dir=TRACES_DIR):
+    """Extract one user's trace and save it to output_dir/user_XX_pdf_trace.csv."""
+    pdf_path = os.path.join(data_dir, f'{user_id}-d.pdf')
+    trace = extract_hr_trace(pdf_path)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f'user_{user_id}_pdf_trace.csv')
+    trace.to_csv(output_path, index=False)
+    return trace, output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract HR traces from the vector charts in Garmin PDFs')
+    parser.add_argument('--user', type=int, action='append', help='User ID to extract (repeatable)')
+    parser.add_argument('--all', action='store_true', help='Extract every data/*-d.pdf')
+    parser.add_argument('--data-dir', default='data', help='Directory with the Garmin PDFs')
+    parser.add_argument('--output-dir', default=TRACES_DIR, help='Directory for the trace CSVs')
+    args = parser.parse_args()
+
+    if args.all:
+        user_ids = sorted(int(os.path.basename(p).split('-')[0])
+                          for p in glob.glob(os.path.join(args.data_dir, '*-d.pdf')))
+    else:
+        user_ids = args.user or []
+
+    if not user_ids:
+        parser.error('specify --user N or --all')
+
+    for user_id in user_ids:
+        try:
+            trace, output_path = extract_user_trace(user_id, args.data_dir, args.output_dir)
+            print(f"✅ User {user_id}: {len(trace)} points, "
+                  f"{trace['elapsed_min'].min():.1f}-{trace['elapsed_min'].max():.1f} min, "
+                  f"{trace['heart_rate'].min():.0f}-{trace['heart_rate'].max():.0f} bpm -> {output_path}")
+        except Exception as e:
+            print(f"❌ User {user_id}: {e}")
+
+
+if __name__ == "__main__":
+    main()
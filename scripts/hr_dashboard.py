@@ -0,0 +1,174 @@
+"""
+Interactive WebGL dashboard for reviewing every user in one kernel.
+
+Shows a user's heart rate (min/max envelope plus mean line), the peaks found
+by `detect_hr_peaks`, shaded station regions and the aligned Garmin chart in a
+single plotly FigureWidget drawn with Scattergl. A dropdown and Prev/Next
+buttons page through users without re-running their notebooks.
+
+The HR traces never hold the full session: they are filled from the user's
+HR pyramid with at most `max_points` buckets, and are re-queried for the
+visible window whenever the x axis is zoomed or panned.
+
+Usage (in a notebook):
+    from hr_dashboard import StudyDashboard
+    StudyDashboard().display()
+"""
+
+import base64
+import os
+
+import ipywidgets as widgets
+import plotly.graph_objects as go
+from IPython.display import display
+
+from hr_pyramid import load_pyramid
+from peak_detection import detect_hr_peaks, smooth_hr
+from render_plots import CHARTS_DIR, chart_path_for, find_users, load_cutoffs
+from session_cache import load_session
+from user_registry import chart_extent, get_alignment, get_parameters
+
+# Template defaults; the registry's per-user notebook parameters override them
+MIN_PROMINENCE = 8
+MIN_DISTANCE_MIN = 1.5
+
+STATION_FILL = 'rgba(255, 165, 0, 0.15)'
+
+
+def _chart_data_uri(path):
+    """Encode a chart PNG as a data URI for a plotly layout image."""
+    with open(path, 'rb') as f:
+        return 'data:image/png;base64,' + base64.b64encode(f.read()).decode('ascii')
+
+
+class StudyDashboard:
+    """
+    Page through users' HR, peaks, stations and chart overlay.
+
+    Args:
+        user_ids: Users to page through (defaults to every user with a TCX file)
+        max_points: Maximum HR buckets drawn for the visible window
+        peak_ratio: Peak threshold as a fraction of the session max HR, for
+            users without a PEAK_THRESHOLD_RATIO in the registry
+        data_dir: Directory holding the TCX files
+        charts_dir: Directory holding the cropped Garmin charts
+    """
+
+    def __init__(self, user_ids=None, max_points=2000, peak_ratio=0.70, data_dir='data', charts_dir=CHARTS_DIR):
+        self.user_ids = list(user_ids) if user_ids is not None else find_users(data_dir)
+        self.max_points = max_points
+        self.peak_ratio = peak_ratio
+        self.data_dir = data_dir
+        self.charts_dir = charts_dir
+        self.pyramid = None
+        self._refitting = False
+
+        self.fig = self._build_figure()
+        self.fig.layout.xaxis.on_change(self._on_xrange, 'range')
+
+        self.user_select = widgets.Dropdown(options=self.user_ids, description='User:')
+        self.prev_button = widgets.Button(description='◀ Prev', layout=widgets.Layout(width='90px'))
+        self.next_button = widgets.Button(description='Next ▶', layout=widgets.Layout(width='90px'))
+        self.status = widgets.Label()
+        self.prev_button.on_click(lambda _: self._step(-1))
+        self.next_button.on_click(lambda _: self._step(1))
+        self.user_select.observe(lambda change: self.show_user(change['new']), names='value')
+
+        if self.user_ids:
+            self.show_user(self.user_ids[0])
+
+    def _build_figure(self):
+        fig = go.FigureWidget()
+        fig.add_trace(go.Scattergl(mode='lines', line=dict(width=0), hoverinfo='skip',
+                                   showlegend=False, name='HR min'))
+        fig.add_trace(go.Scattergl(mode='lines', line=dict(width=0), fill='tonexty',
+                                   fillcolor='rgba(0, 0, 255, 0.2)', hoverinfo='skip', name='HR range'))
+        fig.add_trace(go.Scattergl(mode='lines', line=dict(color='blue', width=1.5), name='Heart Rate'))
+        fig.add_trace(go.Scattergl(mode='markers', name='Detected Peaks',
+                                   marker=dict(color='yellow', size=10, line=dict(color='black', width=1.5))))
+        fig.update_layout(
+            height=500,
+            xaxis_title='Elapsed Minutes',
+            yaxis_title='Heart Rate (BPM)',
+            legend=dict(orientation='h', y=1.08),
+            margin=dict(l=60, r=20, t=80, b=50),
+        )
+        return fig
+
+    def _step(self, offset):
+        if not self.user_ids:
+            return
+        index = self.user_ids.index(self.user_select.value)
+        self.user_select.value = self.user_ids[(index + offset) % len(self.user_ids)]
+
+    def show_user(self, user_id):
+        """Load a user and redraw every layer of the dashboard."""
+        df, _, _, session_max_hr, _ = load_session(user_id, self.data_dir)
+        self.pyramid = load_pyramid(user_id, data_dir=self.data_dir)
+        hr_smooth = smooth_hr(df['heart_rate'])
+        parameters = get_parameters(user_id)
+        peaks, _, threshold = detect_hr_peaks(
+            hr_smooth, session_max_hr,
+            min_height_ratio=parameters.get('PEAK_THRESHOLD_RATIO', self.peak_ratio),
+            min_prominence=parameters.get('MIN_PROMINENCE', MIN_PROMINENCE),
+            min_distance_min=parameters.get('MIN_DISTANCE_MIN', MIN_DISTANCE_MIN))
+        cutoffs = load_cutoffs(user_id) or []
+        session_max = df['elapsed_min'].max()
+
+        shapes = [dict(type='rect', xref='x', yref='paper', x0=start, x1=end, y0=0, y1=1,
+                       fillcolor=STATION_FILL, line=dict(width=0), layer='below')
+                  for start, end in cutoffs]
+        shapes.append(dict(type='line', xref='paper', yref='y', x0=0, x1=1, y0=threshold, y1=threshold,
+                           line=dict(color='gray', dash='dot', width=1)))
+
+        images = []
+        chart_path = chart_path_for(user_id, self.charts_dir)
+        if os.path.exists(chart_path):
+            alignment = get_alignment(user_id)
+            x_min, x_max, y_min, y_max = chart_extent(alignment, session_max)
+            images.append(dict(source=_chart_data_uri(chart_path), xref='x', yref='y',
+                               x=x_min, y=y_max, sizex=x_max - x_min, sizey=y_max - y_min,
+                               sizing='stretch', opacity=alignment['alpha'], layer='below'))
+
+        # The range change event fires when a batch exits, so the flag stays set
+        # until then; otherwise _on_xrange would query the pyramid a second time
+        self._refitting = True
+        try:
+            with self.fig.batch_update():
+                self.fig.layout.shapes = shapes
+                self.fig.layout.images = images
+                self.fig.layout.title = f'User {user_id}: {len(peaks)} peaks, {len(cutoffs)} stations'
+                self.fig.layout.yaxis.autorange = True
+                self.fig.data[3].x = df['elapsed_min'].iloc[peaks].to_numpy()
+                self.fig.data[3].y = hr_smooth.iloc[peaks].to_numpy()
+                self._refit(0, session_max)
+            self.fig.layout.xaxis.range = [0, session_max]
+        finally:
+            self._refitting = False
+
+    def _refit(self, t_start, t_end):
+        """Fill the HR traces from the pyramid for [t_start, t_end]."""
+        view = self.pyramid.query(t_start, t_end, self.max_points)
+        with self.fig.batch_update():
+            self.fig.data[0].x = view['t']
+            self.fig.data[0].y = view['min']
+            self.fig.data[1].x = view['t']
+            self.fig.data[1].y = view['max']
+            self.fig.data[2].x = view['t']
+            self.fig.data[2].y = view['mean']
+        level = 'raw samples' if view['level'] == 0 else f"pyramid level {view['level']}"
+        self.status.value = f"{len(view['t'])} points ({level}) for {t_start:.1f}-{t_end:.1f} min"
+
+    def _on_xrange(self, layout, xrange):
+        if self._refitting or self.pyramid is None or xrange is None:
+            return
+        self._refitting = True
+        try:
+            self._refit(*xrange)
+        finally:
+            self._refitting = False
+
+    def display(self):
+        """Show the user controls and the dashboard figure."""
+        display(widgets.HBox([self.prev_button, self.user_select, self.next_button, self.status]))
+        display(self.fig)
@@ -0,0 +1,138 @@
+"""
+Multi-resolution min/max/mean pyramid of a session's heart rate.
+
+Level 0 holds the raw samples; each level above halves the resolution by
+merging neighbouring buckets, keeping each bucket's time span, min, max,
+mean and sample count. A viewport query picks the finest level that fits in
+`max_points` buckets and slices it with two binary searches, so zooming and
+panning interactive views costs O(max_points) regardless of session length.
+
+Pyramids are stored next to the parsed-session cache
+(output/cache/sessions/user_XX_pyramid.npz) and rebuilt when the TCX changes.
+
+Usage:
+    from hr_pyramid import load_pyramid
+    pyramid = load_pyramid(USER_ID)
+    view = pyramid.query(10, 20, max_points=800)   # view['t'], view['min'], view['max'], view['mean']
+"""
+
+import os
+
+import numpy as np
+
+from peak_detection import smooth_hr
+from session_cache import SESSION_CACHE_DIR, load_session, session_hash
+
+FIELDS = ('t0', 't1', 'min', 'max', 'mean', 'count')
+
+
+class HRPyramid:
+    """Min/max/mean pyramid over (elapsed_min, heart_rate) samples."""
+
+    def __init__(self, levels, source_hash=None):
+        self.levels = levels
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, elapsed_min, heart_rate, source_hash=None):
+        """Build the pyramid from time-sorted samples."""
+        t = np.asarray(elapsed_min, dtype=float)
+        hr = np.asarray(heart_rate, dtype=float)
+        level = {'t0': t, 't1': t, 'min': hr, 'max': hr, 'mean': hr,
+                 'count': np.ones(len(t), dtype=np.int64)}
+        levels = [level]
+
+        while len(level['t0']) > 1:
+            starts = np.arange(0, len(level['t0']), 2)
+            count = np.add.reduceat(level['count'], starts)
+            level = {
+                't0': level['t0'][starts],
+                't1': np.maximum.reduceat(level['t1'], starts),
+                'min': np.minimum.reduceat(level['min'], starts),
+                'max': np.maximum.reduceat(level['max'], starts),
+                'mean': np.add.reduceat(level['mean'] * level['count'], starts) / count,
+                'count': count,
+            }
+            levels.append(level)
+
+        return cls(levels, source_hash)
+
+    def query(self, t_start=None, t_end=None, max_points=1000):
+        """
+        Return at most `max_points` buckets covering [t_start, t_end].
+
+        Returns:
+            dict with t (bucket midpoint), t0, t1, min, max, mean, count arrays
+            and the pyramid level used (0 = raw samples)
+        """
+        raw = self.levels[0]
+        if t_start is None:
+            t_start = raw['t0'][0] if len(raw['t0']) else 0.0
+        if t_end is None:
+            t_end = raw['t1'][-1] if len(raw['t1']) else 0.0
+
+        for index, level in enumerate(self.levels):
+            # Buckets overlapping the window: t1 >= t_start and t0 <= t_end
+            lo = np.searchsorted(level['t1'], t_start, side='left')
+            hi = np.searchsorted(level['t0'], t_end, side='right')
+            if hi - lo <= max_points:
+                break
+
+        view = {field: level[field][lo:hi] for field in FIELDS}
+        view['t'] = (view['t0'] + view['t1']) / 2
+        view['level'] = index
+        return view
+
+    def save(self, path):
+        """Save the pyramid to a .npz file."""
+        arrays = {f'{field}_{index}': level[field]
+                  for index, level in enumerate(self.levels) for field in FIELDS}
+        arrays['source_hash'] = np.array(self.source_hash or '')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a pyramid saved with `save`."""
+        with np.load(path) as data:
+            n_levels = sum(1 for key in data.files if key.startswith('t0_'))
+            levels = [{field: data[f'{field}_{index}'] for field in FIELDS} for index in range(n_levels)]
+            source_hash = str(data['source_hash']) or None
+        return cls(levels, source_hash)
+
+
+def pyramid_path(user_id, cache_dir=SESSION_CACHE_DIR):
+    """Path of a user's cached pyramid."""
+    return os.path.join(cache_dir, f'user_{user_id}_pyramid.npz')
+
+
+def load_pyramid(user_id, column='heart_rate', data_dir='data', cache_dir=SESSION_CACHE_DIR):
+    """
+    Load a user's pyramid from the session cache, building it if the TCX changed.
+
+    Pyramids for columns other than heart_rate (e.g. hr_smooth) are stored
+    under their own file name.
+    """
+    sha = session_hash(user_id, data_dir)
+    path = pyramid_path(user_id, cache_dir)
+    if column != 'heart_rate':
+        path = path.replace('_pyramid.npz', f'_{column}_pyramid.npz')
+
+    if os.path.exists(path):
+        try:
+            pyramid = HRPyramid.load(path)
+            if pyramid.source_hash == sha:
+                return pyramid
+        except Exception:
+            pass
+
+    df = load_session(user_id, data_dir, cache_dir)[0]
+    if column == 'hr_smooth' and column not in df.columns:
+        values = smooth_hr(df['heart_rate'])
+    else:
+        values = df[column]
+    pyramid = HRPyramid.build(df['elapsed_min'], values, source_hash=sha)
+    pyramid.save(path)
+    return pyramid
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Bulk import of survey answers (station ratings, PACES items, demographics)
+into the per-user station CSVs and the master CSV.
+
+Survey exports (CSV, or XLSX with openpyxl installed) have a user_id and a
+station_number column and any of the survey columns of the station schema
+(scripts/station_schema.py) under their schema names. Per-participant
+answers (demographics, experience, overall ratings and comments) may sit on
+any of a user's station rows or on a row with a blank station_number; they
+are written to all of the user's rows.
+
+All files are validated before anything is written: values must fit their
+column's dtype, PACES items must be on the 1-7 scale, and a key may not get
+two different answers. The answers are then loaded into one hash table keyed
+by (user_id, station_number) and joined into every per-user CSV in a single
+pass (one read and at most one atomic write per file); the master CSV is
+updated by upserting the changed files (update_master_csv.py). Survey keys
+with no station row are reported as unmatched. Blank or 'TBD' survey cells
+leave the CSV unchanged.
+
+Usage:
+    python scripts/import_survey.py surveys/*.xlsx
+    python scripts/import_survey.py survey.csv --dry-run
+"""
+
+import os
+import glob
+import argparse
+
+import pandas as pd
+
+from migrate_station_csvs import dumps_station_csv, line_terminator, parse_station_csv, write_text_atomic
+from station_schema import MISSING, PACES_COLUMNS, PACES_SCALE, PARTICIPANT_COLUMNS, SCHEMA, SURVEY_COLUMNS
+from update_master_csv import PROCESSED_DIR, STATION_CSV_PATTERN, update_master_csv
+
+KEY_COLUMNS = ['user_id', 'station_number']
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def read_survey(path):
+    """Read a survey export as strings ('' for empty cells)."""
+    try:
+        if path.lower().endswith(EXCEL_EXTENSIONS):
+            df = pd.read_excel(path, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    except ImportError as e:
+        raise ValueError(f"{path}: reading Excel files needs openpyxl ({e})") from e
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    df.columns = [str(column).strip() for column in df.columns]
+    return df.apply(lambda values: values.str.strip())
+
+
+def _render(values, column):
+    """
+    Survey cells of one column as CSV strings by the schema dtype.
+
+    Returns:
+        (list of strings with None for blank cells, boolean Series of invalid cells)
+    """
+    blank = values.isin(['', MISSING])
+    dtype = SCHEMA[column]
+    if dtype not in ('Int64', 'float64'):
+        return [None if b else value for value, b in zip(values, blank)], pd.Series(False, values.index)
+
+    numbers = pd.to_numeric(values.where(~blank), errors='coerce')
+    invalid = ~blank & numbers.isna()
+    if dtype == 'Int64':
+        # Excel exports whole numbers as 5.0
+        invalid |= ~blank & numbers.notna() & (numbers % 1 != 0)
+    if column in PACES_COLUMNS:
+        invalid |= ~blank & numbers.notna() & ~numbers.between(*PACES_SCALE)
+    render = (lambda number: str(int(number))) if dtype == 'Int64' else str
+    return [render(number) if ok else None for number, ok in zip(numbers, ~blank & ~invalid)], invalid
+
+
+def _key(value):
+    """A user_id/station_number cell as written in the station CSVs, or None if not a whole number."""
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return str(int(number)) if number.is_integer() else None
+
+
+def load_answers(paths):
+    """
+    Validate survey exports and build the join tables.
+
+    Returns:
+        (station answers {(user_id, station_number): {column: value}},
+         participant answers {user_id: {column: value}},
+         errors [message])
+    """
+    stations, participants, errors = {}, {}, []
+
+    def put(table, key, column, value, where):
+        previous = table.setdefault(key, {}).get(column)
+        if previous is not None and previous != value:
+            errors.append(f"{where}: {column} = {value!r} conflicts with {previous!r} given earlier for {key}")
+        table[key][column] = value
+
+    for path in paths:
+        try:
+            df = read_survey(path)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        missing = [column for column in KEY_COLUMNS if column not in df]
+        other = [column for column in df if column not in KEY_COLUMNS and column not in SURVEY_COLUMNS]
+        if missing:
+            errors.append(f"{path}: missing key column(s) {', '.join(missing)}")
+        if other:
+            errors.append(f"{path}: not survey columns of the station schema: {', '.join(other)}")
+        if missing or other:
+            continue
+
+        columns = [column for column in df if column in SURVEY_COLUMNS]
+        rendered = {}
+        for column in columns:
+            rendered[column], invalid = _render(df[column], column)
+            for i in invalid[invalid].index:
+                errors.append(f"{path}: row {i + 2}: {column} = {df.at[i, column]!r} is not a valid "
+                              f"{'PACES rating (1-7)' if column in PACES_COLUMNS else SCHEMA[column]}")
+
+        for i, (user_cell, station_cell) in enumerate(zip(df['user_id'], df['station_number'])):
+            where = f"{path}: row {i + 2}"
+            user_id, station = _key(user_cell), _key(station_cell) if station_cell else ''
+            if user_id is None or station is None:
+                errors.append(f"{where}: invalid key ({user_cell!r}, {station_cell!r})")
+                continue
+            for column in columns:
+                value = rendered[column][i]
+                if value is None:
+                    continue
+                if column in PARTICIPANT_COLUMNS:
+                    put(participants, user_id, column, value, where)
+                elif not station:
+                    errors.append(f"{where}: {column} needs a station_number")
+                else:
+                    put(stations, (user_id, station), column, value, where)
+            if station:
+                stations.setdefault((user_id, station), {})
+            else:
+                participants.setdefault(user_id, {})
+    return stations, participants, errors
+
+
+def join_file(path, stations, participants, dry_run=False):
+    """
+    Join the answers into one per-user station CSV with one read and at most one write.
+
+    Returns:
+        (keys of the file's rows, users of the file's rows, number of cells changed)
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        text = f.read()
+    table = parse_station_csv(text, path)
+    keys, users, changed = set(), set(), 0
+    for row in table.rows:
+        key = (row.get('user_id', ''), row.get('station_number', ''))
+        keys.add(key)
+        users.add(key[0])
+        answers = dict(participants.get(key[0], {}), **stations.get(key, {}))
+        absent = [column for column in answers if column not in table.header]
+        if absent:
+            raise ValueError(f"{path}: no {', '.join(absent)} column(s); run migrate_station_csvs.py first")
+        for column, value in answers.items():
+            if row[column] != value:
+                row[column] = value
+                changed += 1
+    if changed and not dry_run:
+        write_text_atomic(path, dumps_station_csv(table, line_terminator(text)))
+    return keys, users, changed
+
+
+def import_survey(paths, processed_dir=PROCESSED_DIR, dry_run=False, update_master=True):
+    """
+    Import survey exports into the per-user station CSVs and the master.
+
+    Nothing is written if any survey file fails validation.
+
+    Returns:
+        dict with 'errors' (validation and file errors), 'files' ({path:
+        cells changed} for the files that changed), 'cells', 'unmatched'
+        (station keys and participant user IDs with no station row) and
+        'master' (update_master_csv result, or None)
+    """
+    stations, participants, errors = load_answers(paths)
+    result = {'errors': errors, 'files': {}, 'cells': 0, 'unmatched': [], 'master': None}
+    if errors:
+        return result
+
+    seen_keys, seen_users = set(), set()
+    for path in sorted(glob.glob(os.path.join(processed_dir, STATION_CSV_PATTERN))):
+        try:
+            keys, users, changed = join_file(path, stations, participants, dry_run)
+        except (OSError, ValueError) as e:
+            errors.append(str(e))
+            continue
+        seen_keys |= keys
+        seen_users |= users
+        if changed:
+            result['files'][path] = changed
+            result['cells'] += changed
+
+    unmatched = [key for key in stations if key not in seen_keys]
+    reported = {user_id for user_id, _ in unmatched}
+    result['unmatched'] = sorted(
+        unmatched + [(user_id, '') for user_id in participants
+                     if user_id not in seen_users and user_id not in reported],
+        key=lambda key: (int(key[0]), int(key[1] or 0)))
+    if result['files'] and update_master and not dry_run:
+        result['master'] = update_master_csv(processed_dir)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import survey answers into the station CSVs and the master CSV')
+    parser.add_argument('surveys', nargs='+', help='Survey exports (.csv, .xlsx)')
+    parser.add_argument('--processed-dir', default=PROCESSED_DIR,
+                        help=f'Directory of the per-user station CSVs (default: {PROCESSED_DIR})')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and report what would change without writing')
+    args = parser.parse_args()
+
+    result = import_survey(args.surveys, args.processed_dir, args.dry_run)
+    for error in result['errors']:
+        print(f"❌ {error}")
+    if result['errors'] and not result['files']:
+        print("Nothing was written")
+        return 1
+
+    for path, cells in sorted(result['files'].items()):
+        print(f"{'🔍' if args.dry_run else '✅'} {os.path.basename(path)}: {cells} cells")
+    for user_id, station in result['unmatched']:
+        print(f"⚠️  Unmatched: user {user_id}" + (f", station {station}" if station else " (no station rows)"))
+    verb = 'would change' if args.dry_run else 'changed'
+    print(f"\nStation CSVs {verb}: {len(result['files'])}, cells: {result['cells']}, "
+          f"unmatched keys: {len(result['unmatched'])}")
+    master = result['master']
+    if master:
+        print(f"Master CSV {master['status']} ({master['mode']}): {len(master['read'])} files read, "
+              f"{master['rows']} rows")
+        for path, message in master['errors'].items():
+            print(f"❌ Error reading {os.path.basename(path)}: {message}")
+    return 1 if result['errors'] or (master and master['errors']) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
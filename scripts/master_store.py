@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Columnar and indexed copies of the master CSV, with a small query API.
+
+The master CSV is wide (58 columns, 17 of them PACES items) and repeats the
+long data_quality and notes texts on every row, so every consumer that
+parses it pays for all of it. This module materialises it twice:
+
+    MASTER_sphere_heart_rate_data.parquet   typed columns (pyarrow, optional);
+                                            a read touches only the columns
+                                            it asks for
+    MASTER_sphere_heart_rate_data.sqlite    table station_rows indexed on
+                                            (user_id, station_number),
+                                            champ_number and group_number;
+                                            data_quality/notes are stored once
+                                            in a texts table; the stations view
+                                            has the CSV's columns
+
+Both are rebuilt from the CSV (through the typed schema in station_schema.py)
+whenever the CSV's size or modification time changed; the CSV stays the
+source of truth. Parquet is skipped with a warning if pyarrow is not
+installed.
+
+Usage:
+    python scripts/master_store.py                       # materialise if stale
+    python scripts/master_store.py --users 2 3 --columns user_id station_number station_avg_hr
+
+    from master_store import query
+    df = query(['user_id', 'station_number', 'station_avg_hr'], champ_numbers=[4, 5])
+"""
+
+import os
+import sys
+import argparse
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from cache_utils import CACHE_ROOT, read_json, write_json_atomic
+from station_schema import DATETIME_COLUMNS, SCHEMA, STATION_CSV_HEADER, read_station_frame
+from update_master_csv import MASTER_CSV
+
+MASTER_PARQUET = os.path.splitext(MASTER_CSV)[0] + '.parquet'
+MASTER_DB = os.path.splitext(MASTER_CSV)[0] + '.sqlite'
+STORE_STATE = os.path.join(CACHE_ROOT, 'master_store.json')
+
+# Long texts repeated on every row; the SQLite table stores an id into `texts`
+TEXT_COLUMNS = ('data_quality', 'notes')
+SQL_TYPES = {'Int64': 'INTEGER', 'float64': 'REAL'}
+INDEXES = {
+    'idx_user_station': ('user_id', 'station_number'),
+    'idx_champ': ('champ_number',),
+    'idx_group': ('group_number',),
+}
+FILTER_COLUMNS = {
+    'user_ids': 'user_id',
+    'station_numbers': 'station_number',
+    'champ_numbers': 'champ_number',
+    'group_numbers': 'group_number',
+}
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def store_paths():
+    """The files materialise() writes: the SQLite database, and Parquet if pyarrow is installed."""
+    return [MASTER_DB] + ([MASTER_PARQUET] if has_pyarrow() else [])
+
+
+def quote(column):
+    """SQL identifier for a column name (PACES columns contain spaces, slashes and quotes)."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _replace_atomic(path, write):
+    """Call write(tmp_path) for a temp file next to `path`, then rename it over `path`."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_sqlite(df, path):
+    """Write the typed master frame as an indexed SQLite database."""
+    columns = list(df.columns)
+    texts = pd.unique(pd.concat([df[column].astype('string') for column in TEXT_COLUMNS if column in df]).dropna())
+    text_ids = {text: i for i, text in enumerate(texts, 1)}
+
+    rows = pd.DataFrame(index=df.index)
+    for column in columns:
+        values = df[column]
+        if column in TEXT_COLUMNS:
+            values = values.astype('string').map(text_ids).astype('Int64')
+        elif column in DATETIME_COLUMNS:
+            values = values.map(lambda t: t.isoformat(), na_action='ignore')
+        # Python scalars and None: sqlite3 would store numpy integers as blobs
+        rows[column] = [None if pd.isna(value) else value.item() if hasattr(value, 'item') else value
+                        for value in values.astype(object)]
+
+    definitions = [f"{quote(column + '_id')} INTEGER REFERENCES texts (id)" if column in TEXT_COLUMNS
+                   else f"{quote(column)} {SQL_TYPES.get(SCHEMA.get(column), 'TEXT')}"
+                   for column in columns]
+    select = [f"t_{column}.text AS {quote(column)}" if column in TEXT_COLUMNS else f"r.{quote(column)}"
+              for column in columns]
+    joins = [f"LEFT JOIN texts t_{column} ON t_{column}.id = r.{quote(column + '_id')}"
+             for column in columns if column in TEXT_COLUMNS]
+
+    def write(tmp_path):
+        with sqlite3.connect(tmp_path) as con:
+            con.execute("CREATE TABLE texts (id INTEGER PRIMARY KEY, text TEXT NOT NULL)")
+            con.executemany("INSERT INTO texts VALUES (?, ?)", [(i, text) for text, i in text_ids.items()])
+            con.execute(f"CREATE TABLE station_rows ({', '.join(definitions)})")
+            placeholders = ', '.join('?' * len(rows.columns))
+            con.executemany(f"INSERT INTO station_rows VALUES ({placeholders})",
+                            rows.itertuples(index=False, name=None))
+            for name, index_columns in INDEXES.items():
+                if all(column in columns for column in index_columns):
+                    con.execute(f"CREATE INDEX {name} ON station_rows ({', '.join(map(quote, index_columns))})")
+            con.execute(f"CREATE VIEW stations AS SELECT {', '.join(select)} FROM station_rows r {' '.join(joins)}")
+        con.close()
+
+    _replace_atomic(path, write)
+
+
+def write_parquet(df, path):
+    """Write the typed master frame as Parquet (requires pyarrow)."""
+    _replace_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, engine='pyarrow', index=False))
+
+
+def is_stale(master_csv=MASTER_CSV, state_path=STORE_STATE):
+    """True if the master CSV changed since the store was materialised, or a store file is missing."""
+    stat = os.stat(master_csv)
+    state = read_json(state_path, default={})
+    return (state.get('master') != [stat.st_size, stat.st_mtime_ns]
+            or not all(os.path.exists(path) for path in store_paths()))
+
+
+def materialize(master_csv=MASTER_CSV, force=False, state_path=STORE_STATE):
+    """
+    Rebuild the Parquet and SQLite copies of the master CSV if it changed.
+
+    Returns:
+        'unchanged', or 'written' with what was skipped
+    """
+    if not force and not is_stale(master_csv, state_path):
+        return 'unchanged'
+    stat = os.stat(master_csv)
+    df = read_station_frame(master_csv)
+    write_sqlite(df, MASTER_DB)
+    status = 'written'
+    if has_pyarrow():
+        write_parquet(df, MASTER_PARQUET)
+    else:
+        status = 'written (Parquet skipped: pyarrow is not installed)'
+    write_json_atomic(state_path, {'master': [stat.st_size, stat.st_mtime_ns]})
+    return status
+
+
+def _typed(df):
+    """Apply the schema dtypes to columns read back from either store."""
+    for column in df.columns:
+        dtype = SCHEMA.get(column)
+        if not dtype or str(df[column].dtype) == dtype:
+            continue
+        if column in DATETIME_COLUMNS:
+            df[column] = pd.to_datetime(df[column], utc=True, format='ISO8601')
+        else:
+            # All-NA columns come back as object (SQLite, and Parquet for an empty category)
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def query(columns=None, user_ids=None, station_numbers=None, champ_numbers=None, group_numbers=None,
+          backend=None):
+    """
+    Read rows and columns of the master with the schema dtypes.
+
+    The store is materialised first if the master CSV changed. Filters are
+    lists of values (rows matching all given filters are returned); only
+    the requested columns are read.
+
+    Args:
+        columns: Column names (default: all)
+        backend: 'parquet' or 'sqlite' (default: parquet when pyarrow is installed)
+
+    Returns:
+        DataFrame ordered by user_id and station_number
+    """
+    backend = backend or ('parquet' if has_pyarrow() else 'sqlite')
+    if backend not in ('parquet', 'sqlite'):
+        raise ValueError(f"Unknown backend {backend!r}; choose 'parquet' or 'sqlite'")
+    if backend == 'parquet' and not has_pyarrow():
+        raise ImportError("The Parquet backend needs pyarrow; use backend='sqlite' or `pip install pyarrow`")
+    materialize()
+
+    columns = list(columns) if columns else None
+    unknown = sorted(set(columns or ()) - set(STATION_CSV_HEADER))
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    filters = {FILTER_COLUMNS[name]: list(values) for name, values in
+               [('user_ids', user_ids), ('station_numbers', station_numbers),
+                ('champ_numbers', champ_numbers), ('group_numbers', group_numbers)]
+               if values is not None}
+
+    if backend == 'parquet':
+        df = _typed(pd.read_parquet(MASTER_PARQUET, columns=columns,
+                                    filters=[(column, 'in', values) for column, values in filters.items()] or None))
+    else:
+        select = ', '.join(map(quote, columns)) if columns else '*'
+        where = ' AND '.join(f"{quote(column)} IN ({', '.join('?' * len(values))})"
+                             for column, values in filters.items())
+        sql = f"SELECT {select} FROM stations" + (f" WHERE {where}" if where else '')
+        with sqlite3.connect(f'file:{MASTER_DB}?mode=ro', uri=True) as con:
+            df = _typed(pd.read_sql_query(sql, con, params=[v for values in filters.values() for v in values]))
+        con.close()
+
+    order = [column for column in ('user_id', 'station_number') if column in df]
+    if order:
+        df = df.sort_values(order, kind='stable')
+    return df.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialise and query the Parquet/SQLite copies of the master CSV')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the master CSV is unchanged')
+    parser.add_argument('--users', type=int, nargs='+', help='Query: user IDs')
+    parser.add_argument('--stations', type=int, nargs='+', help='Query: station numbers')
+    parser.add_argument('--champs', type=int, nargs='+', help='Query: champ numbers')
+    parser.add_argument('--groups', type=int, nargs='+', help='Query: group numbers')
+    parser.add_argument('--columns', nargs='+', help='Query: columns to print')
+    parser.add_argument('--backend', choices=['parquet', 'sqlite'], help='Query backend')
+    args = parser.parse_args()
+
+    if not os.path.exists(MASTER_CSV):
+        print(f"❌ {MASTER_CSV} not found; run update_master_csv.py first")
+        return 1
+    print(f"✅ Master store {materialize(force=args.force)}: {', '.join(store_paths())}")
+
+    if any(value is not None for value in (args.users, args.stations, args.champs, args.groups, args.columns)):
+        try:
+            df = query(args.columns, args.users, args.stations, args.champs, args.groups, backend=args.backend)
+        except (ValueError, ImportError) as e:
+            print(f"❌ {e}")
+            return 1
+        with pd.option_context('display.max_columns', None, 'display.width', 200):
+            print(df.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
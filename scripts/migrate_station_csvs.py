@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Versioned, one-pass migrations for the per-user station CSVs.
+
+Each fix that used to be its own script (reading and rewriting every station
+CSV, and losing data when run in the wrong order) is now a migration
+registered in station_migrations.py. Migrations are numbered by registration
+order: migration N brings a file from schema version N-1 to N. The version
+of every file is recorded in a sidecar manifest,
+output/processed/station_csv_versions.json, together with the SHA-256 of the
+file as migrated; a file whose contents no longer match (rewritten by an
+export, or edited by hand) starts again from version 0, which is safe
+because every migration only fills in what is missing.
+
+A run reads each file once, applies its pending migrations in order to the
+parsed rows, and writes the file once, atomically, and only if the result
+differs from what is on disk (line endings are kept). Files are migrated in
+parallel.
+
+A migration is a function `migration(table, ctx) -> bool` that edits
+table.header / table.rows (lists of strings / dicts of strings) in place and
+returns True if it changed anything. New migrations are appended; never
+reorder or remove one, as that renumbers the versions already recorded.
+
+Usage:
+    python scripts/migrate_station_csvs.py --list-migrations
+    python scripts/migrate_station_csvs.py --dry-run
+    python scripts/migrate_station_csvs.py --jobs 8
+"""
+
+import os
+import re
+import io
+import csv
+import glob
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from cache_utils import file_sha256, read_json, write_json_atomic
+
+DEFAULT_PATTERN = 'output/processed/user_*_station_data*.csv'
+VERSIONS_MANIFEST = 'output/processed/station_csv_versions.json'
+
+# name -> (function, description); in registration order, which is version order
+MIGRATIONS = {}
+
+
+def load_migrations():
+    """Import station_migrations so its migrations are registered (also in spawned workers)."""
+    import station_migrations  # noqa: F401
+
+
+def migration(name, description):
+    """Register a migration; its schema version is its position in registration order."""
+    def register(func):
+        MIGRATIONS[name] = (func, description)
+        return func
+    return register
+
+
+def version_of(name):
+    """Schema version a file is at once migration `name` has been applied."""
+    return list(MIGRATIONS).index(name) + 1
+
+
+class StationTable:
+    """A station CSV as its header and rows of strings."""
+
+    def __init__(self, header, rows):
+        self.header = header
+        self.rows = rows
+
+    def add_column(self, column, value=''):
+        self.header.append(column)
+        for row in self.rows:
+            row[column] = value
+
+
+class MigrationContext:
+    """What a migration knows about the file it is migrating."""
+
+    def __init__(self, path, options=None):
+        self.path = path
+        match = re.search(r'user_(\d+)_', os.path.basename(path))
+        self.user_id = int(match.group(1)) if match else None
+        self.options = options or {}
+        self.messages = []
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+def parse_station_csv(text, path=''):
+    """
+    Parse station CSV text into a StationTable.
+
+    Raises:
+        ValueError: if a row has a different number of fields than the header
+    """
+    records = list(csv.reader(io.StringIO(text, newline='')))
+    header = records[0] if records else []
+    for line, record in enumerate(records[1:], 2):
+        if len(record) != len(header):
+            raise ValueError(f"{path}: line {line} has {len(record)} fields, the header has {len(header)}")
+    return StationTable(header, [dict(zip(header, record)) for record in records[1:]])
+
+
+def line_terminator(text):
+    """'\\n' if the CSV text uses it, else the csv module's '\\r\\n' (as in the per-user exports)."""
+    return '\n' if '\n' in text and not text.split('\n', 1)[0].endswith('\r') else '\r\n'
+
+
+def dumps_station_csv(table, lineterminator='\r\n'):
+    out = io.StringIO(newline='')
+    writer = csv.DictWriter(out, fieldnames=table.header, lineterminator=lineterminator)
+    writer.writeheader()
+    writer.writerows(table.rows)
+    return out.getvalue()
+
+
+def write_text_atomic(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def migrate_file(path, from_version, to_version, dry_run=False, options=None):
+    """
+    Apply migrations from_version+1 .. to_version to one file with one read and at most one write.
+
+    Returns:
+        dict with changed (bool), migrations (names of those that changed
+        something), messages and sha256 (of the file as migrated)
+    """
+    load_migrations()
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        text = f.read()
+    table = parse_station_csv(text, path)
+
+    ctx = MigrationContext(path, options)
+    pending = list(MIGRATIONS.items())[from_version:to_version]
+    applied = [name for name, (func, _) in pending if func(table, ctx)]
+    new_text = dumps_station_csv(table, line_terminator(text)) if applied else text
+    changed = new_text != text
+    if changed and not dry_run:
+        write_text_atomic(path, new_text)
+    return {'changed': changed, 'migrations': applied if changed else [], 'messages': ctx.messages,
+            'sha256': file_sha256(path) if not dry_run else None}
+
+
+def pending_versions(paths, to_version, manifest):
+    """{path: recorded version} for files below `to_version`; unknown or modified files are at version 0."""
+    pending = {}
+    for path in paths:
+        entry = manifest.get(path)
+        version = entry['version'] if entry and entry.get('sha256') == file_sha256(path) else 0
+        if version < to_version:
+            pending[path] = version
+    return pending
+
+
+def migrate_all(paths, to_version=None, jobs=None, dry_run=False, options=None,
+                manifest_path=VERSIONS_MANIFEST):
+    """
+    Migrate files across a process pool and record their versions.
+
+    Returns:
+        {path: result or {'error': message}} for the files that had
+        pending migrations
+    """
+    load_migrations()
+    to_version = len(MIGRATIONS) if to_version is None else to_version
+    manifest = read_json(manifest_path, default={})
+    pending = pending_versions(paths, to_version, manifest)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {path: pool.submit(migrate_file, path, version, to_version, dry_run, options)
+                   for path, version in pending.items()}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = {'error': str(e)}
+
+    if not dry_run and pending:
+        for path, result in results.items():
+            if 'error' not in result:
+                manifest[path] = {'version': to_version, 'sha256': result['sha256']}
+        write_json_atomic(manifest_path, {path: entry for path, entry in sorted(manifest.items())
+                                          if os.path.exists(path)})
+    return results
+
+
+def print_summary(results, n_files, dry_run=False):
+    """Print one line per migrated file; returns the number of files with errors."""
+    errors = changed = 0
+    for path, result in sorted(results.items()):
+        if 'error' in result:
+            errors += 1
+            print(f"❌ {path}: {result['error']}")
+            continue
+        if result['changed']:
+            changed += 1
+            print(f"{'🔍' if dry_run else '✅'} {path}: {', '.join(result['migrations'])}")
+        for message in result['messages']:
+            print(f"⚠️  {path}: {message}")
+    verb = 'would change' if dry_run else 'changed'
+    print(f"\nStation CSVs: {n_files}, migrated: {len(results)}, {verb}: {changed}, errors: {errors}")
+    return errors
+
+
+def main(target=None, description=None, argv=None, pattern=DEFAULT_PATTERN):
+    """
+    Command line entry point, shared by the thin per-fix wrapper scripts.
+
+    Args:
+        target: Migrate up to and including this migration (default: all);
+            earlier pending migrations always run first
+        description: argparse description
+        pattern: Default station CSV glob
+    """
+    load_migrations()
+    parser = argparse.ArgumentParser(description=description or 'Bring station CSVs to the current schema version')
+    if target is None:
+        parser.add_argument('--to', dest='target', choices=list(MIGRATIONS), default=None,
+                            help='Stop after this migration (default: apply all)')
+        parser.add_argument('--list-migrations', action='store_true', help='List the migrations and exit')
+    parser.add_argument('--pattern', default=pattern, help=f'Station CSV glob (default: {pattern})')
+    parser.add_argument('--data-dir', default='data', help='Directory of the TCX files (default: data)')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args(argv)
+
+    if target is None:
+        if args.list_migrations:
+            for version, (name, (_, desc)) in enumerate(MIGRATIONS.items(), 1):
+                print(f"{version:2d}  {name:28s} {desc}")
+            return 0
+        target = args.target
+
+    paths = sorted(glob.glob(args.pattern))
+    if not paths:
+        print(f"No station CSVs found matching {args.pattern}")
+        return 0
+    to_version = version_of(target) if target else len(MIGRATIONS)
+    print(f"Migrating {len(paths)} station CSVs to schema version {to_version}")
+    results = migrate_all(paths, to_version, args.jobs, args.dry_run, {'data_dir': args.data_dir})
+    return 1 if print_summary(results, len(paths), args.dry_run) else 0
+
+
+if __name__ == '__main__':
+    # Run through the importable module so the migrations register into the same MIGRATIONS
+    from migrate_station_csvs import main
+    raise SystemExit(main())
@@ -0,0 +1,497 @@
+"""
+Notebook passes for notebook_transform.py.
+
+Each pass is the per-notebook body of one of the old fix/update scripts,
+made idempotent so a pass that has already been applied reports no change.
+Registration order is the order passes run in.
+"""
+
+import copy
+import json
+import os
+import re
+
+from notebook_transform import (cell_source, code_cells, find_code_cell, new_code_cell, notebook_pass,
+                                set_cell_source)
+
+ALIGNMENT_GLOBALS = 'current_x_offset, current_x_scale, current_y_min, current_y_max, current_alpha'
+
+TEMPLATE_NOTEBOOK = 'notebooks/data_exploration/user_58_data_exploration.ipynb'
+TEMPLATE_USER_ID = 58
+
+
+def _plots_dir_cell(user_id):
+    return ("# Create output directories for plots\n"
+            "import os\n"
+            f"plots_dir = f'output/plots/user_{user_id}'\n"
+            "os.makedirs(plots_dir, exist_ok=True)\n"
+            "print(f\"Created plots directory: {plots_dir}\")\n")
+
+
+def _replace_source(cell, old_text, new_text):
+    """Set a cell's source to `new_text`; True if it differs from `old_text`."""
+    if new_text == old_text:
+        return False
+    set_cell_source(cell, new_text)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Template sync (update_existing_notebooks.py)
+# ---------------------------------------------------------------------------
+
+@notebook_pass('template_sync', 'Replace the notebook with the user_58 template, keeping the user ID', default=False)
+def template_sync(nb, ctx):
+    path = ctx.options.get('template', TEMPLATE_NOTEBOOK)
+    if ctx.user_id is None or os.path.abspath(ctx.path) == os.path.abspath(path):
+        return False
+    if not ctx.options.get('force'):
+        missing = [f for f in (f'charts_cropped/user_{ctx.user_id}.png', f'data/{ctx.user_id}-d.tcx')
+                   if not os.path.exists(f)]
+        if missing:
+            ctx.log(f"skipped template sync, missing {', '.join(missing)} (use --force)")
+            return False
+
+    with open(path, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    user_nb = copy.deepcopy(template)
+    for cell in user_nb['cells']:
+        lines = cell['source'] if isinstance(cell['source'], list) else cell['source'].splitlines(keepends=True)
+        updated = []
+        for line in lines:
+            line = line.replace(f'User {TEMPLATE_USER_ID}', f'User {ctx.user_id}')
+            if cell['cell_type'] == 'code':
+                line = line.replace(f'user_{TEMPLATE_USER_ID}', f'user_{ctx.user_id}')
+                line = line.replace(f'{TEMPLATE_USER_ID}-d.tcx', f'{ctx.user_id}-d.tcx')
+            updated.append(line)
+        cell['source'] = updated
+    if user_nb == nb:
+        return False
+    nb.clear()
+    nb.update(user_nb)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Plot directory and plot saving (fix_plots_dir.py, fix_plot_saving.py, add_plot_saving.py)
+# ---------------------------------------------------------------------------
+
+@notebook_pass('plots_dir', 'Define plots_dir (output/plots/user_XX) after the imports cell')
+def plots_dir(nb, ctx):
+    if find_code_cell(nb, 'plots_dir = ') is not None:
+        return False
+    index = find_code_cell(nb, 'import ')
+    if index is None:
+        ctx.log('no imports cell to add plots_dir after')
+        return False
+    nb['cells'].insert(index + 1, new_code_cell(_plots_dir_cell(ctx.user_id)))
+    return True
+
+
+def _add_savefig(source, filename):
+    """Save to `filename` before every plt.show(), at the indentation of the show call."""
+    savefig = f"plt.savefig(f'{{plots_dir}}/{filename}', dpi=300, bbox_inches='tight')"
+    return re.sub(
+        r"^([ \t]*)(?:plt\.tight_layout\(\)\s*\n[ \t]*)?plt\.show\(\)",
+        lambda m: f"{m[1]}plt.tight_layout()\n{m[1]}# Save the plot\n{m[1]}{savefig}\n{m[1]}plt.show()",
+        source, flags=re.MULTILINE)
+
+
+@notebook_pass('high_hr_periods_saving', 'Save the STEP 8 high HR periods plot')
+def high_hr_periods_saving(nb, ctx):
+    index = find_code_cell(nb, "def analyze_hr_patterns",
+                           "# Find high heart rate periods that might indicate stations")
+    if index is None:
+        return False
+    cell = nb['cells'][index]
+    source = cell_source(cell)
+    if "/high_hr_periods.png'" in source:
+        return False
+    return _replace_source(cell, source, source.replace(
+        "plt.tight_layout()\n        plt.show()",
+        "plt.tight_layout()\n        # Save the plot\n"
+        "        plt.savefig(f'{plots_dir}/high_hr_periods.png', dpi=300, bbox_inches='tight')\n        plt.show()"))
+
+
+@notebook_pass('plot_saving', 'Save heart_rate_over_time, aligned_hr_data and heart_rate_with_stations PNGs')
+def plot_saving(nb, ctx):
+    changed = False
+    for _, cell, source in code_cells(nb):
+        # Cells that already save their figure (e.g. high_hr_periods.png) are left alone
+        if "plt.show()" not in source or "plt.savefig(f'{plots_dir}/" in source:
+            continue
+        if (("STEP 2: Visualize" in source or "Heart Rate Over Time" in source)
+                and "plt.figure(figsize=" in source):
+            filename = 'heart_rate_over_time.png'
+        elif "def update_alignment" in source or "def update_plot" in source:
+            filename = 'aligned_hr_data.png'
+        elif ("def visualize_with_stations" in source or "Function to visualize stations" in source
+              or "station boundaries" in source.lower()):
+            filename = 'heart_rate_with_stations.png'
+        else:
+            continue
+        changed |= _replace_source(cell, source, _add_savefig(source, filename))
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# Alignment globals (fix_alignment_globals.py, fix_alignment_parameters.py, fix_current_variables.py)
+# ---------------------------------------------------------------------------
+
+@notebook_pass('alignment_globals', 'Initialise the current_* alignment globals after the plots_dir cell')
+def alignment_globals(nb, ctx):
+    for _, _, source in code_cells(nb):
+        if "current_x_offset =" in source and "def " not in source:
+            return False
+    index = find_code_cell(nb, 'plots_dir = ', last=True)
+    if index is None:
+        ctx.log('no plots_dir cell to add the alignment globals after')
+        return False
+    nb['cells'].insert(index + 1, new_code_cell(
+        "# Initialize global alignment parameters\n"
+        "# These will be updated by the interactive alignment tool\n"
+        "current_x_offset = -0.8  # Default starting values\n"
+        "current_x_scale = 1.0\n"
+        "current_y_min = 90\n"
+        "current_y_max = 190\n"
+        "current_alpha = 0.6\n"))
+    return True
+
+
+@notebook_pass('alignment_update_globals', 'Make update_plot/update_alignment set the current_* globals')
+def alignment_update_globals(nb, ctx):
+    changed = False
+    for _, cell, source in code_cells(nb):
+        if "global current_x_offset" in source:
+            continue
+        updated = source
+        if "def update_plot(b):" in source:
+            updated = updated.replace("def update_plot(b):", f"def update_plot(b):\n    global {ALIGNMENT_GLOBALS}")
+            if "current_x_offset = " not in updated:
+                updated = updated.replace(
+                    "alpha = alpha_slider.value",
+                    "alpha = alpha_slider.value\n    \n    # Update global variables\n"
+                    "    current_x_offset = x_offset\n    current_x_scale = x_scale\n"
+                    "    current_y_min = y_min\n    current_y_max = y_max\n    current_alpha = alpha", 1)
+        elif "def update_alignment" in source:
+            updated = re.sub(
+                r"def update_alignment\([^)]*\):",
+                "def update_alignment(x_offset=-0.8, x_scale=1.0, y_min=90, y_max=190, alpha=0.6):\n"
+                f"    global {ALIGNMENT_GLOBALS}\n"
+                "    current_x_offset = x_offset\n    current_x_scale = x_scale\n"
+                "    current_y_min = y_min\n    current_y_max = y_max\n    current_alpha = alpha",
+                updated)
+        changed |= _replace_source(cell, source, updated)
+    return changed
+
+
+@notebook_pass('visualize_globals', 'Declare the current_* globals in visualize_with_stations')
+def visualize_globals(nb, ctx):
+    index = find_code_cell(nb, "def visualize_with_stations(")
+    if index is None:
+        return False
+    cell = nb['cells'][index]
+    source = cell_source(cell)
+    if "global current_x_offset" in source or "current_x_offset =" not in source:
+        return False
+    return _replace_source(cell, source, re.sub(
+        r"(def visualize_with_stations\([^\)]*\):)",
+        rf"\1\n    # Use stored alignment parameters if not specified\n    global {ALIGNMENT_GLOBALS}",
+        source))
+
+
+# ---------------------------------------------------------------------------
+# Metadata and calories (update_metadata_fields.py)
+# ---------------------------------------------------------------------------
+
+METADATA_CELL = """# Load user metadata
+import pandas as pd
+try:
+    metadata_df = pd.read_csv('metadata/user_metadata.csv')
+    user_meta = metadata_df[metadata_df['user_id'] == USER_ID]
+    if not user_meta.empty:
+        user_meta = user_meta.iloc[0]
+        age = user_meta['age'] if not pd.isna(user_meta['age']) else None
+        gender = user_meta['gender'] if not pd.isna(user_meta['gender']) else None
+        height_cm = user_meta['height_cm'] if not pd.isna(user_meta['height_cm']) else None
+        weight_kg = user_meta['weight_kg'] if not pd.isna(user_meta['weight_kg']) else None
+        champ_number = user_meta['champ_number'] if not pd.isna(user_meta['champ_number']) else None
+        print(f"Loaded metadata for user {USER_ID}: age={age}, gender={gender}, height={height_cm}cm, weight={weight_kg}kg, champ={champ_number}")
+    else:
+        print(f"No metadata found for user {USER_ID}")
+        age = gender = height_cm = weight_kg = champ_number = None
+except Exception as e:
+    print(f"Error loading metadata: {e}")
+    age = gender = height_cm = weight_kg = champ_number = None
+"""
+
+METADATA_FIELDS = """
+            # User metadata
+            'age': age,
+            'gender': gender,
+            'height_cm': height_cm,
+            'weight_kg': weight_kg,
+            'champ_number': champ_number,
+            'calories_burned': calories_burned,
+
+            """
+
+
+@notebook_pass('metadata_loading', 'Load metadata/user_metadata.csv after the USER_ID cell')
+def metadata_loading(nb, ctx):
+    if find_code_cell(nb, "user_metadata.csv") is not None:
+        return False
+    user_cells = [i for i, _, source in code_cells(nb)
+                  if "USER_ID = " in source or f"user_id': {ctx.user_id}" in source]
+    if not user_cells:
+        return False
+    nb['cells'].insert(user_cells[-1] + 1, new_code_cell(METADATA_CELL))
+    return True
+
+
+@notebook_pass('calories', 'Unpack calories_burned from parse_tcx_to_df')
+def calories(nb, ctx):
+    old_call = "df, session_total_sec, sessions_avg_hr, session_max_hr = parse_tcx_to_df"
+    index = find_code_cell(nb, old_call)
+    if index is None:
+        return False
+    cell = nb['cells'][index]
+    source = cell_source(cell)
+    updated = source.replace(old_call, old_call.replace("session_max_hr =", "session_max_hr, calories_burned ="))
+    updated = updated.replace(
+        "print(f\"Average HR: {sessions_avg_hr:.1f} bpm, Maximum HR: {session_max_hr} bpm\")",
+        "print(f\"Average HR: {sessions_avg_hr:.1f} bpm, Maximum HR: {session_max_hr} bpm, Calories: {calories_burned}\")")
+    return _replace_source(cell, source, updated)
+
+
+@notebook_pass('metadata_fields', 'Add the metadata fields to process_station_data rows')
+def metadata_fields(nb, ctx):
+    index = find_code_cell(nb, "def process_station_data")
+    if index is None:
+        return False
+    cell = nb['cells'][index]
+    source = cell_source(cell)
+    if "'user_id':" not in source or "'age'" in source:
+        return False
+    before, after = source.split("'user_id':", 1)
+    if "'station_number':" not in after:
+        return False
+    user_section, rest = after.split("'station_number':", 1)
+    return _replace_source(cell, source,
+                           before + "'user_id':" + user_section + METADATA_FIELDS + "'station_number':" + rest)
+
+
+# ---------------------------------------------------------------------------
+# Station processing (update_station_processing.py)
+# ---------------------------------------------------------------------------
+
+DEBUG_MARKER = "# Debug information to verify station duration calculation"
+LOCAL_MARKER = "# Get the latest station data using the local process_station_data function"
+
+
+def fix_process_station_data(cell_source, user_id):
+    """Use the full range for station 3, inclusive end cutoffs and timestamp-based durations."""
+    cell_source = re.sub(
+        r"segment = df\[\(df\['elapsed_min'\] >= start_min\) & \(df\['elapsed_min'\] < end_min\)\]",
+        """# For station 3, ensure we use the full range to the end of the session
+        if i == 3:
+            segment = df[(df['elapsed_min'] >= start_min)]
+        else:
+            # For other stations, use the defined cutoffs
+            segment = df[(df['elapsed_min'] >= start_min) & (df['elapsed_min'] <= end_min)]""",
+        cell_source)
+    if DEBUG_MARKER not in cell_source:
+        cell_source = re.sub(
+            r"if segment\.empty:\s+print\(f\"Warning: No data found for Station \{i\}\"\)\s+continue\s+",
+            """if segment.empty:
+            print(f"Warning: No data found for Station {i}")
+            continue
+        
+        """ + DEBUG_MARKER + """
+        actual_duration = (segment['timestamp'].iloc[-1] - segment['timestamp'].iloc[0]).total_seconds() / 60
+        cutoff_duration = end_min - start_min
+        print(f"Station {i} - Cutoff duration: {cutoff_duration:.2f} min, Actual data duration: {actual_duration:.2f} min")
+        print(f"  First point: {segment['elapsed_min'].iloc[0]:.2f} min, Last point: {segment['elapsed_min'].iloc[-1]:.2f} min")
+            
+        # Calculate the exact duration from the timestamp difference for all stations
+        station_duration = (segment['timestamp'].iloc[-1] - segment['timestamp'].iloc[0]).total_seconds() / 60
+        if i == 3:
+            print(f"  Station {i} exact duration: {station_duration:.2f} minutes")
+
+        """,
+            cell_source)
+    cell_source = re.sub(
+        r"'station_duration_min': \(segment\['timestamp'\]\.iloc\[-1\] - segment\['timestamp'\]\.iloc\[0\]\)\.total_seconds\(\) / 60,",
+        "'station_duration_min': station_duration,",
+        cell_source)
+    if user_id:
+        cell_source = re.sub(r"'user_id': \d+,", f"'user_id': {user_id},", cell_source)
+    return cell_source
+
+
+def create_fixed_process_station_data(user_id):
+    """The fixed process_station_data function for a specific user."""
+    return f"""# Copy the process_station_data function here to ensure it's available
+def process_station_data():
+    station_rows = []
+
+    for i, (start_min, end_min) in enumerate(cutoffs, 1):
+        # For station 3, ensure we use the full range to the end of the session
+        if i == 3:
+            segment = df[(df['elapsed_min'] >= start_min)]
+        else:
+            # For other stations, use the defined cutoffs
+            segment = df[(df['elapsed_min'] >= start_min) & (df['elapsed_min'] <= end_min)]
+
+        if segment.empty:
+            print(f"Warning: No data found for Station {{i}}")
+            continue
+
+        # Debug information to verify station duration calculation
+        actual_duration = (segment['timestamp'].iloc[-1] - segment['timestamp'].iloc[0]).total_seconds() / 60
+        cutoff_duration = end_min - start_min
+        print(f"Station {{i}} - Cutoff duration: {{cutoff_duration:.2f}} min, Actual data duration: {{actual_duration:.2f}} min")
+        print(f"  First point: {{segment['elapsed_min'].iloc[0]:.2f}} min, Last point: {{segment['elapsed_min'].iloc[-1]:.2f}} min")
+
+        # Calculate the exact duration from the timestamp difference for all stations
+        station_duration = (segment['timestamp'].iloc[-1] - segment['timestamp'].iloc[0]).total_seconds() / 60
+        if i == 3:
+            print(f"  Station {{i}} exact duration: {{station_duration:.2f}} minutes")
+
+        station_row = {{
+            # User and session info
+            'user_id': {user_id},
+            'gender': 'NA',
+            'circuit_type': 'NA',
+
+            # Station info
+            'station_number': i,
+            'station_name': 'NA',
+
+            # Session timing and HR data
+            'session_start_time': df['timestamp'].iloc[0],
+            'session_end_time': df['timestamp'].iloc[-1],
+            'session_duration_min': session_duration_min,
+            'session_avg_hr': sessions_avg_hr,
+            'session_max_hr': session_max_hr,
+
+            # Station timing and HR data
+            'station_start_time': segment['timestamp'].iloc[0],
+            'station_end_time': segment['timestamp'].iloc[-1],
+            'station_duration_min': station_duration,
+            'station_avg_hr': segment['heart_rate'].mean(),
+            'station_max_hr': segment['heart_rate'].max(),
+
+            # Per-station ratings
+            'motivation': 'NA',  # 1-5 scale
+            'enjoyment': 'NA',   # 1-5 scale (previously 'fun')
+            'team_experience': 'NA',  # 1-5 scale (only for exergame duos)
+            'subjective_physical_exertion': 'NA',  # Borg RPE 1-10 scale
+            'subjective_cognitive_exertion': 'NA',  # 1-5 scale
+
+            # Final evaluation (same for all stations of a user)
+            'overall_experience': 'NA',  # 1-5 scale
+            'overall_motivation': 'NA',  # 1-5 scale
+            'feedback': 'NA',  # Free text
+
+            # Additional data
+            'sports_exp': 'NA',
+            'gaming_exp': 'NA',
+            'data_quality': 'Good',
+            'notes': ''
+        }}
+        station_rows.append(station_row)
+
+    # Create and display DataFrame
+    station_df = pd.DataFrame(station_rows)
+    display(station_df)
+
+    # Return the DataFrame for further use
+    return station_df"""
+
+
+def fix_save_station_data(cell_source, user_id):
+    """Give save_station_data its own copy of the fixed process_station_data."""
+    cell_source = re.sub(
+        r"# STEP 7: Save processed data to CSV\s+# Function to save station data to CSV",
+        lambda _: (f"# STEP 7: Save processed data to CSV\n\n{create_fixed_process_station_data(user_id)}"
+                   "\n\n# Function to save station data to CSV"),
+        cell_source)
+    cell_source = cell_source.replace("# Get the latest station data", LOCAL_MARKER)
+    if user_id:
+        cell_source = re.sub(r"output_path = 'output/processed/user_\d+_station_data\.csv'",
+                             f"output_path = 'output/processed/user_{user_id}_station_data.csv'", cell_source)
+    return cell_source
+
+
+def fix_dataframe_inspection(cell_source, user_id):
+    """Give the DataFrame inspection cell its own copy of the fixed process_station_data."""
+    return re.sub(
+        r"# Display full DataFrame for inspection\s+# This will show all columns and rows without truncation\s+\n# First, get the latest processed data",
+        lambda _: ("# Display full DataFrame for inspection\n# This will show all columns and rows without truncation"
+                   f"\n\n{create_fixed_process_station_data(user_id)}\n\n# First, get the latest processed data"),
+        cell_source)
+
+
+@notebook_pass('station_processing', 'Fix station 3 range and durations in the station processing cells')
+def station_processing(nb, ctx):
+    changed = False
+    for _, cell, source in code_cells(nb):
+        if ("def process_station_data():" in source
+                and "segment = df[(df['elapsed_min'] >= start_min) & (df['elapsed_min']" in source):
+            updated = fix_process_station_data(source, ctx.user_id)
+        elif ("def save_station_data():" in source and "# Get the latest station data" in source
+              and LOCAL_MARKER not in source):
+            updated = fix_save_station_data(source, ctx.user_id)
+        elif "# Display full DataFrame for inspection" in source and "inspection_df = process_station_data()" in source:
+            updated = fix_dataframe_inspection(source, ctx.user_id)
+        else:
+            continue
+        changed |= _replace_source(cell, source, updated)
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# Runtime installs (peak detection notebooks)
+# ---------------------------------------------------------------------------
+
+PLOTLY_INSTALL = re.compile(r"# Install plotly if missing\ntry:\n    import plotly\n.*?"
+                            r"print\(\"✅ Plotly installed successfully!\"\)\n\n?", re.DOTALL)
+PLOTLY_IMPORTS = ("\n# Plotly imports\nimport plotly.graph_objects as go\nimport plotly.express as px\n"
+                  "from plotly.subplots import make_subplots\n")
+
+
+@notebook_pass('no_runtime_install', 'Drop the pip install of plotly (and plotly imports nothing uses)')
+def no_runtime_install(nb, ctx):
+    index = find_code_cell(nb, "pip", "install")
+    if index is None:
+        return False
+    cell = nb['cells'][index]
+    source = cell_source(cell)
+    updated = PLOTLY_INSTALL.sub("", source)
+    updated = updated.replace("# Install plotly if needed and import all required libraries",
+                              "# Import all required libraries")
+    rest = "".join(text for i, _, text in code_cells(nb) if i != index)
+    if "subprocess." not in updated + rest:
+        updated = updated.replace("import subprocess\n", "")
+    if not re.search(r"\b(go|px)\.|make_subplots\(", updated.replace(PLOTLY_IMPORTS, "") + rest):
+        updated = updated.replace(PLOTLY_IMPORTS, "")
+    return _replace_source(cell, source, updated)
+
+
+# ---------------------------------------------------------------------------
+# Output stripping
+# ---------------------------------------------------------------------------
+
+@notebook_pass('strip_outputs', 'Remove outputs, execution counts and widget state (figures live in output/)')
+def strip_outputs(nb, ctx):
+    changed = nb.get('metadata', {}).pop('widgets', None) is not None
+    for cell in nb['cells']:
+        if cell['cell_type'] != 'code':
+            continue
+        changed |= cell.get('metadata', {}).pop('execution', None) is not None
+        if cell.get('outputs') or cell.get('execution_count') is not None:
+            cell['outputs'] = []
+            cell['execution_count'] = None
+            changed = True
+    return changed
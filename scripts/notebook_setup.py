@@ -0,0 +1,70 @@
+"""
+Fast STEP 1 for the analysis notebooks.
+
+Importing pandas, numpy, matplotlib, scipy, ipywidgets and plotly up front
+costs several seconds before a notebook can even parse its TCX file. The
+templates instead bind those names to `lazy` stand-ins, so each library is
+imported the first time a step actually uses it, and loading the session
+only pays for pandas. Nothing is ever installed at runtime: a missing
+library raises an ImportError pointing at Requirements.txt.
+
+Usage (in a notebook, after putting scripts/ on sys.path):
+    from notebook_setup import lazy
+    plt = lazy('matplotlib.pyplot')
+    interact = lazy('ipywidgets', 'interact')
+
+check_startup_time.py measures the templates' time to the data-loaded state
+against a budget.
+"""
+
+import importlib
+
+INSTALL_HINT = "install the project requirements with `pip install -r Requirements.txt`"
+
+
+class LazyImport:
+    """
+    Stand-in for a module, or a name inside one, imported on first use.
+
+    Attribute access, calls and repr all resolve the target first, so
+    `pd.DataFrame(...)`, `plt.subplots()` and `FloatSlider(...)` work as if
+    the import had happened at the top of the notebook.
+    """
+
+    def __init__(self, module, attr=None):
+        self.__dict__['_module'] = module
+        self.__dict__['_attr'] = attr
+        self.__dict__['_target'] = None
+
+    def _resolve(self):
+        if self._target is None:
+            try:
+                module = importlib.import_module(self._module)
+            except ImportError as e:
+                raise ImportError(f"{self._module} is needed for this step; {INSTALL_HINT}") from e
+            self.__dict__['_target'] = getattr(module, self._attr) if self._attr else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self._resolve())
+
+    def __repr__(self):
+        if self._target is None:
+            name = f"{self._module}.{self._attr}" if self._attr else self._module
+            return f"<lazy {name} (not imported yet)>"
+        return repr(self._target)
+
+
+def lazy(module, attr=None):
+    """Return `module` (or `module.attr`) imported on first use."""
+    return LazyImport(module, attr)
+
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+One-pass batch transformer for the per-user notebooks.
+
+Each fix that used to be its own script (re-reading, regex-patching, backing
+up and re-writing every notebook) is now a pass registered in
+notebook_passes.py. A run reads each notebook once, applies the selected
+passes in registration order to the parsed JSON, and writes the file once,
+atomically, and only if the serialized result differs from what is on disk.
+The original JSON formatting (indent, ASCII escaping, trailing newline) is
+kept so unchanged cells produce no diff. Notebooks are processed in
+parallel.
+
+A pass is a function `pass_(nb, ctx) -> bool` that edits the notebook dict
+in place and returns True if it changed anything; `ctx` carries the path,
+the user ID parsed from the file name, run options and a message log.
+
+Usage:
+    python scripts/notebook_transform.py --list-passes
+    python scripts/notebook_transform.py --dry-run
+    python scripts/notebook_transform.py --passes plots_dir,plot_saving --jobs 8
+    python scripts/notebook_transform.py --pattern 'notebooks/peak_exploration/user_*_peak_detection.ipynb' --passes ...
+    python scripts/notebook_transform.py --pattern 'notebooks/**/*.ipynb' --passes strip_outputs
+"""
+
+import os
+import re
+import glob
+import json
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_PATTERN = 'notebooks/data_exploration/user_*_data_exploration.ipynb'
+
+# name -> (function, description, part of the default set); in registration order
+PASSES = {}
+
+
+def load_passes():
+    """Import notebook_passes so its passes are registered (also in spawned workers)."""
+    import notebook_passes  # noqa: F401
+
+
+def notebook_pass(name, description, default=True):
+    """Register a pass; passes run in the order they are registered."""
+    def register(func):
+        PASSES[name] = (func, description, default)
+        return func
+    return register
+
+
+class PassContext:
+    """What a pass knows about the notebook it is editing."""
+
+    def __init__(self, path, options=None):
+        self.path = path
+        match = re.search(r'user_(\d+)_', os.path.basename(path))
+        self.user_id = int(match.group(1)) if match else None
+        self.options = options or {}
+        self.messages = []
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+def cell_source(cell):
+    """A cell's source as one string."""
+    source = cell['source']
+    return ''.join(source) if isinstance(source, list) else source
+
+
+def set_cell_source(cell, text):
+    """Store `text` as the usual list of lines (each keeping its newline)."""
+    cell['source'] = text.splitlines(keepends=True)
+
+
+def code_cells(nb):
+    """Yield (index, cell, source) for every code cell."""
+    for i, cell in enumerate(nb['cells']):
+        if cell['cell_type'] == 'code':
+            yield i, cell, cell_source(cell)
+
+
+def find_code_cell(nb, *needles, last=False):
+    """Index of the first (or last) code cell containing all `needles`, or None."""
+    found = None
+    for i, _, source in code_cells(nb):
+        if all(needle in source for needle in needles):
+            if not last:
+                return i
+            found = i
+    return found
+
+
+def new_code_cell(text):
+    cell = {'cell_type': 'code', 'execution_count': None, 'metadata': {}, 'outputs': [], 'source': []}
+    set_cell_source(cell, text)
+    return cell
+
+
+def _json_format(text):
+    """(indent, ensure_ascii, trailing newline) of a notebook file as written."""
+    match = re.match(r'\{\n( *)"', text)
+    indent = len(match.group(1)) if match else 1
+    return indent, text.isascii() and '\\u' in text, text.endswith('\n')
+
+
+def dumps_notebook(nb, fmt=(1, False, True)):
+    indent, ensure_ascii, newline = fmt
+    return json.dumps(nb, indent=indent, ensure_ascii=ensure_ascii) + ('\n' if newline else '')
+
+
+def write_text_atomic(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def transform_notebook(path, pass_names, dry_run=False, backup=False, options=None):
+    """
+    Apply `pass_names` to one notebook with one read and at most one write.
+
+    Returns:
+        dict with changed (bool), passes (names of the passes that changed
+        something) and messages
+    """
+    load_passes()
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    nb = json.loads(text)
+
+    ctx = PassContext(path, options)
+    applied = [name for name in pass_names if PASSES[name][0](nb, ctx)]
+    new_text = dumps_notebook(nb, _json_format(text)) if applied else text
+    changed = new_text != text
+    if changed and not dry_run:
+        if backup:
+            write_text_atomic(f'{path}.bak', text)
+        write_text_atomic(path, new_text)
+    return {'changed': changed, 'passes': applied if changed else [], 'messages': ctx.messages}
+
+
+def find_notebooks(pattern=DEFAULT_PATTERN):
+    """Notebooks matching `pattern`, without checkpoints or backups."""
+    return sorted(path for path in glob.glob(pattern, recursive=True)
+                  if '.ipynb_checkpoints' not in path and path.endswith('.ipynb'))
+
+
+def transform_all(paths, pass_names, jobs=None, dry_run=False, backup=False, options=None):
+    """Transform notebooks across a process pool; returns {path: result or {'error': message}}."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {path: pool.submit(transform_notebook, path, pass_names, dry_run, backup, options)
+                   for path in paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = {'error': str(e)}
+    return results
+
+
+def print_summary(results, dry_run=False):
+    """Print one line per notebook; returns the number of notebooks with errors."""
+    errors = changed = 0
+    for path, result in sorted(results.items()):
+        if 'error' in result:
+            errors += 1
+            print(f"❌ {path}: {result['error']}")
+            continue
+        if result['changed']:
+            changed += 1
+            print(f"{'🔍' if dry_run else '✅'} {path}: {', '.join(result['passes'])}")
+        for message in result['messages']:
+            print(f"⚠️  {path}: {message}")
+    verb = 'would change' if dry_run else 'changed'
+    print(f"\nNotebooks: {len(results)}, {verb}: {changed}, errors: {errors}")
+    return errors
+
+
+def main(pass_names=None, description=None, configure=None, argv=None, pattern=DEFAULT_PATTERN):
+    """
+    Command line entry point, shared by the thin per-fix wrapper scripts.
+
+    Args:
+        pass_names: Passes to run; None adds a --passes option (default: every default pass)
+        description: argparse description
+        pattern: Default notebook glob (`**` matches across directories)
+        configure: Optional callback adding script-specific options to the parser;
+            their values are passed to the passes as ctx.options
+    """
+    load_passes()
+    parser = argparse.ArgumentParser(description=description or 'Apply registered passes to notebooks in one pass')
+    if pass_names is None:
+        parser.add_argument('--passes', default=None,
+                            help="Comma-separated passes to apply in registration order (default: all default passes)")
+        parser.add_argument('--list-passes', action='store_true', help='List the registered passes and exit')
+    parser.add_argument('--pattern', default=pattern, help=f'Notebook glob (default: {pattern})')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--backup', action='store_true', help='Keep the previous version as <notebook>.bak')
+    parser.add_argument('--list-only', action='store_true', help='List the matching notebooks and exit')
+    if configure:
+        configure(parser)
+    args = parser.parse_args(argv)
+
+    if pass_names is None:
+        if args.list_passes:
+            for name, (_, desc, default) in PASSES.items():
+                print(f"{name:24s} {desc}{'' if default else ' (not in the default set)'}")
+            return 0
+        if args.passes:
+            requested = [name.strip() for name in args.passes.split(',') if name.strip()]
+            unknown = sorted(set(requested) - set(PASSES))
+            if unknown:
+                parser.error(f"unknown pass(es): {', '.join(unknown)}")
+            pass_names = [name for name in PASSES if name in requested]
+        else:
+            pass_names = [name for name, (_, _, default) in PASSES.items() if default]
+
+    paths = find_notebooks(args.pattern)
+    if args.list_only:
+        for path in paths:
+            print(path)
+        return 0
+    if not paths:
+        print(f"No notebooks found matching {args.pattern}")
+        return 0
+
+    framework_args = {'passes', 'list_passes', 'pattern', 'jobs', 'dry_run', 'backup', 'list_only'}
+    options = {key: value for key, value in vars(args).items() if key not in framework_args}
+    print(f"Applying {', '.join(pass_names)} to {len(paths)} notebooks")
+    results = transform_all(paths, pass_names, args.jobs, args.dry_run, args.backup, options)
+    return 1 if print_summary(results, args.dry_run) else 0
+
+
+if __name__ == '__main__':
+    # Run through the importable module so the passes register into the same PASSES
+    from notebook_transform import main
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""
+Heart rate peak detection shared by the peak detection notebooks and the dashboard.
+
+`detect_hr_peaks` is the STEP 3 function of the high quality peak detection
+template: peaks are found with scipy's find_peaks above a fraction of the
+session max HR, and each peak's region is the surrounding run of samples
+above that threshold.
+"""
+
+import numpy as np
+from scipy.signal import find_peaks
+
+# Window of the rolling mean used for hr_smooth
+SMOOTH_WINDOW = 5
+
+# Approximate TCX sampling rate used to convert minutes to samples
+SAMPLES_PER_MIN = 4
+
+
+def smooth_hr(hr_series, window=SMOOTH_WINDOW):
+    """Centered rolling mean of a heart rate Series (the notebooks' hr_smooth)."""
+    return hr_series.rolling(window=window, center=True, min_periods=1).mean()
+
+
+def detect_hr_peaks(hr_series, max_hr, min_height_ratio=0.7, min_prominence=10, min_distance_min=1):
+    """
+    Detect heart rate peaks and their regions based on threshold crossings.
+
+    Args:
+        hr_series: Heart rate Series (usually hr_smooth)
+        max_hr: Session maximum heart rate
+        min_height_ratio: Threshold as a fraction of max_hr
+        min_prominence: Minimum peak prominence in bpm
+        min_distance_min: Minimum distance between peaks in minutes
+
+    Returns:
+        (peaks, peak_regions, threshold): peak sample indices, a list of
+        (start_idx, end_idx) regions above threshold that contain a peak, and
+        the threshold in bpm
+    """
+    threshold = max_hr * min_height_ratio
+    min_distance_samples = int(min_distance_min * SAMPLES_PER_MIN)
+
+    peaks, _ = find_peaks(
+        hr_series,
+        height=threshold,
+        prominence=min_prominence,
+        distance=min_distance_samples
+    )
+
+    above = np.asarray(hr_series >= threshold)
+    if len(above) < 2:
+        return peaks, [], threshold
+
+    # Rising edges start a region at i, falling edges end it at i - 1
+    change = np.flatnonzero(above[1:] != above[:-1]) + 1
+    threshold_crossings = [('start', i) if above[i] else ('end', i - 1) for i in change]
+
+    # Handle edge cases
+    if len(threshold_crossings) > 0:
+        if above[0] and threshold_crossings[0][0] == 'end':
+            threshold_crossings.insert(0, ('start', 0))
+        if above[-1] and threshold_crossings[-1][0] == 'start':
+            threshold_crossings.append(('end', len(hr_series) - 1))
+
+    # Group into start-end pairs that contain at least one peak
+    peak_regions = []
+    current_start = None
+    for crossing_type, idx in threshold_crossings:
+        if crossing_type == 'start':
+            current_start = idx
+        elif crossing_type == 'end' and current_start is not None:
+            first_peak = np.searchsorted(peaks, current_start)
+            if first_peak < len(peaks) and peaks[first_peak] <= idx:
+                peak_regions.append((int(current_start), int(idx)))
+            current_start = None
+
+    return peaks, peak_regions, threshold
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Headless renderer for the three standard per-user plots.
+
+Renders, for every user, the plots the data exploration notebooks save under
+output/plots/user_XX/:
+
+- heart_rate_over_time.png
+- aligned_hr_data.png (HR line over the cropped Garmin chart)
+- heart_rate_with_stations.png (aligned chart plus station boundaries)
+
+Instead of executing each notebook, the renderer works directly from the
+cached parsed session, the chart alignment in the user registry and the
+committed station cutoffs (falling back to the cutoffs recorded in the
+user's processed station CSV). Figures are created without pyplot, so they
+are drawn by the Agg canvas whatever the active backend, and users are
+rendered across a process pool.
+
+Plots come in two tiers. The default preview tier writes fast low-DPI PNGs
+to output/plots/user_XX/preview/ for review; the full tier writes the 300-dpi
+PNGs (or SVG/PDF) used for publication and is only rendered on request.
+
+Each user's plots directory holds a manifest.json recording a hash of every
+artifact's inputs (session data, chart image, alignment, cutoffs, style
+version, tier and format), and artifacts whose inputs are unchanged are not
+re-rendered, so after editing one user's cutoffs only that user's stations
+plots are rewritten.
+
+Usage:
+    python scripts/render_plots.py --all [--jobs N]                 # preview tier
+    python scripts/render_plots.py --all --tier full                # 300-dpi PNGs
+    python scripts/render_plots.py --users 2 --tier full --formats svg pdf
+    python scripts/render_plots.py --users 2 3 10 --plots heart_rate_over_time
+    python scripts/render_plots.py --all --force                    # ignore manifests
+"""
+
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+import pandas as pd
+
+from cache_utils import file_sha256, json_sha256, read_json, write_json_atomic
+from downsample import plot_hr
+from session_cache import load_session, session_hash
+from station_schema import read_station_frame
+from user_registry import chart_extent, get_alignment, get_cutoffs
+
+PLOTS_ROOT = 'output/plots'
+PROCESSED_DIR = 'output/processed'
+CHARTS_DIR = 'charts_cropped'
+PLOT_NAMES = ('heart_rate_over_time', 'aligned_hr_data', 'heart_rate_with_stations')
+STATION_COLORS = ['red', 'green', 'orange']
+DPI = 300
+# Preview tier for review; the full tier is the 300-dpi (or vector) publication output
+TIERS = {
+    'preview': {'dpi': 72, 'subdir': 'preview'},
+    'full': {'dpi': DPI, 'subdir': ''},
+}
+VECTOR_FORMATS = ('svg', 'pdf')
+# Bump when plot styling changes so every plot is re-rendered
+STYLE_VERSION = 1
+
+
+def chart_path_for(user_id, charts_dir=CHARTS_DIR):
+    """Return the cropped Garmin chart path for a user."""
+    return os.path.join(charts_dir, f'user_{user_id}.png')
+
+
+def cutoffs_from_csv(user_id, processed_dir=PROCESSED_DIR):
+    """
+    Station cutoffs in elapsed minutes recovered from a user's station CSV.
+
+    Returns:
+        [(start, end), ...], or None if the user has no usable station rows
+    """
+    csv_path = os.path.join(processed_dir, f'user_{user_id}_station_data_peaks.csv')
+    if not os.path.exists(csv_path):
+        return None
+
+    df = read_station_frame(csv_path, usecols=['session_start_time', 'station_start_time', 'station_end_time'])
+    starts = (df['station_start_time'] - df['session_start_time']).dt.total_seconds() / 60
+    ends = (df['station_end_time'] - df['session_start_time']).dt.total_seconds() / 60
+    cutoffs = [(round(start, 4), round(end, 4)) for start, end in zip(starts, ends)
+               if pd.notna(start) and pd.notna(end)]
+    return cutoffs or None
+
+
+def load_cutoffs(user_id, processed_dir=PROCESSED_DIR):
+    """Committed cutoffs from the registry, else the ones in the station CSV."""
+    cutoffs = get_cutoffs(user_id)
+    if cutoffs is None:
+        cutoffs = cutoffs_from_csv(user_id, processed_dir)
+    return cutoffs
+
+
+def plot_heart_rate_over_time(df, user_id, dpi=DPI):
+    """Build the heart_rate_over_time figure."""
+    fig = Figure(figsize=(14, 5))
+    ax = fig.subplots()
+    plot_hr(ax, df['elapsed_min'], df['heart_rate'], dpi=dpi, linewidth=2)
+    ax.set_xlabel('Elapsed Minutes', fontsize=12)
+    ax.set_ylabel('Heart Rate (BPM)', fontsize=12)
+    ax.set_title(f'Heart Rate Over Time: User {user_id}', fontsize=14)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    fig.tight_layout()
+    return fig
+
+
+def _aligned_axes(df, img, alignment, dpi=DPI):
+    """Figure with the chart image under the parsed HR line."""
+    fig = Figure(figsize=(14, 5))
+    ax = fig.subplots()
+    ax.imshow(img, aspect='auto', extent=chart_extent(alignment, df['elapsed_min'].max()),
+              alpha=alignment['alpha'], zorder=0, interpolation='bilinear')
+    plot_hr(ax, df['elapsed_min'], df['heart_rate'], dpi=dpi, color='blue',
+            linewidth=2.5, label='Parsed HR Data', zorder=1)
+    ax.set_xlabel('Elapsed Minutes', fontsize=12)
+    ax.set_ylabel('Heart Rate (BPM)', fontsize=12)
+    return fig, ax
+
+
+def plot_aligned_hr_data(df, user_id, img, alignment, dpi=DPI):
+    """Build the aligned_hr_data figure."""
+    fig, ax = _aligned_axes(df, img, alignment, dpi)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.set_title(f"Alignment Parameters: x_offset={alignment['x_offset']}, x_scale={alignment['x_scale']}, "
+                 f"y_range={alignment['y_min']}-{alignment['y_max']}", fontsize=12)
+    ax.legend(loc='upper right')
+    fig.tight_layout()
+    return fig
+
+
+def plot_heart_rate_with_stations(df, user_id, img, alignment, cutoffs, dpi=DPI):
+    """Build the heart_rate_with_stations figure."""
+    fig, ax = _aligned_axes(df, img, alignment, dpi)
+
+    for i, (start, end) in enumerate(cutoffs):
+        color = STATION_COLORS[i % len(STATION_COLORS)]
+        ax.axvline(x=start, color=color, linestyle='--', label=f'Station {i+1} Start')
+        ax.axvline(x=end, color=color, linestyle=':', label=f'Station {i+1} End')
+        y_pos = alignment['y_max'] - 10 - ((i % 3) * 15)
+        ax.text((start + end) / 2, y_pos, f'Station {i+1}',
+                horizontalalignment='center', bbox=dict(facecolor='white', alpha=0.7))
+
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.set_title(f'User {user_id}: Heart Rate with Station Boundaries', fontsize=14)
+    custom_lines = [Line2D([0], [0], color=STATION_COLORS[i % len(STATION_COLORS)], linestyle='--')
+                    for i in range(len(cutoffs))]
+    ax.legend(custom_lines, [f'Station {i+1}' for i in range(len(cutoffs))], loc='upper right')
+    fig.tight_layout()
+    return fig
+
+
+def plot_inputs(name, session_sha, alignment=None, chart_sha=None, cutoffs=None):
+    """
+    Everything a plot's content depends on, as a JSON-serialisable dict.
+
+    Returns None when the plot cannot be rendered (no chart, or no cutoffs for
+    the stations plot).
+    """
+    inputs = {'plot': name, 'style_version': STYLE_VERSION, 'session_sha256': session_sha}
+    if name == 'heart_rate_over_time':
+        return inputs
+    if chart_sha is None:
+        return None
+    inputs.update(chart_sha256=chart_sha, alignment=alignment)
+    if name == 'aligned_hr_data':
+        return inputs
+    if not cutoffs:
+        return None
+    inputs['cutoffs'] = [list(pair) for pair in cutoffs]
+    return inputs
+
+
+def artifact_name(name, tier='full', fmt='png'):
+    """Artifact path relative to the user's plots directory, e.g. 'preview/aligned_hr_data.png'."""
+    subdir = TIERS[tier]['subdir']
+    return f'{subdir}/{name}.{fmt}' if subdir else f'{name}.{fmt}'
+
+
+def manifest_path_for(plots_dir):
+    """Path of the manifest recording each artifact's input hash."""
+    return os.path.join(plots_dir, 'manifest.json')
+
+
+def render_user(user_id, plots=PLOT_NAMES, tier='preview', formats=('png',), plots_root=PLOTS_ROOT,
+                data_dir='data', charts_dir=CHARTS_DIR, processed_dir=PROCESSED_DIR, force=False):
+    """
+    Render the requested plots for one user, skipping artifacts whose inputs are unchanged.
+
+    The preview tier writes low-DPI PNGs to output/plots/user_XX/preview/; the
+    full tier writes 300-dpi PNGs (and/or SVG/PDF) next to the notebooks'
+    plots. Each written artifact's input hash (plot inputs plus tier, dpi and
+    format) is recorded in output/plots/user_XX/manifest.json, and an artifact
+    is re-rendered only if its hash differs, its file is missing, or `force`
+    is set. The parsed session is only loaded if something needs drawing.
+
+    Returns:
+        dict mapping artifact name to 'written', 'unchanged' or the reason it was skipped
+    """
+    dpi = TIERS[tier]['dpi']
+    plots_dir = os.path.join(plots_root, f'user_{user_id}')
+    manifest_path = manifest_path_for(plots_dir)
+    manifest = read_json(manifest_path, default={})
+
+    chart_path = chart_path_for(user_id, charts_dir)
+    chart_sha = file_sha256(chart_path) if os.path.exists(chart_path) else None
+    alignment = get_alignment(user_id)
+    cutoffs = load_cutoffs(user_id, processed_dir) if 'heart_rate_with_stations' in plots else None
+    session_sha = session_hash(user_id, data_dir)
+
+    results = {}
+    to_render = {}
+    for name in plots:
+        inputs = plot_inputs(name, session_sha, alignment, chart_sha, cutoffs)
+        if inputs is None:
+            results[name] = (f'skipped: no chart image {chart_path}' if chart_sha is None
+                             else 'skipped: no station cutoffs')
+            continue
+        for fmt in formats:
+            artifact = artifact_name(name, tier, fmt)
+            artifact_inputs = dict(inputs, tier=tier, dpi=dpi, format=fmt)
+            input_hash = json_sha256(artifact_inputs)
+            artifact_path = os.path.join(plots_dir, artifact)
+            if (not force and manifest.get(artifact, {}).get('input_hash') == input_hash
+                    and os.path.exists(artifact_path)):
+                results[artifact] = 'unchanged'
+                continue
+            to_render.setdefault(name, []).append((artifact, artifact_path, input_hash, artifact_inputs))
+
+    if not to_render:
+        return results
+
+    df = load_session(user_id, data_dir)[0]
+    img = mpimg.imread(chart_path) if chart_sha is not None else None
+    for name, artifacts in to_render.items():
+        # One figure per plot, saved once per requested format
+        if name == 'heart_rate_over_time':
+            fig = plot_heart_rate_over_time(df, user_id, dpi)
+        elif name == 'aligned_hr_data':
+            fig = plot_aligned_hr_data(df, user_id, img, alignment, dpi)
+        else:
+            fig = plot_heart_rate_with_stations(df, user_id, img, alignment, cutoffs, dpi)
+        for artifact, artifact_path, input_hash, artifact_inputs in artifacts:
+            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+            fig.savefig(artifact_path, dpi=dpi, bbox_inches='tight')
+            manifest[artifact] = {'input_hash': input_hash, 'inputs': artifact_inputs}
+            results[artifact] = 'written'
+
+    write_json_atomic(manifest_path, manifest)
+    return results
+
+
+def find_users(data_dir='data'):
+    """Return the user IDs that have a TCX file."""
+    return sorted(int(os.path.basename(p).split('-')[0]) for p in glob.glob(os.path.join(data_dir, '*-d.tcx')))
+
+
+def render_all(user_ids=None, plots=PLOT_NAMES, jobs=None, **kwargs):
+    """Render plots for every user across a process pool; returns {user_id: results}."""
+    if user_ids is None:
+        user_ids = find_users(kwargs.get('data_dir', 'data'))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {user_id: pool.submit(render_user, user_id, plots, **kwargs) for user_id in user_ids}
+        for user_id, future in futures.items():
+            try:
+                results[user_id] = future.result()
+            except Exception as e:
+                results[user_id] = {'error': str(e)}
+    return results
+
+
+def print_summary(results):
+    """Print one line per user; returns the number of users with errors."""
+    errors = 0
+    for user_id, user_results in sorted(results.items()):
+        if 'error' in user_results:
+            errors += 1
+            print(f"❌ User {user_id:2d}: {user_results['error']}")
+            continue
+        skipped = {name: status for name, status in user_results.items() if status.startswith('skipped')}
+        written = sum(status == 'written' for status in user_results.values())
+        unchanged = sum(status == 'unchanged' for status in user_results.values())
+        symbol = '⚠️ ' if skipped else '✅'
+        print(f"{symbol} User {user_id:2d}: {written} written, {unchanged} unchanged"
+              + ''.join(f"; {name} {status}" for name, status in skipped.items()))
+    print(f"\nUsers rendered: {len(results)}, errors: {errors}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the standard per-user plots without running notebooks')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--users', type=int, nargs='+', help='User IDs to render')
+    group.add_argument('--all', action='store_true', help='Render every user with a TCX file')
+    parser.add_argument('--plots', nargs='+', choices=PLOT_NAMES, default=list(PLOT_NAMES),
+                        help='Plots to render (default: all three)')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--tier', choices=list(TIERS), default='preview',
+                        help='preview: fast low-DPI PNGs in preview/; full: 300-dpi publication output (default: preview)')
+    parser.add_argument('--formats', nargs='+', choices=('png',) + VECTOR_FORMATS, default=['png'],
+                        help='Output formats for the full tier (default: png)')
+    parser.add_argument('--force', action='store_true', help='Re-render even if the inputs are unchanged')
+    args = parser.parse_args()
+
+    if args.tier == 'preview' and args.formats != ['png']:
+        parser.error('vector formats are only produced by the full tier (--tier full)')
+
+    results = render_all(None if args.all else args.users, tuple(args.plots), args.jobs,
+                         tier=args.tier, formats=tuple(args.formats), force=args.force)
+    sys.exit(1 if print_summary(results) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,139 +1,500 @@
 #!/usr/bin/env python3
 """
-Script to run all user notebooks and generate plots
+Script to run the analysis notebooks for every user and generate plots
 
-This script executes all user_*_data_exploration.ipynb notebooks to ensure
-that all plots are generated and saved to their respective directories.
+By default the per-user notebook copies (notebooks/<family>/user_*.ipynb)
+are executed in place; since those are committed, they are written back
+without outputs (--keep-outputs to keep them). They stay the default until
+every user's hand-tuned cutoffs and chart alignment are in the user registry.
 
-It uses nbconvert to execute each notebook in place, capturing outputs
-and generating all visualizations.
+With --templates each family's single template is executed once per user
+instead, with USER_ID and the user's parameter overrides from the user
+registry injected in a cell after the template's `parameters` cell
+(papermill-style), so a template change applies to every user immediately:
+
+- data_exploration: notebooks/data_exploration/template_data_exploration.ipynb
+- peak_exploration: notebooks/templates/template_peak_detection_high_quality.ipynb
+- low_quality: notebooks/templates/template_low_quality_data_clean.ipynb (only when requested)
+
+The peak template only exports the station CSV (EXPORT) for users with
+committed cutoffs in the registry; for everyone else it would overwrite a
+reviewed CSV with auto-detected stations. Executed templates are only kept
+if --output-dir is given.
+
+Figures are not embedded in saved notebooks: every image output is written
+to output/figures/<family>/user_XX/cellNN_K.png (or .svg/.jpg) and replaced
+by a markdown reference to that file, relative to the saved notebook
+(--embed-figures restores inline base64 images).
+
+Notebooks are executed in-process with nbclient on a pool of warm kernels:
+each kernel is started once (with numpy/pandas/matplotlib already imported)
+and reused, with its namespace cleared by `%reset -f` between notebooks.
+Up to --jobs notebooks run concurrently. Each notebook has a timeout,
+notebooks that time out or crash their kernel are retried on a fresh kernel,
+and every run produces a structured result (status, attempts, duration,
+error, missing plots) that can be written to JSON.
 
 Usage:
-    python scripts/run_all_notebooks.py [--subset N]
+    python scripts/run_all_notebooks.py [--family data_exploration] [--jobs N] [--subset N]
+    python scripts/run_all_notebooks.py --templates --family peak_exploration --users 2 3 \
+        --output-dir output/executed_notebooks
 
 Options:
-    --subset N    Run only N notebooks (for testing)
+    --family F        Notebook family to run (repeatable; default: data_exploration and peak_exploration)
+    --users ID ...    Only run these users (default: every user with a TCX file)
+    --subset N        Run only N notebooks per family (for testing)
+    --jobs N          Number of kernels / concurrent notebooks (default: 4)
+    --timeout S       Per-notebook timeout in seconds (default: 300)
+    --retries N       Retries after a timeout or dead kernel (default: 1)
+    --templates       Run the family templates with injected parameters instead of the per-user copies
+    --clones          Run the per-user notebook copies (the default)
+    --output-dir DIR  With --templates, save executed notebooks under DIR/<family>/
+    --no-save         Do not write the executed per-user copies back
+    --keep-outputs    Write the per-user copies back with their outputs
+    --figures-dir DIR Root for externalized figures (default: output/figures)
+    --embed-figures   Keep figures inline as base64 in saved notebooks
+    --results PATH    Write the structured results as JSON
 """
 
 import os
+import re
 import sys
 import glob
+import time
+import json
+import base64
+import asyncio
 import argparse
-import subprocess
-from pathlib import Path
 
-def run_notebooks(subset=None):
+import nbformat
+from jupyter_client.manager import AsyncKernelManager
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError, CellTimeoutError, DeadKernelError
+
+from notebook_passes import strip_outputs
+from render_plots import find_users
+from user_registry import get_cutoffs, get_parameters
+
+FAMILIES = {
+    'data_exploration': {
+        'template': 'notebooks/data_exploration/template_data_exploration.ipynb',
+        'pattern': 'notebooks/data_exploration/user_*_data_exploration.ipynb',
+        'output_name': 'user_{user_id}_data_exploration.ipynb',
+        'expected_plots': ['heart_rate_over_time.png', 'aligned_hr_data.png', 'heart_rate_with_stations.png'],
+    },
+    'peak_exploration': {
+        'template': 'notebooks/templates/template_peak_detection_high_quality.ipynb',
+        'pattern': 'notebooks/peak_exploration/user_*_peak_detection.ipynb',
+        'output_name': 'user_{user_id}_peak_detection.ipynb',
+        'expected_plots': ['heart_rate_with_stations.png'],
+        # The template writes the station CSV, gated by its EXPORT parameter
+        'exports': True,
+    },
+    'low_quality': {
+        'template': 'notebooks/templates/template_low_quality_data_clean.ipynb',
+        'pattern': None,
+        'output_name': 'user_{user_id}_low_quality.ipynb',
+        'expected_plots': ['heart_rate_over_time_low_quality.png'],
+    },
+}
+DEFAULT_FAMILIES = ('data_exploration', 'peak_exploration')
+
+FIGURES_DIR = 'output/figures'
+# Image outputs moved out of saved notebooks, by MIME type -> file extension
+FIGURE_TYPES = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/svg+xml': 'svg'}
+
+# Imported once per kernel so every notebook after the first starts warm
+WARMUP_CODE = "import numpy, pandas, matplotlib.pyplot, ipywidgets"
+
+# Clears a kernel between notebooks: close figures, drop the namespace, restore cwd
+RESET_CODE = """\
+import sys as _sys
+if 'matplotlib.pyplot' in _sys.modules:
+    _sys.modules['matplotlib.pyplot'].close('all')
+del _sys
+%reset -f
+import os as _os
+_os.chdir({cwd!r})
+del _os
+"""
+
+
+def inject_parameters(nb, parameters):
+    """
+    Insert an `injected-parameters` cell assigning `parameters` after the `parameters` cell.
+
+    Any previously injected cell is replaced; without a `parameters` cell the
+    assignments go first.
+    """
+    nb.cells = [cell for cell in nb.cells if 'injected-parameters' not in cell.metadata.get('tags', [])]
+    source = "# Injected parameters\n" + "\n".join(f"{name} = {value!r}" for name, value in parameters.items())
+    cell = nbformat.v4.new_code_cell(source, metadata={'tags': ['injected-parameters']})
+    index = next((i + 1 for i, c in enumerate(nb.cells) if 'parameters' in c.metadata.get('tags', [])), 0)
+    nb.cells.insert(index, cell)
+    return nb
+
+
+def externalize_figures(nb, figures_dir, notebook_path=None):
+    """
+    Move image outputs into files under `figures_dir` and reference them by path.
+
+    Each image output becomes figures_dir/cellNN_K.<ext> and its data is
+    replaced by a markdown image link (relative to `notebook_path` when given).
+    Figures left over from an earlier run of the notebook are removed first.
+
+    Returns:
+        list of the figure paths written
+    """
+    os.makedirs(figures_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(figures_dir, 'cell*_*.*')):
+        os.remove(old)
+    base = os.path.dirname(os.path.abspath(notebook_path)) if notebook_path else None
+
+    paths = []
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != 'code':
+            continue
+        for k, output in enumerate(cell.get('outputs', [])):
+            data = output.get('data', {})
+            links = []
+            for mime, ext in FIGURE_TYPES.items():
+                if mime not in data:
+                    continue
+                content = data.pop(mime)
+                if isinstance(content, list):
+                    content = ''.join(content)
+                path = os.path.join(figures_dir, f'cell{index:02d}_{k}.{ext}')
+                if ext == 'svg':
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(base64.b64decode(content))
+                paths.append(path)
+                link = os.path.relpath(os.path.abspath(path), base) if base else path
+                links.append(f"![{os.path.basename(path)}]({link.replace(os.sep, '/')})")
+            if links:
+                data['text/markdown'] = '\n'.join(links)
+    return paths
+
+
+def find_template_jobs(families=DEFAULT_FAMILIES, subset=None, user_ids=None, output_dir=None):
     """
-    Run all user notebooks to generate plots
-    
+    One job per (family template, user), parameterised from the user registry.
+
+    Families that export station CSVs get EXPORT = True only for users with
+    committed cutoffs in the registry.
+
+    Returns:
+        list of dicts with notebook (template) path, family, user_id,
+        parameters and output path (None unless output_dir is given)
+    """
+    if user_ids is None:
+        user_ids = find_users()
+    jobs = []
+    for family in families:
+        config = FAMILIES[family]
+        found = []
+        for user_id in sorted(user_ids):
+            output = None
+            if output_dir:
+                output = os.path.join(output_dir, family, config['output_name'].format(user_id=user_id))
+            parameters = dict({'USER_ID': user_id}, **get_parameters(user_id))
+            if config.get('exports'):
+                # Without committed cutoffs the template would export auto-detected
+                # stations over the reviewed CSV
+                parameters['EXPORT'] = get_cutoffs(user_id) is not None
+            found.append({
+                'notebook': config['template'],
+                'family': family,
+                'user_id': user_id,
+                'parameters': parameters,
+                'output': output,
+                'label': output or f"{config['template']} [USER_ID={user_id}]",
+            })
+        jobs.extend(found[:subset] if subset else found)
+    return jobs
+
+
+def find_notebooks(families=DEFAULT_FAMILIES, subset=None, user_ids=None, save=True):
+    """
+    Find the per-user notebook copies to run (the default mode).
+
+    Returns:
+        list of dicts with notebook path, family, user_id and output path
+        (the notebook itself when saving in place)
+    """
+    jobs = []
+    for family in families:
+        if FAMILIES[family]['pattern'] is None:
+            print(f"⚠️  {family} has no per-user notebooks, skipping")
+            continue
+        notebooks = [nb for nb in glob.glob(FAMILIES[family]['pattern'])
+                     if '.ipynb_checkpoints' not in nb and not nb.endswith('.bak')]
+        found = []
+        for notebook_path in notebooks:
+            match = re.match(r'user_(\d+)_', os.path.basename(notebook_path))
+            if match is None:
+                continue
+            user_id = int(match.group(1))
+            if user_ids is None or user_id in user_ids:
+                found.append({'notebook': notebook_path, 'family': family, 'user_id': user_id,
+                              'parameters': None, 'output': notebook_path if save else None,
+                              'label': notebook_path})
+        found.sort(key=lambda job: job['user_id'])
+        jobs.extend(found[:subset] if subset else found)
+    return jobs
+
+
+class WarmKernel:
+    """A started kernel and its connected client."""
+
+    def __init__(self, kernel_name, cwd):
+        self.kernel_name = kernel_name
+        self.cwd = cwd
+        self.km = None
+        self.kc = None
+
+    async def start(self):
+        self.km = AsyncKernelManager(kernel_name=self.kernel_name)
+        await self.km.start_kernel(cwd=self.cwd)
+        self.kc = self.km.client()
+        self.kc.start_channels()
+        await self.kc.wait_for_ready(timeout=60)
+        await self.run(WARMUP_CODE)
+
+    async def run(self, code, timeout=60):
+        """Execute code silently; returns True if it succeeded."""
+        reply = await self.kc.execute_interactive(code, timeout=timeout, output_hook=lambda msg: None)
+        return reply['content']['status'] == 'ok'
+
+    async def reset(self):
+        """Clear the namespace for the next notebook; returns False if the kernel is unusable."""
+        try:
+            return await self.km.is_alive() and await self.run(RESET_CODE.format(cwd=self.cwd))
+        except Exception:
+            return False
+
+    async def shutdown(self):
+        if self.kc is not None:
+            self.kc.stop_channels()
+        if self.km is not None and await self.km.is_alive():
+            await self.km.shutdown_kernel(now=True)
+        self.km = self.kc = None
+
+
+class KernelPool:
+    """Fixed-size pool of warm kernels handed out to one notebook at a time."""
+
+    def __init__(self, size, kernel_name='python3', cwd='.'):
+        self.size = size
+        self.kernel_name = kernel_name
+        self.cwd = os.path.abspath(cwd)
+        self.idle = asyncio.Queue()
+        self.kernels = []
+
+    async def start(self):
+        self.kernels = [WarmKernel(self.kernel_name, self.cwd) for _ in range(self.size)]
+        await asyncio.gather(*(kernel.start() for kernel in self.kernels))
+        for kernel in self.kernels:
+            self.idle.put_nowait(kernel)
+
+    async def acquire(self):
+        return await self.idle.get()
+
+    async def release(self, kernel, healthy=True):
+        """Return a kernel to the pool, resetting it or replacing it with a fresh one."""
+        if not (healthy and await kernel.reset()):
+            await kernel.shutdown()
+            await kernel.start()
+        self.idle.put_nowait(kernel)
+
+    async def shutdown(self):
+        await asyncio.gather(*(kernel.shutdown() for kernel in self.kernels))
+
+
+def _missing_plots(job, since):
+    """Expected plots that do not exist or were not written after `since` (stale files from an earlier run)."""
+    plots_dir = f"output/plots/user_{job['user_id']}"
+    paths = [os.path.join(plots_dir, name) for name in FAMILIES[job['family']]['expected_plots']]
+    # Whole seconds: some filesystems truncate modification times
+    return [path for path in paths if not os.path.exists(path) or os.path.getmtime(path) < int(since)]
+
+
+async def execute_notebook(pool, job, timeout=300, retries=1):
+    """
+    Execute one notebook on a pooled kernel.
+
+    Parameters are injected first if the job has any, and the executed
+    notebook is written to the job's output path if it has one, with its
+    figures moved to the job's figures_dir and, for strip_outputs jobs,
+    without any outputs.
+
+    Cell errors are reported without retrying; timeouts and dead kernels are
+    retried up to `retries` times on a fresh kernel.
+
+    Returns:
+        The job dict extended with status ('success', 'warning' or 'error'),
+        attempts, duration_sec, error, missing_plots and figures
+    """
+    result = dict(job, status='error', attempts=0, duration_sec=0.0, error=None, missing_plots=[], figures=[])
+    os.makedirs(f"output/plots/user_{job['user_id']}", exist_ok=True)
+    start = time.perf_counter()
+
+    for attempt in range(1, retries + 2):
+        result['attempts'] = attempt
+        nb = nbformat.read(job['notebook'], as_version=4)
+        started = time.time()
+        if job.get('parameters'):
+            inject_parameters(nb, job['parameters'])
+        kernel = await pool.acquire()
+        healthy = True
+        # Each cell may use whatever is left of the notebook's time budget
+        deadline = time.monotonic() + timeout
+        try:
+            client = NotebookClient(nb, km=kernel.km, kernel_name=pool.kernel_name,
+                                    timeout_func=lambda cell: max(deadline - time.monotonic(), 1),
+                                    resources={'metadata': {'path': pool.cwd}})
+            client.kc = kernel.kc
+            await client.async_execute()
+        except CellExecutionError as e:
+            result['error'] = f"{e.ename}: {e.evalue}"
+            break
+        except CellTimeoutError:
+            healthy = False
+            result['error'] = f"timed out after {timeout}s"
+        except (DeadKernelError, RuntimeError) as e:
+            healthy = False
+            result['error'] = f"{type(e).__name__}: {e}"
+        else:
+            result['error'] = None
+            if job.get('figures_dir'):
+                result['figures'] = externalize_figures(nb, job['figures_dir'], job.get('output'))
+            if job.get('output'):
+                if job.get('strip_outputs'):
+                    strip_outputs(nb, None)
+                os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+                nbformat.write(nb, job['output'])
+            missing = _missing_plots(job, started)
+            result['missing_plots'] = missing
+            result['status'] = 'warning' if missing else 'success'
+            break
+        finally:
+            await pool.release(kernel, healthy)
+
+    result['duration_sec'] = round(time.perf_counter() - start, 2)
+    return result
+
+
+async def run_notebooks_async(jobs, n_kernels=4, timeout=300, retries=1, kernel_name='python3'):
+    """Run `jobs` concurrently on a pool of `n_kernels` warm kernels."""
+    pool = KernelPool(min(n_kernels, max(len(jobs), 1)), kernel_name)
+    await pool.start()
+    try:
+        results = []
+        tasks = [asyncio.ensure_future(execute_notebook(pool, job, timeout, retries)) for job in jobs]
+        for i, task in enumerate(asyncio.as_completed(tasks), start=1):
+            result = await task
+            status_symbol = "✅" if result['status'] == "success" else "⚠️" if result['status'] == "warning" else "❌"
+            print(f"[{i}/{len(jobs)}] {status_symbol} {result['label']} ({result['duration_sec']:.1f}s)")
+            results.append(result)
+        return sorted(results, key=lambda r: (r['family'], r['user_id']))
+    finally:
+        await pool.shutdown()
+
+
+def run_notebooks(families=DEFAULT_FAMILIES, subset=None, user_ids=None, jobs=4, timeout=300, retries=1,
+                  output_dir=None, clones=True, save=True, keep_outputs=False, figures_dir=FIGURES_DIR):
+    """
+    Run user notebooks to generate plots
+
     Args:
-        subset: If provided, only run this number of notebooks (for testing)
+        families: Notebook families to run
+        subset: If provided, only run this number of notebooks per family (for testing)
+        user_ids: If provided, only run notebooks for these users
+        jobs: Number of warm kernels / notebooks executed concurrently
+        timeout: Per-notebook timeout in seconds
+        retries: Retries after a timeout or dead kernel
+        output_dir: Save executed template notebooks under output_dir/<family>/
+        clones: Run the per-user notebook copies; False runs the templates
+        save: With clones, write executed notebooks back in place
+        keep_outputs: With clones, write them back with outputs (default: stripped)
+        figures_dir: Root for the figures of saved notebooks (None embeds them)
+
+    Returns:
+        list of result dicts (see execute_notebook)
     """
-    # Find all user notebooks
-    notebook_pattern = "notebooks/user_*_data_exploration.ipynb"
-    notebooks = glob.glob(notebook_pattern)
-    
-    # Filter out any checkpoint files or backups
-    notebooks = [nb for nb in notebooks if 
-                '.ipynb_checkpoints' not in nb and 
-                not nb.endswith('.bak')]
-    
-    # Remove duplicates and sort
-    notebooks = sorted(set(notebooks))
-    
-    if subset:
-        notebooks = notebooks[:subset]
-        print(f"Running subset of {subset} notebooks")
-    
-    if not notebooks:
-        print(f"No notebooks found matching {notebook_pattern}")
-        return False
-    
-    print(f"Found {len(notebooks)} notebooks to run")
-    
-    # Make sure output directories exist
+    if clones:
+        notebook_jobs = find_notebooks(families, subset, user_ids, save)
+    else:
+        notebook_jobs = find_template_jobs(families, subset, user_ids, output_dir)
+    if not notebook_jobs:
+        print(f"No notebooks to run for {list(families)}")
+        return []
+    for job in notebook_jobs:
+        if job['output'] and figures_dir:
+            job['figures_dir'] = os.path.join(figures_dir, job['family'], f"user_{job['user_id']}")
+        job['strip_outputs'] = clones and not keep_outputs
+
+    print(f"Found {len(notebook_jobs)} notebooks to run on {min(jobs, len(notebook_jobs))} kernels")
     os.makedirs("output/plots", exist_ok=True)
-    
-    # Create a list to track successes and failures
-    results = []
-    
-    # Process each notebook
-    for i, notebook_path in enumerate(notebooks):
-        print(f"[{i+1}/{len(notebooks)}] Running {notebook_path}...")
-        
-        # Extract user ID from filename
-        user_id = os.path.basename(notebook_path).split('_')[1]
-        
-        # Create user-specific plots directory
-        plots_dir = f"output/plots/user_{user_id}"
-        os.makedirs(plots_dir, exist_ok=True)
-        
-        try:
-            # Run the notebook using nbconvert
-            cmd = [
-                "jupyter", "nbconvert", 
-                "--to", "notebook", 
-                "--execute",
-                "--inplace",
-                "--ExecutePreprocessor.timeout=300",  # 5 minute timeout
-                notebook_path
-            ]
-            
-            # Run the command and capture output
-            result = subprocess.run(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ Successfully executed {notebook_path}")
-                
-                # Check if plots were generated
-                expected_plots = [
-                    f"{plots_dir}/heart_rate_over_time.png",
-                    f"{plots_dir}/aligned_hr_data.png",
-                    f"{plots_dir}/heart_rate_with_stations.png"
-                ]
-                
-                missing_plots = [p for p in expected_plots if not os.path.exists(p)]
-                
-                if missing_plots:
-                    print(f"  ⚠️ Warning: The following plots were not generated:")
-                    for plot in missing_plots:
-                        print(f"    - {plot}")
-                    results.append((notebook_path, "warning", f"Missing {len(missing_plots)} plots"))
-                else:
-                    print(f"  ✅ All plots generated successfully")
-                    results.append((notebook_path, "success", "All plots generated"))
-            else:
-                print(f"  ❌ Failed to execute {notebook_path}")
-                print(f"  Error: {result.stderr}")
-                results.append((notebook_path, "error", f"Execution failed: {result.stderr[:100]}..."))
-                
-        except Exception as e:
-            print(f"  ❌ Error running {notebook_path}: {str(e)}")
-            results.append((notebook_path, "error", str(e)))
-    
-    # Print summary
+    results = asyncio.run(run_notebooks_async(notebook_jobs, jobs, timeout, retries))
+    print_summary(results)
+    return results
+
+
+def print_summary(results):
+    """Print the execution summary and per-notebook details."""
     print("\n=== Execution Summary ===")
-    print(f"Total notebooks: {len(notebooks)}")
-    print(f"Successes: {len([r for r in results if r[1] == 'success'])}")
-    print(f"Warnings: {len([r for r in results if r[1] == 'warning'])}")
-    print(f"Errors: {len([r for r in results if r[1] == 'error'])}")
-    
+    print(f"Total notebooks: {len(results)}")
+    print(f"Successes: {len([r for r in results if r['status'] == 'success'])}")
+    print(f"Warnings: {len([r for r in results if r['status'] == 'warning'])}")
+    print(f"Errors: {len([r for r in results if r['status'] == 'error'])}")
+
     print("\nDetails:")
-    for notebook, status, message in results:
-        status_symbol = "✅" if status == "success" else "⚠️" if status == "warning" else "❌"
-        print(f"{status_symbol} {notebook}: {message}")
-    
-    return True
+    for r in results:
+        status_symbol = "✅" if r['status'] == "success" else "⚠️" if r['status'] == "warning" else "❌"
+        if r['status'] == 'error':
+            message = f"{r['error']} (after {r['attempts']} attempt{'s' if r['attempts'] != 1 else ''})"
+        elif r['missing_plots']:
+            message = f"Missing or stale {len(r['missing_plots'])} plots: {', '.join(r['missing_plots'])}"
+        else:
+            message = "All plots generated"
+        print(f"{status_symbol} {r['label']}: {message}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run all user notebooks to generate plots')
-    parser.add_argument('--subset', type=int, help='Run only this many notebooks (for testing)')
+    parser.add_argument('--family', action='append', choices=list(FAMILIES),
+                        help='Notebook family to run (repeatable; default: data_exploration and peak_exploration)')
+    parser.add_argument('--users', type=int, nargs='+', help='Only run these user IDs (default: every user with a TCX file)')
+    parser.add_argument('--subset', type=int, help='Run only this many notebooks per family (for testing)')
+    parser.add_argument('--jobs', type=int, default=4, help='Number of kernels / concurrent notebooks')
+    parser.add_argument('--timeout', type=int, default=300, help='Per-notebook timeout in seconds')
+    parser.add_argument('--retries', type=int, default=1, help='Retries after a timeout or dead kernel')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--templates', dest='clones', action='store_false',
+                      help='Run the family templates with injected parameters instead of the per-user copies')
+    mode.add_argument('--clones', dest='clones', action='store_true', default=True,
+                      help='Run the per-user notebook copies (the default)')
+    parser.add_argument('--output-dir', help='With --templates, save executed notebooks under this directory')
+    parser.add_argument('--no-save', action='store_true', help='Do not write the executed per-user copies back')
+    parser.add_argument('--keep-outputs', action='store_true',
+                        help='Write the per-user copies back with their outputs')
+    parser.add_argument('--figures-dir', default=FIGURES_DIR,
+                        help=f'Write figures of saved notebooks under this directory (default: {FIGURES_DIR})')
+    parser.add_argument('--embed-figures', action='store_true', help='Keep figures inline in saved notebooks')
+    parser.add_argument('--results', help='Write structured results to this JSON file')
     args = parser.parse_args()
-    
-    run_notebooks(subset=args.subset)
-    print("Finished running notebooks") 
\ No newline at end of file
+
+    results = run_notebooks(families=tuple(args.family or DEFAULT_FAMILIES), subset=args.subset,
+                            user_ids=args.users, jobs=args.jobs, timeout=args.timeout, retries=args.retries,
+                            output_dir=args.output_dir, clones=args.clones, save=not args.no_save,
+                            keep_outputs=args.keep_outputs,
+                            figures_dir=None if args.embed_figures else args.figures_dir)
+    if args.results:
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.results}")
+    print("Finished running notebooks")
+    sys.exit(1 if any(r['status'] == 'error' for r in results) else 0)
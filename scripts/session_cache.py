@@ -0,0 +1,98 @@
+"""
+Cached access to parsed TCX sessions.
+
+`load_session` returns exactly what `parse_tcx_to_df` returns, but stores the
+parsed DataFrame under output/cache/sessions/ keyed by the TCX file's hash, so
+each TCX is parsed once and every later notebook, validator or renderer run
+just unpickles it. A small JSON sidecar holds the session summary so callers
+that only need the summary never load the DataFrame.
+"""
+
+import os
+
+import pandas as pd
+
+from cache_utils import CACHE_ROOT, file_sha256, read_json, write_json_atomic
+from parse_tcx import parse_tcx_to_df
+
+SESSION_CACHE_DIR = os.path.join(CACHE_ROOT, 'sessions')
+
+
+def tcx_path_for(user_id, data_dir='data'):
+    """Return the TCX path for a user (data/XX-d.tcx)."""
+    return os.path.join(data_dir, f'{user_id}-d.tcx')
+
+
+def _cache_paths(user_id, cache_dir):
+    return (os.path.join(cache_dir, f'user_{user_id}.pkl'),
+            os.path.join(cache_dir, f'user_{user_id}.json'))
+
+
+def _summary_from_result(result, sha):
+    df, total_time_sec, avg_hr, max_hr, calories = result
+    return {
+        'tcx_sha256': sha,
+        'session_total_sec': float(total_time_sec),
+        'session_avg_hr': float(avg_hr),
+        'session_max_hr': int(max_hr),
+        'calories_burned': int(calories),
+        'data_points': int(len(df)),
+    }
+
+
+def _refresh(user_id, data_dir, cache_dir):
+    """Parse the TCX and rewrite both cache files; returns (result, summary)."""
+    tcx_path = tcx_path_for(user_id, data_dir)
+    sha = file_sha256(tcx_path)
+    result = parse_tcx_to_df(tcx_path)
+    summary = _summary_from_result(result, sha)
+
+    pkl_path, json_path = _cache_paths(user_id, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{pkl_path}.{os.getpid()}.tmp'
+    pd.to_pickle({'tcx_sha256': sha, 'result': result}, tmp_path)
+    os.replace(tmp_path, pkl_path)
+    write_json_atomic(json_path, summary)
+    return result, summary
+
+
+def session_hash(user_id, data_dir='data'):
+    """Return the SHA-256 of a user's TCX file (the session cache key)."""
+    return file_sha256(tcx_path_for(user_id, data_dir))
+
+
+def load_session(user_id, data_dir='data', cache_dir=SESSION_CACHE_DIR):
+    """
+    Load a user's parsed session, parsing the TCX only if it changed.
+
+    Returns:
+        (df, total_time_sec, avg_hr, max_hr, calories) as from parse_tcx_to_df
+    """
+    sha = session_hash(user_id, data_dir)
+    pkl_path, _ = _cache_paths(user_id, cache_dir)
+    if os.path.exists(pkl_path):
+        try:
+            cached = pd.read_pickle(pkl_path)
+            if cached.get('tcx_sha256') == sha:
+                return cached['result']
+        except Exception:
+            pass
+    result, _ = _refresh(user_id, data_dir, cache_dir)
+    return result
+
+
+def load_session_summary(user_id, data_dir='data', cache_dir=SESSION_CACHE_DIR):
+    """
+    Load a user's session summary without unpickling the DataFrame.
+
+    Returns:
+        dict with tcx_sha256, session_total_sec, session_avg_hr,
+        session_max_hr, calories_burned and data_points
+    """
+    sha = session_hash(user_id, data_dir)
+    _, json_path = _cache_paths(user_id, cache_dir)
+    summary = read_json(json_path)
+    if summary and summary.get('tcx_sha256') == sha:
+        return summary
+    _, summary = _refresh(user_id, data_dir, cache_dir)
+    return summary
@@ -0,0 +1,194 @@
+"""
+Draggable station boundary editor for the peak detection notebooks.
+
+The figure (chart image, HR line, peaks and one vertical line per cutoff) is
+built once. Moving a slider only moves that cutoff's existing line with
+`set_xdata`, and redraws are debounced so a drag produces one redraw when it
+pauses rather than one per tick. Dragging writes nothing to disk: the commit
+button saves heart_rate_with_stations.png once and records the cutoffs in
+the user registry, and `save_plot` saves the plot alone (the peak template
+saves the starting cutoffs' plot with it, so batch runs produce the plot).
+
+Works with both the inline backend (the figure is re-displayed in an Output
+widget) and the ipympl widget backend (`%matplotlib widget`, redrawn in place).
+"""
+
+import os
+import asyncio
+
+import matplotlib.pyplot as plt
+import ipywidgets as widgets
+from IPython.display import display
+
+from downsample import plot_hr
+from user_registry import DEFAULT_ALIGNMENT, chart_extent, flat_to_pairs, save_cutoffs
+
+STATION_COLORS = ['orange', 'green', 'purple', 'brown', 'pink', 'cyan']
+
+
+def is_widget_canvas(fig):
+    """True when the figure lives on an interactive ipympl canvas."""
+    return type(fig.canvas).__module__.startswith('ipympl')
+
+
+class StationEditor:
+    """
+    Interactive station cutoff editor.
+
+    Args:
+        df: Session DataFrame with elapsed_min, heart_rate and hr_smooth
+        user_id: User being edited
+        cutoffs: Initial cutoffs as a flat list [s1, e1, s2, e2, ...]
+        peaks: Indices of detected peaks in df
+        img: Chart image array (or None)
+        alignment: Chart alignment dict (x_offset, x_scale, y_min, y_max, alpha)
+        plots_dir: Directory for heart_rate_with_stations.png
+        debounce_sec: Quiet period after the last slider change before redrawing
+        on_change: Optional callback receiving the flat cutoff list on every change
+    """
+
+    def __init__(self, df, user_id, cutoffs, peaks=(), img=None, alignment=None,
+                 plots_dir=None, debounce_sec=0.08, on_change=None):
+        self.df = df
+        self.user_id = user_id
+        self.cutoffs = list(cutoffs)
+        self.peaks = peaks
+        self.img = img
+        self.alignment = dict(DEFAULT_ALIGNMENT, **(alignment or {}))
+        self.plots_dir = plots_dir or f'output/plots/user_{user_id}'
+        self.debounce_sec = debounce_sec
+        self.on_change = on_change
+
+        self._pending_redraw = None
+        self.output = widgets.Output()
+        self.status = widgets.Label()
+        self.sliders = self._build_sliders()
+        self.commit_button = widgets.Button(
+            description='Save cutoffs & plot',
+            button_style='success',
+            layout=widgets.Layout(width='200px')
+        )
+        self.commit_button.on_click(lambda _: self.commit())
+        self.fig, self.ax, self.lines = self._build_figure()
+
+        for index, slider in enumerate(self.sliders):
+            slider.observe(lambda change, index=index: self._on_slider(index, change['new']), names='value')
+
+    def _build_sliders(self):
+        session_max = self.df['elapsed_min'].max()
+        sliders = []
+        for i, value in enumerate(self.cutoffs):
+            station_num = (i // 2) + 1
+            kind = 'Start' if i % 2 == 0 else 'End'
+            sliders.append(widgets.FloatSlider(
+                value=value,
+                min=0,
+                max=session_max,
+                step=0.1,
+                description=f'Station {station_num} {kind}:',
+                style={'description_width': '150px'},
+                layout=widgets.Layout(width='500px'),
+                continuous_update=True
+            ))
+        return sliders
+
+    def _build_figure(self):
+        df = self.df
+        with plt.ioff():
+            fig, ax = plt.subplots(figsize=(14, 6))
+
+        if self.img is not None:
+            ax.imshow(self.img, aspect='auto', extent=chart_extent(self.alignment, df['elapsed_min'].max()),
+                      alpha=self.alignment['alpha'], zorder=0, interpolation='bilinear')
+
+        # Downsampled to the pixel width of the committed 300-dpi plot
+        plot_hr(ax, df['elapsed_min'], df['hr_smooth'], dpi=300, color='red', linewidth=3,
+                label='Smoothed HR Data', zorder=2)
+
+        if len(self.peaks) > 0:
+            ax.scatter(df['elapsed_min'].iloc[self.peaks], df['hr_smooth'].iloc[self.peaks],
+                       color='yellow', s=120, edgecolors='black', linewidth=2, zorder=3,
+                       label=f'Detected Peaks ({len(self.peaks)})')
+
+        lines = []
+        for i, value in enumerate(self.cutoffs):
+            station_num = (i // 2) + 1
+            color = STATION_COLORS[(station_num - 1) % len(STATION_COLORS)]
+            if i % 2 == 0:
+                line = ax.axvline(x=value, color=color, linewidth=4,
+                                  label=f'S{station_num} Start', zorder=4)
+            else:
+                line = ax.axvline(x=value, color=color, linewidth=4, linestyle='--',
+                                  label=f'S{station_num} End', zorder=4)
+            lines.append(line)
+
+        ax.set_title(f"🎯 User {self.user_id} - Adjustable Station Boundaries", fontsize=14)
+        ax.set_xlabel("Time (minutes)", fontsize=12)
+        ax.set_ylabel("Heart Rate (bpm)", fontsize=12)
+        ax.grid(True, linestyle='--', alpha=0.3)
+        ax.legend(loc='upper left', bbox_to_anchor=(1.02, 1), fontsize=10)
+
+        ax.set_xlim(0, df['elapsed_min'].max())
+        if self.img is not None:
+            ax.set_ylim(self.alignment['y_min'], self.alignment['y_max'])
+        else:
+            ax.set_ylim(df['heart_rate'].min() - 10, df['heart_rate'].max() + 10)
+
+        fig.tight_layout()
+        return fig, ax, lines
+
+    def _on_slider(self, index, value):
+        self.cutoffs[index] = value
+        self.lines[index].set_xdata([value, value])
+        if self.on_change is not None:
+            self.on_change(list(self.cutoffs))
+        self.status.value = 'Unsaved changes'
+        self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        """Redraw once the sliders have been quiet for `debounce_sec`."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.redraw()
+            return
+        if self._pending_redraw is not None:
+            self._pending_redraw.cancel()
+        self._pending_redraw = loop.call_later(self.debounce_sec, self.redraw)
+
+    def redraw(self):
+        """Render the current state of the existing figure."""
+        self._pending_redraw = None
+        if is_widget_canvas(self.fig):
+            self.fig.canvas.draw_idle()
+            return
+        with self.output:
+            self.output.clear_output(wait=True)
+            display(self.fig)
+
+    def station_pairs(self):
+        """Current cutoffs as [(start, end), ...]."""
+        return flat_to_pairs(self.cutoffs)
+
+    def save_plot(self):
+        """Save heart_rate_with_stations.png for the current cutoffs; returns its path."""
+        os.makedirs(self.plots_dir, exist_ok=True)
+        plot_path = f'{self.plots_dir}/heart_rate_with_stations.png'
+        self.fig.savefig(plot_path, dpi=300, bbox_inches='tight')
+        return plot_path
+
+    def commit(self):
+        """Save heart_rate_with_stations.png and record the cutoffs in the registry."""
+        plot_path = self.save_plot()
+        save_cutoffs(self.user_id, self.station_pairs())
+        self.status.value = f'Saved {plot_path} and {len(self.station_pairs())} station cutoffs'
+
+    def display(self):
+        """Show the sliders, commit button and plot."""
+        display(widgets.VBox(self.sliders + [widgets.HBox([self.commit_button, self.status])]))
+        display(self.output)
+        if is_widget_canvas(self.fig):
+            with self.output:
+                display(self.fig.canvas)
+        else:
+            self.redraw()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Small-multiples overview of many users' heart rate with station boundaries.
+
+Draws any set of users into one figure (one panel per user, shared axes)
+instead of one PNG per user as in output/plots/selected_users_hr_with_stations
+and output/graphs_for_boss/02_high_quality_station_graphs.
+
+Worker processes load each user's cached session, downsample it with LTTB to
+a fixed number of points and write it straight into a shared-memory block;
+the parent then draws every panel from that block in a single pass, with
+each panel's trace and station boundaries drawn as one LineCollection each.
+
+Usage:
+    python scripts/station_grid.py --all
+    python scripts/station_grid.py --users 44 48 50 65 69 --cols 3 --output output/plots/selected_users_grid.png
+"""
+
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+import numpy as np
+
+from downsample import lttb
+from render_plots import PLOTS_ROOT, find_users, load_cutoffs
+from session_cache import load_session
+
+DEFAULT_OUTPUT = os.path.join(PLOTS_ROOT, 'station_grid.png')
+STATION_COLORS = ['red', 'green', 'orange']
+
+
+def _load_trace(shm_name, shape, row, user_id, data_dir):
+    """
+    Worker: downsample one user's HR into row `row` of the shared block.
+
+    Returns:
+        (number of points written, station cutoffs or None)
+    """
+    df = load_session(user_id, data_dir)[0]
+    x, y = lttb(df['elapsed_min'], df['heart_rate'], shape[1])
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        block[row, :len(x), 0] = x
+        block[row, :len(x), 1] = y
+    finally:
+        shm.close()
+    return len(x), load_cutoffs(user_id)
+
+
+def load_traces(user_ids, n_points=400, jobs=None, data_dir='data'):
+    """
+    Load downsampled traces for `user_ids` through a shared-memory feed.
+
+    Returns:
+        (traces, lengths, cutoffs, errors): traces is an array of shape
+        (len(user_ids), n_points, 2) holding elapsed_min and heart_rate,
+        lengths the valid points per row, cutoffs a list per user and errors a
+        dict of user_id -> message for users that could not be loaded
+    """
+    shape = (len(user_ids), n_points, 2)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        lengths = np.zeros(len(user_ids), dtype=int)
+        cutoffs = [None] * len(user_ids)
+        errors = {}
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_load_trace, shm.name, shape, row, user_id, data_dir)
+                       for row, user_id in enumerate(user_ids)]
+            for row, (user_id, future) in enumerate(zip(user_ids, futures)):
+                try:
+                    lengths[row], cutoffs[row] = future.result()
+                except Exception as e:
+                    errors[user_id] = str(e)
+        traces = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return traces, lengths, cutoffs, errors
+
+
+def draw_grid(user_ids, traces, lengths, cutoffs, cols=6, panel_size=(3.0, 1.6)):
+    """Draw one panel per user on shared axes; returns the figure."""
+    rows = max(math.ceil(len(user_ids) / cols), 1)
+    fig = Figure(figsize=(cols * panel_size[0], rows * panel_size[1]))
+    axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False)
+
+    valid = [traces[row, :n] for row, n in enumerate(lengths) if n > 0]
+    if valid:
+        stacked = np.concatenate(valid)
+        x_max = stacked[:, 0].max()
+        y_min, y_max = stacked[:, 1].min() - 5, stacked[:, 1].max() + 5
+    else:
+        x_max, y_min, y_max = 1, 0, 1
+
+    for index, ax in enumerate(axes.flat):
+        if index >= len(user_ids):
+            ax.set_visible(False)
+            continue
+        n = lengths[index]
+        ax.set_title(f'User {user_ids[index]}', fontsize=9)
+        ax.grid(True, linestyle='--', alpha=0.3)
+        if n == 0:
+            ax.text(0.5, 0.5, 'no data', transform=ax.transAxes, ha='center', va='center', fontsize=8)
+            continue
+
+        ax.add_collection(LineCollection([traces[index, :n]], colors='blue', linewidths=0.8))
+
+        stations = cutoffs[index] or []
+        segments, colors = [], []
+        for i, (start, end) in enumerate(stations):
+            color = STATION_COLORS[i % len(STATION_COLORS)]
+            segments += [[(start, y_min), (start, y_max)], [(end, y_min), (end, y_max)]]
+            colors += [color, color]
+        if segments:
+            ax.add_collection(LineCollection(segments, colors=colors, linewidths=0.8,
+                                             linestyles=['--', ':'] * len(stations)))
+
+    # Shared axes: setting the limits once applies them to every panel
+    axes[0, 0].set_xlim(0, x_max)
+    axes[0, 0].set_ylim(y_min, y_max)
+    # Label the lowest visible panel of each column (the last row may be partly empty)
+    for col in range(cols):
+        visible = [ax for ax in axes[:, col] if ax.get_visible()]
+        if visible:
+            visible[-1].xaxis.set_tick_params(labelbottom=True)
+            visible[-1].set_xlabel('Elapsed Minutes', fontsize=8)
+    for ax in axes[:, 0]:
+        ax.set_ylabel('HR (BPM)', fontsize=8)
+    fig.suptitle('Heart Rate with Station Boundaries', fontsize=12)
+    fig.tight_layout()
+    return fig
+
+
+def render_grid(user_ids, output_path=DEFAULT_OUTPUT, cols=6, n_points=400, jobs=None, dpi=150, data_dir='data'):
+    """Render the grid for `user_ids` to `output_path`; returns {user_id: error} for failed users."""
+    traces, lengths, cutoffs, errors = load_traces(user_ids, n_points, jobs, data_dir)
+    fig = draw_grid(user_ids, traces, lengths, cutoffs, cols=min(cols, max(len(user_ids), 1)))
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render many users into one small-multiples figure')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--users', type=int, nargs='+', help='User IDs to include')
+    group.add_argument('--all', action='store_true', help='Include every user with a TCX file')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'Output image (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--cols', type=int, default=6, help='Panels per row (default: 6)')
+    parser.add_argument('--points', type=int, default=400, help='Points per trace after downsampling (default: 400)')
+    parser.add_argument('--dpi', type=int, default=150, help='Output DPI (default: 150)')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    user_ids = find_users() if args.all else args.users
+    errors = render_grid(user_ids, args.output, args.cols, args.points, args.jobs, args.dpi)
+    for user_id, message in errors.items():
+        print(f"❌ User {user_id}: {message}")
+    print(f"✅ Wrote {args.output} ({len(user_ids) - len(errors)} of {len(user_ids)} users)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Station CSV migrations for migrate_station_csvs.py.
+
+Each migration is the per-file body of one of the old column scripts, made
+idempotent and non-destructive: it renames, adds, orders or fills in
+columns, but never overwrites a value that is already there (the old
+mark_survey_fields_tbd.py and update_csv_notes.py overwrote survey answers
+and notes, and fix_csv_preserve_data.py existed to undo such a loss).
+Registration order is the schema version order; append new migrations at
+the end.
+"""
+
+import csv
+import functools
+import os
+import re
+
+from migrate_station_csvs import migration
+from station_schema import (LOW_QUALITY_COLUMNS, LOW_QUALITY_MARKER, LOW_QUALITY_PATTERN, MISSING,
+                            MISSING_AS_TBD, PACES_COLUMNS, STATION_CSV_HEADER)
+
+METADATA_CSV = 'metadata/user_metadata.csv'
+
+# Column names used before the schema (restructure_csv_columns.py, fix_csv_preserve_data.py)
+LEGACY_COLUMNS = {
+    'motivation': 'station_motivation_rating',
+    'enjoyment': 'station_fun_rating',
+    'team_experience': 'station_team_cooperation_rating',
+    'subjective_physical_exertion': 'station_physical_exertion_rating',
+    'subjective_cognitive_exertion': 'station_cognitive_exertion_rating',
+    'overall_experience': 'overall_experience_rating',
+    'overall_motivation': 'overall_motivation_after_completion',
+    'feedback': 'what_did_you_like_and_why',
+    'sports_exp': 'sports_experience',
+    'gaming_exp': 'video_game_experience',
+    'sports_frequency_per_week': 'sports_frequency_times_per_week',
+    'sports_experience_years': 'sports_experience_years_total',
+    'gaming_experience_years': 'gaming_experience_years_total',
+    'gaming_frequency_per_week': 'gaming_frequency_times_per_week',
+}
+
+
+def _blank(value):
+    return value is None or value.strip() in ('', MISSING)
+
+
+def _default(column):
+    return MISSING if column in MISSING_AS_TBD else ''
+
+
+@functools.lru_cache(maxsize=None)
+def _metadata(path=METADATA_CSV):
+    """{user_id: row} from metadata/user_metadata.csv, read once per worker."""
+    try:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            return {row['user_id'].strip(): row for row in csv.DictReader(f)}
+    except (OSError, KeyError):
+        return {}
+
+
+def _is_low_quality(row):
+    return re.match(LOW_QUALITY_PATTERN, row.get('data_quality') or '') is not None
+
+
+# ---------------------------------------------------------------------------
+# Column layout (restructure_csv_columns.py, add_paces_columns.py, reorder_paces_columns.py)
+# ---------------------------------------------------------------------------
+
+@migration('rename_legacy_columns', 'Rename pre-schema column names (motivation, enjoyment, ...) to the schema names')
+def rename_legacy_columns(table, ctx):
+    changed = False
+    for old, new in LEGACY_COLUMNS.items():
+        if old not in table.header:
+            continue
+        if new in table.header:
+            if all(_blank(row[old]) or row[old] == row[new] for row in table.rows):
+                table.header.remove(old)
+                for row in table.rows:
+                    del row[old]
+                changed = True
+            else:
+                ctx.log(f"kept '{old}': it and '{new}' both have values")
+            continue
+        table.header[table.header.index(old)] = new
+        for row in table.rows:
+            row[new] = row.pop(old)
+        changed = True
+    return changed
+
+
+@migration('add_paces_columns', "Add the 17 PACES items as 'TBD'")
+def add_paces_columns(table, ctx):
+    missing = [column for column in PACES_COLUMNS if column not in table.header]
+    for column in missing:
+        table.add_column(column, MISSING)
+    return bool(missing)
+
+
+@migration('restructure_columns', "Add the other schema columns ('TBD' for survey fields, else blank)")
+def restructure_columns(table, ctx):
+    missing = [column for column in STATION_CSV_HEADER if column not in table.header]
+    for column in missing:
+        table.add_column(column, _default(column))
+    return bool(missing)
+
+
+@migration('reorder_columns', 'Order columns as in the schema (PACES before data_quality and notes), extras last')
+def reorder_columns(table, ctx):
+    ordered = [column for column in STATION_CSV_HEADER if column in table.header] + \
+              [column for column in table.header if column not in STATION_CSV_HEADER]
+    if ordered == table.header:
+        return False
+    table.header[:] = ordered
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Values (update_csv_notes.py, fix_csv_preserve_data.py, mark_survey_fields_tbd.py)
+# ---------------------------------------------------------------------------
+
+@migration('fill_quality_notes', "Fill blank data_quality and notes cells from the user's other rows")
+def fill_quality_notes(table, ctx):
+    changed = False
+    for column in ('data_quality', 'notes'):
+        text = next((row[column] for row in table.rows if row[column].strip()), '')
+        if not text:
+            if table.rows:
+                ctx.log(f"no {column} text in any row")
+            continue
+        for row in table.rows:
+            if not row[column].strip():
+                row[column] = text
+                changed = True
+    return changed
+
+
+@migration('restore_champ_and_calories',
+           'Fill a missing champ_number from metadata/user_metadata.csv and calories_burned from the TCX')
+def restore_champ_and_calories(table, ctx):
+    changed = False
+    champ = (_metadata().get(str(ctx.user_id)) or {}).get('champ_number', '').strip()
+    calories = None
+    for row in table.rows:
+        if champ and _blank(row['champ_number']):
+            row['champ_number'] = champ
+            changed = True
+        if _blank(row['calories_burned']) and not _is_low_quality(row):
+            if calories is None:
+                calories = _tcx_calories(ctx)
+            if calories:
+                row['calories_burned'] = calories
+                changed = True
+    return changed
+
+
+def _tcx_calories(ctx):
+    """calories_burned from the user's session summary as a CSV string, or '' if there is no TCX."""
+    from session_cache import load_session_summary, tcx_path_for
+
+    data_dir = ctx.options.get('data_dir', 'data')
+    if ctx.user_id is None or not os.path.exists(tcx_path_for(ctx.user_id, data_dir)):
+        return ''
+    calories = load_session_summary(ctx.user_id, data_dir).get('calories_burned')
+    return str(calories) if calories else ''
+
+
+@migration('mark_survey_fields_tbd',
+           "Mark blank survey fields 'TBD' (station columns of low quality rows 'N/A - LOW QUALITY DATA')")
+def mark_survey_fields_tbd(table, ctx):
+    changed = False
+    for row in table.rows:
+        low_quality = _is_low_quality(row)
+        for column in table.header:
+            if row[column].strip():
+                continue
+            value = LOW_QUALITY_MARKER if low_quality and column in LOW_QUALITY_COLUMNS else _default(column)
+            if value:
+                row[column] = value
+                changed = True
+    return changed
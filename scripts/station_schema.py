@@ -0,0 +1,225 @@
+"""
+Schema of the per-user station CSVs and the master CSV.
+
+One place for the 58-column order, the dtype of every column and the
+missing-value convention, so writers produce the same header everywhere and
+readers get typed columns in one pass instead of object columns full of
+'TBD' strings.
+
+Missing values:
+    - 'TBD' marks a value still to come from the paper survey
+      (TBD_COLUMNS plus gender and age); every other column is left empty.
+    - Low quality rows (data_quality starting with 'LOW QUALITY' or
+      'VERY LOW QUALITY') carry
+      'N/A - LOW QUALITY DATA' in the station columns.
+    Readers turn all three markers into NA; write_station_frame writes them
+    back from NA by these rules, or as the file itself had them when given
+    its raw strings (read_raw_frame), so re-writing a file read from disk
+    never changes its markers.
+
+Usage:
+    from station_schema import read_station_frame, write_station_frame
+    df = read_station_frame('output/processed/MASTER_sphere_heart_rate_data.csv')
+    df[df['station_fun_rating'] >= 5]
+"""
+
+import collections
+import os
+import tempfile
+import warnings
+
+import pandas as pd
+
+MISSING = 'TBD'
+LOW_QUALITY_MARKER = 'N/A - LOW QUALITY DATA'
+NA_VALUES = [MISSING, LOW_QUALITY_MARKER, '']
+
+# PACES items, rated 1 (negative statement) to 7 (positive statement)
+PACES_COLUMNS = [
+    'I hated it / I enjoyed it',
+    'It was boring / It was interesting',
+    "I didn't like it at all / I liked it a lot",
+    'It was unpleasant / It was pleasant',
+    'I was not at all engaged in the activity / I was very engaged in the activity',
+    'It was not fun at all / It was a lot of fun',
+    'I found it very tiring / I found it very invigorating',
+    'It made me feel depressed / It made me happy',
+    'I felt physically bad during the activity / I felt physically good during the activity',
+    'It was not at all stimulating/invigorating / It was very stimulating/invigorating',
+    'I was very frustrated during the activity / I was not at all frustrated during the activity',
+    'It was not enjoyable at all / It was very enjoyable',
+    'It was not exciting at all / It was very exciting',
+    'It was not at all stimulating / It was very stimulating',
+    'It gave me no sense of accomplishment at all / It gave me a strong sense of accomplishment',
+    'It was not at all refreshing / It was very refreshing',
+    'I did not feel like I was just going through the motions / I felt like I was just going through the motions',
+]
+
+# Per-station survey ratings, then ratings asked once per session
+STATION_RATING_COLUMNS = [
+    'station_motivation_rating', 'station_fun_rating', 'station_physical_exertion_rating',
+    'station_cognitive_exertion_rating', 'station_team_cooperation_rating',
+]
+OVERALL_RATING_COLUMNS = ['overall_experience_rating', 'overall_motivation_after_completion']
+
+# Column -> dtype, in CSV order
+SCHEMA = collections.OrderedDict([
+    # Participant demographics and identifiers
+    ('user_id', 'Int64'),
+    ('participant_id', 'string'),
+    ('group_number', 'Int64'),
+    ('champ_number', 'Int64'),
+    ('gender', 'category'),
+    ('age', 'Int64'),
+    ('height_cm', 'float64'),
+    ('weight_kg', 'float64'),
+    # Sports and gaming experience
+    ('sports_experience', 'string'),
+    ('sports_frequency_times_per_week', 'float64'),
+    ('sports_experience_years_total', 'float64'),
+    ('sports_types', 'string'),
+    ('video_game_experience', 'string'),
+    ('gaming_experience_years_total', 'float64'),
+    ('video_game_types', 'string'),
+    ('gaming_frequency_times_per_week', 'float64'),
+    # Session, from the TCX
+    ('session_start_time', 'datetime64[ns, UTC]'),
+    ('session_end_time', 'datetime64[ns, UTC]'),
+    ('session_duration_min', 'float64'),
+    ('session_avg_hr', 'float64'),
+    ('session_max_hr', 'Int64'),
+    ('calories_burned', 'Int64'),
+    # Station, from the TCX and the station cutoffs
+    ('station_number', 'Int64'),
+    ('station_name', 'category'),
+    ('station_start_time', 'datetime64[ns, UTC]'),
+    ('station_end_time', 'datetime64[ns, UTC]'),
+    ('station_duration_min', 'float64'),
+    ('station_avg_hr', 'float64'),
+    ('station_max_hr', 'Int64'),
+    ('station_points_score', 'Int64'),
+    # Survey
+    *((column, 'Int64') for column in STATION_RATING_COLUMNS + OVERALL_RATING_COLUMNS),
+    ('what_did_you_like_and_why', 'string'),
+    ('what_could_be_better', 'string'),
+    *((column, 'Int64') for column in PACES_COLUMNS),
+    # Data quality and research notes (a handful of long texts repeated on every row)
+    ('data_quality', 'category'),
+    ('notes', 'category'),
+])
+
+STATION_CSV_HEADER = list(SCHEMA)
+DATETIME_COLUMNS = [column for column, dtype in SCHEMA.items() if dtype.startswith('datetime')]
+
+# Filled from the survey later; exported as 'TBD'
+TBD_COLUMNS = (
+    ['participant_id', 'group_number', 'sports_frequency_times_per_week', 'sports_experience_years_total',
+     'sports_types', 'gaming_experience_years_total', 'video_game_types', 'gaming_frequency_times_per_week',
+     'station_points_score']
+    + STATION_CSV_HEADER[STATION_CSV_HEADER.index('station_motivation_rating'):STATION_CSV_HEADER.index('data_quality')]
+)
+# Also 'TBD' when missing, though the export fills them from metadata/user_metadata.csv when it can
+MISSING_AS_TBD = TBD_COLUMNS + ['gender', 'age']
+
+# Survey answers given once per participant (the same on all of a user's rows)
+PARTICIPANT_COLUMNS = (
+    [column for column in STATION_CSV_HEADER[1:STATION_CSV_HEADER.index('session_start_time')]
+     if column != 'champ_number']
+    + OVERALL_RATING_COLUMNS + ['what_did_you_like_and_why', 'what_could_be_better']
+)
+# Everything a survey export may fill in: the participant answers and the per-station answers
+SURVEY_COLUMNS = [column for column in STATION_CSV_HEADER
+                  if column in PARTICIPANT_COLUMNS or column in TBD_COLUMNS or column == 'station_name']
+PACES_SCALE = (1, 7)
+
+# Station columns a low quality (session-only) row marks as not available
+LOW_QUALITY_COLUMNS = [column for column in STATION_CSV_HEADER if 'station' in column]
+
+
+LOW_QUALITY_PATTERN = r'^(?:VERY )?LOW QUALITY'
+
+
+def is_low_quality_row(data_quality):
+    """True for rows written by the low quality template (vectorised over a Series)."""
+    return data_quality.astype('string').str.contains(LOW_QUALITY_PATTERN).fillna(False).astype(bool)
+
+
+def read_station_frame(path, usecols=None):
+    """
+    Read a station CSV (per-user or master) with the schema dtypes.
+
+    'TBD', 'N/A - LOW QUALITY DATA' and empty cells become NA. Columns not
+    in the schema are kept as strings.
+
+    Raises:
+        ValueError: if a value does not fit its column's dtype or a row has
+            more fields than the header
+    """
+    dtypes = collections.defaultdict(lambda: 'string')
+    dtypes.update({column: ('string' if column in DATETIME_COLUMNS else dtype) for column, dtype in SCHEMA.items()})
+    try:
+        with warnings.catch_warnings():
+            # Rows with extra fields are otherwise truncated with only a warning
+            warnings.simplefilter('error', pd.errors.ParserWarning)
+            df = pd.read_csv(path, dtype=dtypes, na_values=NA_VALUES, keep_default_na=False,
+                             usecols=usecols, index_col=False, float_precision='round_trip')
+    except (TypeError, ValueError, pd.errors.ParserWarning) as e:
+        raise ValueError(f"{path}: {e}") from e
+    for column in DATETIME_COLUMNS:
+        if column in df:
+            # ISO8601: exported times may or may not carry fractional seconds
+            df[column] = pd.to_datetime(df[column], utc=True, format='ISO8601')
+    return df
+
+
+def read_raw_frame(path, usecols=None):
+    """Read a station CSV as the strings written in it, markers included (for format_station_frame)."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_filter=False, usecols=usecols, index_col=False)
+
+
+def format_station_frame(df, raw=None):
+    """
+    Render a typed station frame as CSV strings by the missing-value convention.
+
+    Schema columns come first in schema order, then any extra columns.
+
+    Args:
+        df: Typed frame as from read_station_frame
+        raw: The same rows as read by read_raw_frame; NA cells are then
+            written with the file's own marker instead of the convention
+    """
+    columns = [column for column in STATION_CSV_HEADER if column in df] + \
+              [column for column in df if column not in SCHEMA]
+    low_quality = (is_low_quality_row(df['data_quality']) if 'data_quality' in df
+                   else pd.Series(False, df.index)).tolist()
+    out = {}
+    for column in columns:
+        values = df[column]
+        missing = values.isna().tolist()
+        default = MISSING if column in MISSING_AS_TBD else ''
+        marker = LOW_QUALITY_MARKER if column in LOW_QUALITY_COLUMNS else default
+        render = (lambda t: t.isoformat()) if column in DATETIME_COLUMNS else str
+        if raw is not None and column in raw:
+            # Cells written by hand do not always follow the convention; keep what the file had
+            markers = raw[column].tolist()
+        else:
+            markers = [marker if low else default for low in low_quality]
+        # Plain lists: per-column Series operations dominate the cost on small files
+        out[column] = [token if na else render(value)
+                       for value, na, token in zip(values.tolist(), missing, markers)]
+    return pd.DataFrame(out, index=df.index, columns=columns)
+
+
+def write_station_frame(df, path, raw=None):
+    """Write a typed station frame through a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            format_station_frame(df, raw).to_csv(f, index=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Script to strip executed outputs from every notebook in the repository.
+
+Committed notebooks are kept output-free: figures are written to
+output/plots/ by the notebooks themselves (and by render_plots.py), and
+run_all_notebooks.py saves any other figures as files under output/figures/.
+Without embedded base64 images and widget state the notebooks are a fraction
+of the size, so opening them and the batch notebook scripts are much faster.
+
+Run this before committing notebooks that were executed in Jupyter:
+
+```
+python scripts/strip_notebook_outputs.py
+python scripts/strip_notebook_outputs.py --dry-run
+```
+"""
+
+from notebook_transform import main
+
+if __name__ == "__main__":
+    raise SystemExit(main(['strip_outputs'], description='Strip outputs from all notebooks',
+                          pattern='notebooks/**/*.ipynb'))
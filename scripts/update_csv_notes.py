@@ -1,113 +1,16 @@
 #!/usr/bin/env python3
 """
-Update CSV files with comprehensive notes and data_quality descriptions
-for research use in the Sphere Heart Rate Analysis project.
-"""
-
-import pandas as pd
-import glob
-import os
-from datetime import datetime
+Fill in the notes and data_quality descriptions of the station CSVs.
+Blank cells get the text of the user's other rows; descriptions already in a
+file (written by the export from the data quality of the session) are kept.
 
-def get_comprehensive_data_quality(user_id):
-    """Generate comprehensive data quality description based on user ID."""
-    
-    # Low quality data users (identified from previous analysis)
-    low_quality_users = [3, 6, 10, 20, 36,41,48, 69]
-    
-    if user_id in low_quality_users:
-        return (
-            f"LOW QUALITY DATA: User {user_id} exhibits significant data quality issues including "
-            "heart rate sensor dropouts, flat-line segments, or misalignment between TCX data and "
-            "Garmin chart. This data is not suitable for detailed station-level analysis or "
-            "physiological interpretation. Recommend exclusion from primary analysis or use only "
-            "for data quality validation studies."
-        )
-    else:
-        return (
-            f"HIGH QUALITY DATA: User {user_id} demonstrates clean, continuous heart rate recording "
-            "throughout the session. Heart rate patterns show clear physiological responses to "
-            "exercise with well-defined peaks during active gameplay periods and appropriate "
-            "recovery valleys between stations. TCX data aligns well with Garmin chart visualization. "
-            "Data is suitable for detailed cardiovascular analysis, station-level comparisons, "
-            "and physiological research applications."
-        )
-
-def get_comprehensive_notes(user_id):
-    """Generate comprehensive notes based on user ID."""
-    
-    # Low quality data users
-    low_quality_users = [3, 6, 10, 20, 36, 41, 48, 69]
-    
-    if user_id in low_quality_users:
-        return (
-            f"RESEARCH NOTE: User {user_id} identified as low-quality data during initial screening. "
-            "Station boundaries were not reliably determined due to poor heart rate signal quality. "
-            "This participant's data should be excluded from physiological analyses but may be "
-            "valuable for data quality studies or sensor validation research. "
-            "Consider investigating equipment malfunction or participant compliance issues."
-        )
-    else:
-        return (
-            f"RESEARCH NOTE: User {user_id} completed standard 3-station Sphere protocol with "
-            "high-quality heart rate monitoring. Station boundaries were determined through "
-            "visual alignment of TCX data with Garmin chart, identifying clear transitions "
-            "between active gameplay periods and recovery intervals. Each station represents "
-            "approximately 10 minutes of gameplay with distinct cardiovascular responses. "
-            "Data is validated for research use in exercise physiology, gaming exertion studies, "
-            "and cardiovascular response analysis. Station timing reflects actual participant "
-            "pacing rather than rigid protocol timing, providing ecologically valid data."
-        )
+The edits are migrations in station_migrations.py, applied by
+migrate_station_csvs.py; earlier pending migrations run first, so the fixes
+can no longer be applied out of order
+(see `python scripts/migrate_station_csvs.py --list-migrations`).
+"""
 
-def update_csv_files():
-    """Update all CSV files with comprehensive notes and data quality descriptions."""
-    
-    csv_files = glob.glob('output/processed/user_*_station_data.csv')
-    
-    print(f"Found {len(csv_files)} CSV files to update")
-    print("=" * 60)
-    
-    updated_count = 0
-    
-    for csv_file in sorted(csv_files):
-        try:
-            # Extract user ID from filename
-            user_id = int(os.path.basename(csv_file).split('_')[1])
-            
-            print(f"Updating User {user_id}...")
-            
-            # Read CSV
-            df = pd.read_csv(csv_file)
-            
-            # Generate comprehensive descriptions
-            data_quality_desc = get_comprehensive_data_quality(user_id)
-            notes_desc = get_comprehensive_notes(user_id)
-            
-            # Update all rows for this user
-            df['data_quality'] = data_quality_desc
-            df['notes'] = notes_desc
-            
-            # Save updated CSV
-            df.to_csv(csv_file, index=False)
-            
-            print(f"  ✅ Updated {len(df)} rows")
-            updated_count += 1
-            
-        except Exception as e:
-            print(f"  ❌ Error updating {csv_file}: {e}")
-    
-    print("=" * 60)
-    print(f"Successfully updated {updated_count}/{len(csv_files)} CSV files")
-    print()
-    print("UPDATED FIELDS:")
-    print("- data_quality: Comprehensive assessment of data quality for research use")
-    print("- notes: Detailed research notes including methodology and recommendations")
-    print()
-    print("These descriptions will help researchers:")
-    print("• Identify high vs. low quality data")
-    print("• Understand data collection methodology")
-    print("• Make informed decisions about data inclusion/exclusion")
-    print("• Interpret physiological findings appropriately")
+from migrate_station_csvs import main
 
 if __name__ == "__main__":
-    update_csv_files() 
\ No newline at end of file
+    raise SystemExit(main('fill_quality_notes', description='Fill blank data_quality and notes cells in all station CSVs'))
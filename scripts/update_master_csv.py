@@ -1,61 +1,260 @@
 #!/usr/bin/env python3
 """
 Script to update the master CSV with all current station data peaks CSV files.
-This script will combine all individual user station data peaks CSV files into the master CSV.
+
+The master is updated incrementally. output/cache/master_manifest.json
+records the size, modification time and SHA-256 of every per-user file
+merged into the master, plus the station keys it contributed. On each run
+only new or changed per-user files are read (with the typed station schema,
+scripts/station_schema.py, in one parse per distinct header); their rows are
+upserted by (user_id, station_number), stations that disappeared from a
+changed file and users whose file was removed are dropped, and the master is
+written atomically through a temp file. Rows of unchanged users are carried over as
+they are in the master.
+
+The master is rebuilt from every per-user file when there is no manifest,
+when the master no longer matches the manifest (edited or replaced by hand),
+or with --full.
+
+Usage:
+    python scripts/update_master_csv.py
+    python scripts/update_master_csv.py --full
 """
 
-import pandas as pd
+import io
 import os
+import csv
 import glob
-from pathlib import Path
-
-def update_master_csv():
-    """Update the master CSV with all current station data peaks CSV files."""
-    
-    # Define paths
-    processed_dir = Path("output/processed")
-    master_csv_path = processed_dir / "MASTER_sphere_heart_rate_data.csv"
-    
-    # Find all station data peaks CSV files
-    station_csv_pattern = processed_dir / "*_station_data_peaks.csv"
-    station_csv_files = glob.glob(str(station_csv_pattern))
-    
-    print(f"Found {len(station_csv_files)} station data peaks CSV files:")
-    for file in station_csv_files:
-        print(f"  - {os.path.basename(file)}")
-    
-    # Read and combine all station data peaks CSV files
-    all_dataframes = []
-    
-    for csv_file in station_csv_files:
+import math
+import argparse
+import tempfile
+
+from cache_utils import CACHE_ROOT, file_sha256, read_json, write_json_atomic
+from station_schema import STATION_CSV_HEADER, format_station_frame, read_raw_frame, read_station_frame
+
+PROCESSED_DIR = 'output/processed'
+MASTER_CSV = os.path.join(PROCESSED_DIR, 'MASTER_sphere_heart_rate_data.csv')
+MANIFEST = os.path.join(CACHE_ROOT, 'master_manifest.json')
+STATION_CSV_PATTERN = '*_station_data_peaks.csv'
+
+
+def row_key(row):
+    """Upsert key of a master row: (user_id, station_number) as written in the CSV."""
+    return row.get('user_id', ''), row.get('station_number', '')
+
+
+def sort_key(key):
+    """Order users and stations numerically; non-numeric values (low quality rows) last."""
+    def number(value):
+        try:
+            return float(value)
+        except ValueError:
+            return math.inf
+    return tuple(number(value) for value in key)
+
+
+def scan_files(paths, manifest_files):
+    """
+    Split per-user files into changed and unchanged against the manifest.
+
+    Size and modification time are checked first; only files whose stat
+    changed are hashed.
+
+    Returns:
+        (changed {path: entry without keys}, unchanged {path: manifest entry})
+    """
+    changed, unchanged = {}, {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        previous = manifest_files.get(path)
+        if previous and (previous['size'], previous['mtime_ns']) == (entry['size'], entry['mtime_ns']):
+            unchanged[path] = previous
+            continue
+        entry['sha256'] = file_sha256(path)
+        if previous and previous['sha256'] == entry['sha256']:
+            unchanged[path] = dict(previous, **entry)
+        else:
+            changed[path] = entry
+    return changed, unchanged
+
+
+def read_master(path):
+    """Return the master's (header, rows as dicts of strings), or ([], []) if it does not exist."""
+    if not os.path.exists(path):
+        return [], []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return list(reader.fieldnames or []), list(reader)
+
+
+def read_user_rows(path):
+    """Read a per-user station CSV with the schema and return (header, rows as dicts of strings)."""
+    # Missing cells keep the file's own marker ('TBD' or blank)
+    text = format_station_frame(read_station_frame(path), read_raw_frame(path))
+    return list(text.columns), text.to_dict('records')
+
+
+def read_many_user_rows(paths):
+    """
+    Read many per-user station CSVs with one typed parse per distinct header.
+
+    A typed read costs about 25 ms per file, nearly all of it fixed overhead,
+    so files sharing a header line are concatenated and read by a single
+    read_station_frame call (and one read_raw_frame call for the markers
+    of the missing cells). A group whose combined read fails is read file
+    by file, so the error names the file.
+
+    Returns:
+        {path: (header, rows as dicts of strings) or the exception raised reading it}
+    """
+    groups, results = {}, {}
+    for path in paths:
+        try:
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            results[path] = e
+            continue
+        header, _, body = text.partition('\n')
+        n_rows = sum(1 for record in csv.reader(io.StringIO(body, newline='')) if record)
+        if body and not body.endswith('\n'):
+            body += '\n'
+        groups.setdefault(header, []).append((path, body, n_rows))
+
+    for header, files in groups.items():
         try:
-            df = pd.read_csv(csv_file)
-            all_dataframes.append(df)
-            print(f"Successfully read {os.path.basename(csv_file)} with {len(df)} rows")
-        except Exception as e:
-            print(f"Error reading {csv_file}: {e}")
-    
-    if not all_dataframes:
-        print("No valid CSV files found!")
-        return
-    
-    # Combine all dataframes
-    combined_df = pd.concat(all_dataframes, ignore_index=True)
-    print(f"\nCombined data has {len(combined_df)} total rows")
-    
-    # Sort by user_id and station_number for better organization
-    combined_df = combined_df.sort_values(['user_id', 'station_number'])
-    
-    # Save the updated master CSV
-    combined_df.to_csv(master_csv_path, index=False)
-    print(f"\nUpdated master CSV saved to: {master_csv_path}")
-    print(f"Total rows in master CSV: {len(combined_df)}")
-    
-    # Print summary by user
-    print("\nSummary by user:")
-    user_counts = combined_df['user_id'].value_counts().sort_index()
-    for user_id, count in user_counts.items():
-        print(f"  User {user_id}: {count} stations")
+            if not header.strip():
+                raise ValueError('no header')
+            combined = header + '\n' + ''.join(body for _, body, _ in files)
+            frame = read_station_frame(io.StringIO(combined))
+            raw = read_raw_frame(io.StringIO(combined))
+            if not len(frame) == len(raw) == sum(n_rows for _, _, n_rows in files):
+                raise ValueError('row count mismatch')
+        except ValueError:
+            for path, _, _ in files:
+                try:
+                    results[path] = read_user_rows(path)
+                except (OSError, ValueError) as e:
+                    results[path] = e
+            continue
+        text = format_station_frame(frame, raw)
+        columns, rows = list(text.columns), text.to_dict('records')
+        start = 0
+        for path, _, n_rows in files:
+            results[path] = (columns, rows[start:start + n_rows])
+            start += n_rows
+    return results
+
+
+def merge_header(header, extra):
+    """Schema columns in schema order, then any other columns in first-seen order."""
+    columns = list(dict.fromkeys(list(header) + list(extra)))
+    return [column for column in STATION_CSV_HEADER if column in columns] + \
+           [column for column in columns if column not in STATION_CSV_HEADER]
+
+
+def write_master(path, header, rows):
+    """Write the master through a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=header, restval='', lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def update_master_csv(processed_dir=PROCESSED_DIR, master_path=None, manifest_path=MANIFEST, full=False):
+    """
+    Upsert changed per-user station CSVs into the master CSV.
+
+    Returns:
+        dict with 'status' ('written' or 'unchanged'), 'mode' ('incremental'
+        or 'full'), 'read' and 'removed' (per-user file paths), 'errors'
+        ({path: message}) and 'rows' (rows in the master)
+    """
+    master_path = master_path or os.path.join(processed_dir, os.path.basename(MASTER_CSV))
+    paths = sorted(glob.glob(os.path.join(processed_dir, STATION_CSV_PATTERN)))
+    if not paths and not os.path.exists(master_path):
+        return {'status': 'skipped (no station CSVs)', 'mode': 'full', 'read': [], 'removed': [], 'errors': {},
+                'rows': 0}
+
+    manifest = read_json(manifest_path, default={})
+    master_matches = (os.path.exists(master_path) and manifest.get('master')
+                      and manifest['master'] == file_sha256(master_path))
+    mode = 'incremental' if master_matches and not full else 'full'
+    manifest_files = manifest.get('files', {}) if mode == 'incremental' else {}
+
+    changed, unchanged = scan_files(paths, manifest_files)
+    removed = sorted(set(manifest_files) - set(paths))
+    header, master_rows = read_master(master_path) if mode == 'incremental' else ([], [])
+    rows = {row_key(row): row for row in master_rows}
+
+    def drop(path):
+        for key in manifest_files.get(path, {}).get('keys', []):
+            rows.pop(tuple(key), None)
+
+    for path in removed:
+        drop(path)
+
+    errors = {}
+    files = dict(unchanged)
+    read = read_many_user_rows(sorted(changed))
+    for path, entry in sorted(changed.items()):
+        if isinstance(read[path], Exception):
+            # Keep the file's previous rows and manifest entry; it is read again next time
+            errors[path] = str(read[path])
+            if path in manifest_files:
+                files[path] = manifest_files[path]
+            continue
+        file_header, file_rows = read[path]
+        # Stations that disappeared from the file are dropped with the rest of its old keys
+        drop(path)
+        header = merge_header(header, file_header)
+        for row in file_rows:
+            rows[row_key(row)] = row
+        files[path] = dict(entry, keys=[list(row_key(row)) for row in file_rows])
+
+    result = {'mode': mode, 'read': sorted(set(changed) - set(errors)), 'removed': removed,
+              'errors': errors, 'rows': len(rows)}
+    if len(errors) == len(changed) and not removed and mode == 'incremental':
+        result['status'] = 'unchanged'
+    else:
+        ordered = [rows[key] for key in sorted(rows, key=sort_key)]
+        write_master(master_path, merge_header(header, []), ordered)
+        result['status'] = 'written'
+
+    write_json_atomic(manifest_path, {'master': file_sha256(master_path) if os.path.exists(master_path) else None,
+                                      'files': files})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upsert changed per-user station CSVs into the master CSV')
+    parser.add_argument('--full', action='store_true', help='Rebuild the master from every per-user file')
+    parser.add_argument('--processed-dir', default=PROCESSED_DIR,
+                        help=f'Directory of the per-user station CSVs (default: {PROCESSED_DIR})')
+    args = parser.parse_args()
+
+    result = update_master_csv(args.processed_dir, full=args.full)
+    for path, message in result['errors'].items():
+        print(f"❌ Error reading {os.path.basename(path)}: {message}")
+    for path in result['read']:
+        print(f"  - read {os.path.basename(path)}")
+    for path in result['removed']:
+        print(f"  - removed {os.path.basename(path)}")
+    icon = '✅' if not result['errors'] else '⚠️'
+    print(f"{icon} Master CSV {result['status']} ({result['mode']}): {len(result['read'])} files read, "
+          f"{len(result['removed'])} removed, {result['rows']} rows")
+    return 1 if result['errors'] else 0
+
 
 if __name__ == "__main__":
-    update_master_csv() 
\ No newline at end of file
+    raise SystemExit(main())
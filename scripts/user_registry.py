@@ -0,0 +1,106 @@
+"""
+Per-user registry of the manual analysis decisions made in the notebooks.
+
+The registry (metadata/user_registry.json) records, for each user, the chart
+alignment parameters chosen in the alignment step, the committed station
+cutoffs from the draggable station editor and any notebook parameter
+overrides, so scripts can reproduce a user's plots and exports without
+re-running their notebook.
+
+Layout:
+    {
+      "2": {
+        "alignment": {"x_offset": -0.8, "x_scale": 1.0, "y_min": 90, "y_max": 190, "alpha": 0.6},
+        "cutoffs": [[1.1, 4.5], [8.0, 12.3]],
+        "parameters": {"PEAK_THRESHOLD_RATIO": 0.75}
+      }
+    }
+"""
+
+from cache_utils import read_json, write_json_atomic
+
+REGISTRY_PATH = 'metadata/user_registry.json'
+
+DEFAULT_ALIGNMENT = {
+    'x_offset': -0.8,
+    'x_scale': 1.0,
+    'y_min': 90,
+    'y_max': 190,
+    'alpha': 0.6,
+}
+
+
+def load_registry(path=REGISTRY_PATH):
+    """Load the whole registry as a dict keyed by user ID string."""
+    return read_json(path, default={})
+
+
+def get_user_entry(user_id, path=REGISTRY_PATH):
+    """Return the registry entry for one user (empty dict if none)."""
+    return load_registry(path).get(str(user_id), {})
+
+
+def update_user_entry(user_id, path=REGISTRY_PATH, **fields):
+    """Merge `fields` into a user's entry and write the registry atomically."""
+    registry = load_registry(path)
+    entry = registry.setdefault(str(user_id), {})
+    entry.update(fields)
+    registry = {key: registry[key] for key in sorted(registry, key=int)}
+    write_json_atomic(path, registry)
+    return entry
+
+
+def get_alignment(user_id, path=REGISTRY_PATH):
+    """Return a user's alignment parameters, falling back to DEFAULT_ALIGNMENT."""
+    alignment = dict(DEFAULT_ALIGNMENT)
+    alignment.update(get_user_entry(user_id, path).get('alignment', {}))
+    return alignment
+
+
+def chart_extent(alignment, session_max_min):
+    """Return the imshow extent [x_min, x_max, y_min, y_max] for the chart image."""
+    x_min = alignment['x_offset']
+    x_max = alignment['x_offset'] + (session_max_min * alignment['x_scale']) + 1.2
+    return [x_min, x_max, alignment['y_min'], alignment['y_max']]
+
+
+def save_alignment(user_id, alignment, path=REGISTRY_PATH):
+    """Record a user's chart alignment parameters."""
+    alignment = {key: alignment[key] for key in DEFAULT_ALIGNMENT}
+    return update_user_entry(user_id, path, alignment=alignment)
+
+
+def get_cutoffs(user_id, path=REGISTRY_PATH):
+    """Return a user's committed station cutoffs as [(start, end), ...], or None."""
+    cutoffs = get_user_entry(user_id, path).get('cutoffs')
+    if cutoffs is None:
+        return None
+    return [(float(start), float(end)) for start, end in cutoffs]
+
+
+def save_cutoffs(user_id, cutoffs, path=REGISTRY_PATH):
+    """Record a user's station cutoffs given as [(start, end), ...] in elapsed minutes."""
+    cutoffs = [[round(float(start), 4), round(float(end), 4)] for start, end in cutoffs]
+    return update_user_entry(user_id, path, cutoffs=cutoffs)
+
+
+def get_parameters(user_id, path=REGISTRY_PATH):
+    """Return a user's notebook parameter overrides (injected after the template's parameters cell)."""
+    return dict(get_user_entry(user_id, path).get('parameters', {}))
+
+
+def save_parameters(user_id, path=REGISTRY_PATH, **parameters):
+    """Merge notebook parameter overrides into a user's entry."""
+    merged = get_parameters(user_id, path)
+    merged.update(parameters)
+    return update_user_entry(user_id, path, parameters=merged)
+
+
+def pairs_to_flat(cutoffs):
+    """[(s1, e1), (s2, e2)] -> [s1, e1, s2, e2] (the notebooks' current_cutoffs layout)."""
+    return [value for pair in cutoffs for value in pair]
+
+
+def flat_to_pairs(flat_cutoffs):
+    """[s1, e1, s2, e2] -> [(s1, e1), (s2, e2)]; a trailing unpaired start is dropped."""
+    return [(flat_cutoffs[i], flat_cutoffs[i + 1]) for i in range(0, len(flat_cutoffs) - 1, 2)]
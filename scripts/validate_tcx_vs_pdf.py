@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Check that each user's TCX file and Garmin PDF report describe the same session.
+
+The PDF report and the TCX file for the same user should agree on duration,
+average HR, max HR and calories. A mismatch usually means a misnamed or
+swapped file, which would otherwise silently produce wrong station data.
+
+- TCX summaries come from the parsed-session cache (scripts/session_cache.py)
+- PDF values come from the cached PDF text (scripts/extract_champ_numbers_from_pdfs.py)
+- Users are validated in parallel across a process pool
+
+Usage:
+    python scripts/validate_tcx_vs_pdf.py [--jobs N] [--output report.csv]
+"""
+
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from extract_champ_numbers_from_pdfs import extract_pdf_report
+from session_cache import load_session_summary
+
+# Maximum allowed absolute difference per field
+DEFAULT_TOLERANCES = {
+    'duration_min': 1.0,
+    'avg_hr': 3.0,
+    'max_hr': 2.0,
+    'calories': 10.0,
+}
+
+# (field, TCX summary key, PDF report key)
+COMPARED_FIELDS = [
+    ('duration_min', 'session_duration_min', 'pdf_duration_min'),
+    ('avg_hr', 'session_avg_hr', 'pdf_avg_hr'),
+    ('max_hr', 'session_max_hr', 'pdf_max_hr'),
+    ('calories', 'calories_burned', 'pdf_calories'),
+]
+
+
+def validate_user(user_id, tolerances=DEFAULT_TOLERANCES, data_dir='data'):
+    """Compare one user's TCX summary with their PDF report; returns one row per field."""
+    summary = load_session_summary(user_id, data_dir=data_dir)
+    summary['session_duration_min'] = summary['session_total_sec'] / 60
+    report = extract_pdf_report(os.path.join(data_dir, f'{user_id}-d.pdf'))
+
+    rows = []
+    for field, tcx_key, pdf_key in COMPARED_FIELDS:
+        tcx_value = summary[tcx_key]
+        pdf_value = report[pdf_key]
+        if pdf_value is None:
+            status, difference = 'missing', None
+        else:
+            difference = tcx_value - pdf_value
+            status = 'ok' if abs(difference) <= tolerances[field] else 'mismatch'
+        rows.append({
+            'user_id': user_id,
+            'field': field,
+            'tcx_value': tcx_value,
+            'pdf_value': pdf_value,
+            'difference': difference,
+            'tolerance': tolerances[field],
+            'status': status,
+        })
+    return rows
+
+
+def find_users(data_dir='data'):
+    """Return user IDs that have both a TCX file and a PDF report."""
+    tcx_users = {int(os.path.basename(p).split('-')[0]) for p in glob.glob(os.path.join(data_dir, '*-d.tcx'))}
+    pdf_users = {int(os.path.basename(p).split('-')[0]) for p in glob.glob(os.path.join(data_dir, '*-d.pdf'))}
+    for user_id in sorted(tcx_users ^ pdf_users):
+        missing = 'PDF' if user_id in tcx_users else 'TCX'
+        print(f"⚠️  User {user_id}: no {missing} file, skipping")
+    return sorted(tcx_users & pdf_users)
+
+
+def validate_all(user_ids=None, tolerances=DEFAULT_TOLERANCES, jobs=None, data_dir='data'):
+    """Validate every user across a process pool; returns a DataFrame of comparisons."""
+    if user_ids is None:
+        user_ids = find_users(data_dir)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {user_id: pool.submit(validate_user, user_id, tolerances, data_dir) for user_id in user_ids}
+        for user_id, future in futures.items():
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                rows.append({'user_id': user_id, 'field': 'error', 'tcx_value': None, 'pdf_value': None,
+                             'difference': None, 'tolerance': None, 'status': f'error: {e}'})
+    return pd.DataFrame(rows)
+
+
+def print_report(report_df):
+    """Print a per-user summary and the list of discrepancies."""
+    print("=" * 80)
+    print("TCX vs PDF CONSISTENCY REPORT")
+    print("=" * 80)
+
+    problem_users = []
+    for user_id, user_rows in report_df.groupby('user_id', sort=True):
+        problems = user_rows[user_rows['status'] != 'ok']
+        if problems.empty:
+            print(f"✅ User {user_id:2d}: all fields agree")
+            continue
+        problem_users.append(user_id)
+        print(f"❌ User {user_id:2d}:")
+        for row in problems.itertuples(index=False):
+            if row.status == 'mismatch':
+                print(f"     - {row.field}: TCX {row.tcx_value:.1f} vs PDF {row.pdf_value:.1f} "
+                      f"(diff {row.difference:+.1f}, tolerance ±{row.tolerance:g})")
+            else:
+                print(f"     - {row.field}: {row.status}")
+
+    print()
+    print(f"Users checked: {report_df['user_id'].nunique()}")
+    print(f"Users with discrepancies: {len(problem_users)} {problem_users if problem_users else ''}")
+    return problem_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check TCX files against their Garmin PDF reports')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--output', help='Optional CSV path for the full comparison table')
+    for field, tolerance in DEFAULT_TOLERANCES.items():
+        parser.add_argument(f'--tol-{field.replace("_", "-")}', type=float, default=tolerance,
+                            dest=f'tol_{field}', help=f'Tolerance for {field} (default: {tolerance})')
+    args = parser.parse_args()
+
+    tolerances = {field: getattr(args, f'tol_{field}') for field in DEFAULT_TOLERANCES}
+    report_df = validate_all(tolerances=tolerances, jobs=args.jobs)
+    if report_df.empty:
+        print("No users with both TCX and PDF files found")
+        return 0
+
+    problem_users = print_report(report_df)
+    if args.output:
+        report_df.to_csv(args.output, index=False)
+        print(f"Full comparison saved to {args.output}")
+    return 1 if problem_users else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
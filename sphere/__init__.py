@@ -0,0 +1,47 @@
+"""
+Importable core of the Sphere heart rate analysis.
+
+The peak detection, alignment, station slicing and station CSV export logic
+that the notebooks used to carry cell by cell lives here, so the same code
+runs from a notebook (`import sphere`) and from the batch CLI
+(`python -m sphere run --users all --jobs 8`).
+
+Like the old notebooks/sphere_helper.py, importing the package puts scripts/
+on sys.path; the package builds on the script modules (parse_tcx,
+session_cache, peak_detection, user_registry, render_plots) rather than
+duplicating them.
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.append(SCRIPTS_DIR)
+
+from parse_tcx import parse_tcx_to_df  # noqa: E402
+from session_cache import load_session  # noqa: E402
+
+from sphere.alignment import chart_extent, get_alignment, load_chart, save_alignment  # noqa: E402
+from sphere.export import build_station_rows, export_user, station_csv_path, station_frame  # noqa: E402
+from sphere.peaks import detect_hr_peaks, detect_stations, regions_to_cutoffs, smooth_hr  # noqa: E402
+from sphere.stations import slice_stations, station_stats  # noqa: E402
+
+__all__ = [
+    'parse_tcx_to_df',
+    'load_session',
+    'detect_hr_peaks',
+    'smooth_hr',
+    'detect_stations',
+    'regions_to_cutoffs',
+    'get_alignment',
+    'save_alignment',
+    'chart_extent',
+    'load_chart',
+    'station_stats',
+    'slice_stations',
+    'station_frame',
+    'build_station_rows',
+    'export_user',
+    'station_csv_path',
+]
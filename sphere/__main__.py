@@ -0,0 +1,5 @@
+import sys
+
+from sphere.cli import main
+
+sys.exit(main())
@@ -0,0 +1,33 @@
+"""
+Chart alignment: the saved overlay parameters and the cropped Garmin chart.
+
+The parameters themselves live in the user registry; this module gathers
+what a notebook or script needs to place a user's chart behind their HR.
+"""
+
+import os
+
+import matplotlib.image as mpimg
+
+from render_plots import CHARTS_DIR, chart_path_for
+from user_registry import DEFAULT_ALIGNMENT, chart_extent, get_alignment, save_alignment
+
+__all__ = [
+    'DEFAULT_ALIGNMENT',
+    'chart_extent',
+    'chart_path_for',
+    'get_alignment',
+    'save_alignment',
+    'load_chart',
+]
+
+
+def load_chart(user_id, charts_dir=CHARTS_DIR):
+    """Return a user's cropped chart image as an array, or None if it is missing or unreadable."""
+    path = chart_path_for(user_id, charts_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return mpimg.imread(path)
+    except Exception:
+        return None
@@ -0,0 +1,280 @@
+"""
+Incremental build from raw TCX to the master CSV: python -m sphere build.
+
+The pipeline is declared as a graph of nodes. Each node names the files it
+reads, the nodes it depends on, any parameters it uses (registry entries,
+metadata rows) and the files it writes. A node's key is the hash of its input
+file contents, its parameters and the output digests of its dependencies;
+keys are recorded in output/cache/build_state.json and a node is rebuilt only
+when its key changed or one of its outputs is missing. Stale nodes run in a
+process pool as soon as their dependencies are done.
+
+Per user:
+    session:U   parse data/U-d.tcx into the session cache
+    detect:U    peaks and detected stations   -> output/cache/detect/user_U.json
+    export:U    station CSV                   -> output/processed/user_U_station_data_peaks.csv
+    plots:U     standard plots (render_plots) -> output/plots/user_U/
+Study-wide:
+    master      MASTER_sphere_heart_rate_data.csv, upserting changed station CSVs
+    store       Parquet and SQLite copies of the master (master_store.py)
+
+Changing one TCX rebuilds that user's nodes and the master CSV; changing one
+row of metadata/user_metadata.csv rebuilds that user's export and the master.
+"""
+
+import glob
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cache_utils import CACHE_ROOT, file_sha256, json_sha256, read_json, write_json_atomic
+from master_store import materialize, store_paths
+from render_plots import chart_path_for, load_cutoffs, render_user
+from session_cache import load_session, tcx_path_for
+from update_master_csv import MASTER_CSV, update_master_csv
+from user_registry import get_alignment, get_parameters
+
+from sphere.export import (PROCESSED_DIR, export_user, is_low_quality, load_user_metadata, read_station_csv,
+                           station_csv_path)
+from sphere.peaks import MIN_DISTANCE_MIN, MIN_PROMINENCE, PEAK_THRESHOLD_RATIO, detect_stations
+
+BUILD_STATE = os.path.join(CACHE_ROOT, 'build_state.json')
+DETECT_DIR = os.path.join(CACHE_ROOT, 'detect')
+
+TARGETS = ('session', 'detect', 'export', 'plots', 'master', 'store')
+
+
+class Node:
+    """
+    One build step.
+
+    Args:
+        name: Unique node name, e.g. 'export:12'
+        action: Picklable function run in a worker as action(*args)
+        args: Arguments for `action`
+        deps: Names of nodes that must be built first
+        inputs: File paths read by the node, or a callable returning them
+        params: JSON-serialisable parameters, or a callable returning them
+            (called once the dependencies are built)
+        outputs: File paths written by the node
+    """
+
+    def __init__(self, name, action, args=(), deps=(), inputs=(), params=None, outputs=()):
+        self.name = name
+        self.action = action
+        self.args = args
+        self.deps = list(deps)
+        self.inputs = inputs
+        self.params = params
+        self.outputs = list(outputs)
+
+    @property
+    def kind(self):
+        return self.name.split(':')[0]
+
+    def key(self, digests):
+        """Hash of the node's inputs, parameters and dependency digests."""
+        inputs = self.inputs() if callable(self.inputs) else self.inputs
+        params = self.params() if callable(self.params) else self.params
+        return json_sha256({
+            'inputs': {path: file_sha256(path) if os.path.exists(path) else None for path in sorted(inputs)},
+            'params': params,
+            'deps': {dep: digests[dep] for dep in self.deps},
+        })
+
+    def digest(self, key):
+        """Hash of the node's outputs (its key if it writes no files)."""
+        if not self.outputs:
+            return key
+        return json_sha256({path: file_sha256(path) if os.path.exists(path) else None for path in self.outputs})
+
+
+def detect_path(user_id, detect_dir=DETECT_DIR):
+    return os.path.join(detect_dir, f'user_{user_id}.json')
+
+
+def _build_session(user_id, data_dir):
+    df = load_session(user_id, data_dir)[0]
+    return f'{len(df)} points'
+
+
+def _build_detect(user_id, data_dir, detection, path):
+    df, _, _, session_max_hr, _ = load_session(user_id, data_dir)
+    peaks, regions, threshold, cutoffs = detect_stations(df, session_max_hr, **detection)
+    write_json_atomic(path, {
+        **detection,
+        'threshold': float(threshold),
+        'peaks': [int(peak) for peak in peaks],
+        'regions': [list(region) for region in regions],
+        'cutoffs': [[round(start, 4), round(end, 4)] for start, end in cutoffs],
+    })
+    return f'{len(peaks)} peaks, {len(cutoffs)} stations'
+
+
+def _build_export(user_id, data_dir, detect_file):
+    return export_user(user_id, load_session(user_id, data_dir), _export_cutoffs(user_id, detect_file))
+
+
+def _build_plots(user_id, data_dir, tier):
+    results = render_user(user_id, tier=tier, data_dir=data_dir)
+    return f"{sum(status == 'written' for status in results.values())} written"
+
+
+def _build_master():
+    result = update_master_csv()
+    if result['errors']:
+        errors = result['errors'].items()
+        raise RuntimeError('; '.join(f"{os.path.basename(path)}: {error}" for path, error in errors))
+    return f"{result['status']} ({len(result['read'])} files read, {result['rows']} rows)"
+
+
+def _build_store():
+    return materialize()
+
+
+def _export_cutoffs(user_id, detect_file):
+    """Committed cutoffs (registry, else the station CSV), else the detected ones."""
+    cutoffs = load_cutoffs(user_id)
+    if cutoffs is None:
+        cutoffs = read_json(detect_file, default={}).get('cutoffs', [])
+    return [[float(start), float(end)] for start, end in cutoffs]
+
+
+def study_graph(user_ids, data_dir='data', tier='preview'):
+    """Return the build graph for `user_ids` as {name: Node}."""
+    nodes = []
+    for user_id in user_ids:
+        session, detect, export = f'session:{user_id}', f'detect:{user_id}', f'export:{user_id}'
+        detect_file = detect_path(user_id)
+        parameters = get_parameters(user_id)
+        detection = {
+            'ratio': parameters.get('PEAK_THRESHOLD_RATIO', PEAK_THRESHOLD_RATIO),
+            'min_prominence': parameters.get('MIN_PROMINENCE', MIN_PROMINENCE),
+            'min_distance_min': parameters.get('MIN_DISTANCE_MIN', MIN_DISTANCE_MIN),
+        }
+
+        nodes.append(Node(session, _build_session, (user_id, data_dir),
+                          inputs=[tcx_path_for(user_id, data_dir)]))
+        nodes.append(Node(detect, _build_detect, (user_id, data_dir, detection, detect_file),
+                          deps=[session], params=detection, outputs=[detect_file]))
+
+        # Low quality users keep the CSV written by the low quality template
+        csv_path = station_csv_path(user_id)
+        low_quality = (is_low_quality(read_station_csv(csv_path)[1])
+                       or os.path.exists(os.path.join(PROCESSED_DIR, f'user_{user_id}_station_data_low_quality.csv')))
+        plot_deps = [session]
+        if not low_quality:
+            params = lambda user_id=user_id, detect_file=detect_file: {
+                'cutoffs': _export_cutoffs(user_id, detect_file),
+                'metadata': load_user_metadata(user_id),
+            }
+            nodes.append(Node(export, _build_export, (user_id, data_dir, detect_file),
+                              deps=[session, detect], params=params, outputs=[csv_path]))
+            plot_deps.append(export)
+
+        nodes.append(Node(f'plots:{user_id}', _build_plots, (user_id, data_dir, tier),
+                          deps=plot_deps, inputs=[chart_path_for(user_id)],
+                          params=lambda user_id=user_id: {
+                              'alignment': get_alignment(user_id),
+                              'cutoffs': load_cutoffs(user_id),
+                              'tier': tier,
+                          }))
+
+    exports = [node.name for node in nodes if node.kind == 'export']
+    nodes.append(Node('master', _build_master, deps=exports,
+                      inputs=lambda: glob.glob(os.path.join(PROCESSED_DIR, 'user_*_station_data_peaks.csv')),
+                      outputs=[MASTER_CSV]))
+    nodes.append(Node('store', _build_store, deps=['master'], outputs=store_paths()))
+    return {node.name: node for node in nodes}
+
+
+def select(graph, targets):
+    """Keep the nodes of the given kinds and everything they depend on."""
+    wanted = [name for name, node in graph.items() if node.kind in targets]
+    selected = set()
+    while wanted:
+        name = wanted.pop()
+        if name not in selected:
+            selected.add(name)
+            wanted.extend(graph[name].deps)
+    return {name: node for name, node in graph.items() if name in selected}
+
+
+def build(graph, jobs=None, force=False, dry_run=False, state_path=BUILD_STATE):
+    """
+    Build the stale nodes of `graph`.
+
+    Returns:
+        {name: status}: 'up to date', 'built' (or the action's own status
+        message), 'stale' for a dry run, 'failed: ...', or 'blocked' when a
+        dependency failed
+    """
+    state = read_json(state_path, default={})
+    digests, results, running = {}, {}, {}
+    pending = dict(graph)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            progress = True
+            while progress:
+                progress = False
+                for name, node in list(pending.items()):
+                    if any(dep not in results for dep in node.deps):
+                        continue
+                    del pending[name]
+                    progress = True
+                    if any(results[dep] == 'blocked' or results[dep].startswith('failed') for dep in node.deps):
+                        results[name] = 'blocked'
+                        continue
+                    key = node.key(digests)
+                    entry = state.get(name, {})
+                    if not force and entry.get('key') == key and all(os.path.exists(p) for p in node.outputs):
+                        digests[name] = entry['digest']
+                        results[name] = 'up to date'
+                    elif dry_run:
+                        # Unknown until built; dependents will show as stale too
+                        digests[name] = f'stale:{key}'
+                        results[name] = 'stale'
+                    else:
+                        running[pool.submit(node.action, *node.args)] = (name, key)
+                        # Not in results yet, so dependents wait
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Dependency cycle among: {', '.join(sorted(pending))}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                node = graph[name]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    results[name] = f'failed: {e}'
+                    continue
+                digests[name] = node.digest(key)
+                results[name] = status if isinstance(status, str) else 'built'
+                state[name] = {'key': key, 'digest': digests[name]}
+                # Record progress as we go so an interrupted build resumes where it stopped
+                write_json_atomic(state_path, state)
+    return results
+
+
+def print_summary(results):
+    """Print every node that was not up to date; returns the number of failed nodes."""
+    failed = 0
+    for name, status in results.items():
+        if status == 'up to date':
+            continue
+        if status.startswith('failed'):
+            failed += 1
+            print(f"❌ {name}: {status}")
+        elif status == 'blocked':
+            print(f"❌ {name}: {status}")
+        elif status.startswith('skipped'):
+            print(f"⚠️  {name}: {status}")
+        else:
+            print(f"✅ {name}: {status}")
+    up_to_date = sum(status == 'up to date' for status in results.values())
+    print(f"\nNodes: {len(results)}, up to date: {up_to_date}, failed: {failed}")
+    return failed
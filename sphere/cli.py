@@ -0,0 +1,102 @@
+"""
+Command line interface: python -m sphere <command>.
+
+Usage:
+    python -m sphere run --users all --jobs 8
+    python -m sphere run --users 2 3 11 --stages parse,detect
+    python -m sphere run --users all --stages plot --tier full
+    python -m sphere build --jobs 8
+    python -m sphere build --targets master --dry-run
+"""
+
+import argparse
+import sys
+
+from render_plots import TIERS, find_users
+
+from sphere import build
+from sphere.pipeline import STAGES, print_summary, run
+
+
+def parse_users(values):
+    """['all'] -> None (every user with a TCX file), else a list of int user IDs."""
+    if values == ['all']:
+        return None
+    try:
+        return [int(value) for value in values]
+    except ValueError:
+        raise argparse.ArgumentTypeError("--users takes 'all' or user IDs")
+
+
+def _parse_list(value, choices, what):
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    unknown = sorted(set(items) - set(choices))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown {what}(s) {', '.join(unknown)}; choose from {','.join(choices)}")
+    return tuple(item for item in choices if item in items)
+
+
+def parse_stages(value):
+    """'parse,detect' -> ('parse', 'detect') in pipeline order."""
+    return _parse_list(value, STAGES, 'stage')
+
+
+def parse_targets(value):
+    """'master,plots' -> ('plots', 'master') in build order."""
+    return _parse_list(value, build.TARGETS, 'target')
+
+
+def cmd_run(args):
+    try:
+        user_ids = parse_users(args.users)
+    except argparse.ArgumentTypeError as e:
+        args.parser.error(str(e))
+    results = run(user_ids, args.stages, args.jobs, data_dir=args.data_dir, tier=args.tier,
+                  drop_stations=args.drop_stations)
+    return 1 if print_summary(results) else 0
+
+
+def cmd_build(args):
+    try:
+        user_ids = parse_users(args.users)
+    except argparse.ArgumentTypeError as e:
+        args.parser.error(str(e))
+    if user_ids is None:
+        user_ids = find_users(args.data_dir)
+    graph = build.select(build.study_graph(user_ids, args.data_dir, args.tier), args.targets)
+    results = build.build(graph, args.jobs, force=args.force, dry_run=args.dry_run)
+    return 1 if build.print_summary(results) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='sphere', description='Sphere heart rate analysis')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run analysis stages for many users in parallel')
+    run_parser.add_argument('--users', nargs='+', default=['all'], help="User IDs, or 'all' (default: all)")
+    run_parser.add_argument('--stages', type=parse_stages, default=STAGES,
+                            help=f"Comma-separated stages (default: {','.join(STAGES)})")
+    run_parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    run_parser.add_argument('--tier', choices=list(TIERS), default='preview', help='Plot tier (default: preview)')
+    run_parser.add_argument('--data-dir', default='data', help='Directory holding the TCX files (default: data)')
+    run_parser.add_argument('--drop-stations', action='store_true',
+                            help='Remove station rows (and their survey answers) the cutoffs no longer define')
+    run_parser.set_defaults(func=cmd_run, parser=run_parser)
+
+    build_parser = commands.add_parser('build', help='Rebuild only the outputs whose inputs changed')
+    build_parser.add_argument('--users', nargs='+', default=['all'], help="User IDs, or 'all' (default: all)")
+    build_parser.add_argument('--targets', type=parse_targets, default=build.TARGETS,
+                              help=f"Comma-separated node kinds to bring up to date (default: {','.join(build.TARGETS)})")
+    build_parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    build_parser.add_argument('--tier', choices=list(TIERS), default='preview', help='Plot tier (default: preview)')
+    build_parser.add_argument('--data-dir', default='data', help='Directory holding the TCX files (default: data)')
+    build_parser.add_argument('--force', action='store_true', help='Rebuild every selected node')
+    build_parser.add_argument('--dry-run', action='store_true', help='Only report which nodes are stale')
+    build_parser.set_defaults(func=cmd_build, parser=build_parser)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Per-user station CSV export (output/processed/user_XX_station_data_peaks.csv).
+
+Builds the same rows as STEP 5 of the high quality peak detection template.
+When the user already has a station CSV, only the columns computed from the
+TCX (session and station timing and heart rate) are rewritten: survey
+answers, PACES ratings and hand-edited notes already in the file are kept
+for every station that still exists. A station row is only removed (with
+its survey answers) when the cutoffs define fewer stations and the caller
+passes drop_stations=True.
+"""
+
+import csv
+import os
+import re
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from station_schema import (LOW_QUALITY_PATTERN, MISSING, MISSING_AS_TBD, PARTICIPANT_COLUMNS, STATION_CSV_HEADER,
+                            SURVEY_COLUMNS)
+
+from sphere.stations import station_stats
+
+PROCESSED_DIR = 'output/processed'
+METADATA_CSV = 'metadata/user_metadata.csv'
+
+# Survey answers that belong to one station row (participant answers repeat on every row)
+STATION_SURVEY_COLUMNS = [column for column in SURVEY_COLUMNS if column not in PARTICIPANT_COLUMNS]
+
+# Columns recomputed from the TCX on every export; everything else is kept from an existing CSV
+COMPUTED_COLUMNS = (
+    'user_id', 'session_start_time', 'session_end_time', 'session_duration_min', 'session_avg_hr',
+    'session_max_hr', 'calories_burned', 'station_number', 'station_start_time', 'station_end_time',
+    'station_duration_min', 'station_avg_hr', 'station_max_hr',
+)
+
+HIGH_QUALITY_NOTE = (
+    "HIGH QUALITY DATA: User {user_id} demonstrates clean, continuous heart rate recording throughout the session. "
+    "Heart rate patterns show clear physiological responses to exercise with well-defined peaks during active "
+    "gameplay periods and appropriate recovery valleys between stations. Peak-based detection algorithm "
+    "successfully identified {n_stations} distinct activity periods. Data is suitable for detailed cardiovascular "
+    "analysis, station-level comparisons, and physiological research applications."
+)
+
+RESEARCH_NOTE = (
+    "RESEARCH NOTE: User {user_id} completed {n_stations}-station Sphere protocol with high-quality heart rate "
+    "monitoring. Station boundaries were determined through automated peak detection algorithm with visual "
+    "alignment of TCX data with Garmin chart, identifying clear transitions between active gameplay periods and "
+    "recovery intervals. Each station represents distinct cardiovascular responses with well-defined peaks. Data "
+    "is validated for research use in exercise physiology, gaming exertion studies, and cardiovascular response "
+    "analysis. Station timing reflects actual participant pacing rather than rigid protocol timing, providing "
+    "ecologically valid data."
+)
+
+
+def station_csv_path(user_id, processed_dir=PROCESSED_DIR):
+    """Return the station CSV path for a user."""
+    return os.path.join(processed_dir, f'user_{user_id}_station_data_peaks.csv')
+
+
+def load_user_metadata(user_id, path=METADATA_CSV):
+    """Return a user's age, gender, height_cm, weight_kg and champ_number (None where blank)."""
+    fields = ('age', 'gender', 'height_cm', 'weight_kg', 'champ_number')
+    try:
+        metadata = pd.read_csv(path, dtype=str, keep_default_na=False)
+    except (OSError, ValueError):
+        return dict.fromkeys(fields)
+    rows = metadata[metadata['user_id'].str.strip() == str(user_id)]
+    if rows.empty:
+        return dict.fromkeys(fields)
+    row = rows.iloc[0]
+    return {field: (row.get(field, '').strip() or None) for field in fields}
+
+
+def read_station_csv(path):
+    """Read a station CSV as strings; returns (header, rows) or (None, []) if it does not exist."""
+    if not os.path.exists(path):
+        return None, []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def is_low_quality(rows):
+    """True if existing station rows were exported by the low quality template."""
+    return any(re.match(LOW_QUALITY_PATTERN, row.get('data_quality', '')) for row in rows)
+
+
+def station_frame(sessions, metadata=None, header=STATION_CSV_HEADER):
+    """
+    Build fresh station CSV rows for many users as one DataFrame.
+
+    Station statistics come from one vectorised station_stats call; the
+    session columns, defaults and demographics are filled per column.
+
+    Args:
+        sessions: {user_id: (session, cutoffs)} with session as
+            (df, total_time_sec, avg_hr, max_hr, calories) from load_session
+        metadata: {user_id: demographics from load_user_metadata}
+        header: Column order of the result
+
+    Returns:
+        DataFrame with `header` columns, one row per non-empty station
+    """
+    metadata = metadata or {}
+    stats = station_stats({user_id: (session[0], cutoffs) for user_id, (session, cutoffs) in sessions.items()})
+    frame = pd.DataFrame('', index=stats.index, columns=header)
+    frame[[column for column in MISSING_AS_TBD if column in frame]] = MISSING
+    if stats.empty:
+        return frame
+
+    users = stats['user_id']
+    n_stations = stats.groupby('user_id')['station_number'].transform('size')
+    summary = pd.DataFrame({
+        user_id: {
+            'session_start_time': session[0]['timestamp'].iloc[0].isoformat(),
+            'session_end_time': session[0]['timestamp'].iloc[-1].isoformat(),
+            'session_duration_min': session[1] / 60,
+            'session_avg_hr': session[2],
+            'session_max_hr': session[3],
+            'calories_burned': session[4] if session[4] else '',
+        }
+        for user_id, (session, _) in sessions.items()
+    }).T
+
+    frame['champ_number'] = n_stations
+    frame['data_quality'] = [HIGH_QUALITY_NOTE.format(user_id=u, n_stations=n) for u, n in zip(users, n_stations)]
+    frame['notes'] = [RESEARCH_NOTE.format(user_id=u, n_stations=n) for u, n in zip(users, n_stations)]
+    for field in ('age', 'gender', 'height_cm', 'weight_kg', 'champ_number'):
+        values = users.map(lambda user_id: (metadata.get(user_id) or {}).get(field))
+        frame[field] = values.where(values.notna(), frame[field])
+
+    frame['user_id'] = users
+    for column in summary.columns:
+        frame[column] = users.map(summary[column])
+    for column in ('station_number', 'station_duration_min', 'station_avg_hr', 'station_max_hr'):
+        frame[column] = stats[column]
+    frame['station_start_time'] = stats['station_start_time'].map(pd.Timestamp.isoformat)
+    frame['station_end_time'] = stats['station_end_time'].map(pd.Timestamp.isoformat)
+    return frame[header]
+
+
+def build_station_rows(user_id, session, cutoffs, metadata=None, header=STATION_CSV_HEADER, existing_rows=()):
+    """
+    Build one user's station CSV rows as dicts keyed by `header`.
+
+    Args:
+        user_id: User ID
+        session: (df, total_time_sec, avg_hr, max_hr, calories) as from load_session
+        cutoffs: [(start, end), ...] in elapsed minutes
+        metadata: Demographics from load_user_metadata
+        existing_rows: Rows of the user's current CSV; their non-computed
+            values are kept for matching station numbers unless the
+            metadata has the value
+    """
+    metadata = metadata or {}
+    frame = station_frame({user_id: (session, cutoffs)}, {user_id: metadata}, header)
+    existing = {row.get('station_number'): row for row in existing_rows}
+    # Demographics filled in metadata/user_metadata.csv take precedence over the CSV
+    keep = [column for column in header
+            if column not in COMPUTED_COLUMNS and metadata.get(column) is None]
+
+    rows = []
+    for row in frame.to_dict('records'):
+        row = {column: value.item() if isinstance(value, np.generic) else value for column, value in row.items()}
+        previous = existing.get(str(row['station_number']))
+        if previous is not None:
+            row.update({column: previous[column] for column in keep if column in previous})
+        rows.append(row)
+    return rows
+
+
+def write_station_csv(path, header, rows):
+    """Write station rows through a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=header)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _station_key(station_number):
+    """Sort key for station numbers read back from a CSV (numeric first, then anything else)."""
+    return (0, int(station_number), '') if station_number.isdigit() else (1, 0, station_number)
+
+
+def _station_answers(row):
+    """Survey answers recorded on a station row: {column: value}, leaving out 'TBD' and blank cells."""
+    return {column: row[column] for column in STATION_SURVEY_COLUMNS
+            if row.get(column, '').strip() not in ('', MISSING)}
+
+
+def export_user(user_id, session, cutoffs, processed_dir=PROCESSED_DIR, metadata_path=METADATA_CSV,
+                drop_stations=False):
+    """
+    Write a user's station CSV from their session and cutoffs.
+
+    Station rows already in the CSV are never dropped by accident. If the
+    cutoffs of an existing station hold no samples the export is skipped.
+    If the cutoffs define fewer stations than the CSV holds, the export is
+    skipped unless `drop_stations` is True. In that case the extra rows are
+    removed, with a warning listing the survey answers discarded with them.
+
+    Returns:
+        'written', 'unchanged', or 'skipped (...)' with the reason
+    """
+    path = station_csv_path(user_id, processed_dir)
+    header, existing_rows = read_station_csv(path)
+    low_quality_path = os.path.join(processed_dir, f'user_{user_id}_station_data_low_quality.csv')
+    if is_low_quality(existing_rows) or os.path.exists(low_quality_path):
+        return 'skipped (low quality data)'
+
+    header = header or STATION_CSV_HEADER
+    rows = build_station_rows(user_id, session, cutoffs, load_user_metadata(user_id, metadata_path),
+                              header, existing_rows)
+    if not rows:
+        return 'skipped (no station data)'
+
+    kept = {str(row['station_number']) for row in rows}
+    missing = sorted({row.get('station_number') or '' for row in existing_rows} - kept, key=_station_key)
+    # Stations the cutoffs still define, but whose time range holds no samples
+    empty = [number for number in missing if number.isdigit() and 1 <= int(number) <= len(cutoffs)]
+    if empty:
+        return f"skipped (cutoffs for station {', '.join(empty)} hold no samples)"
+    if missing and not drop_stations:
+        return (f"skipped (cutoffs define {len(cutoffs)} stations, the CSV also has station {', '.join(missing)}; "
+                "use drop_stations=True or 'sphere run --drop-stations' to remove the extra rows)")
+    if missing:
+        dropped = [row for row in existing_rows if (row.get('station_number') or '') in missing]
+        answers = {row.get('station_number'): _station_answers(row) for row in dropped}
+        discarded = '; '.join(
+            f"station {number}: " + (', '.join(f'{column}={value}' for column, value in values.items()) or 'none')
+            for number, values in answers.items())
+        warnings.warn(f"User {user_id}: dropping station {', '.join(missing)} from {path}, "
+                      f"discarding survey answers ({discarded})", stacklevel=2)
+
+    if existing_rows == [{column: str(value) for column, value in row.items()} for row in rows]:
+        return 'unchanged'
+    write_station_csv(path, header, rows)
+    return 'written'
@@ -0,0 +1,79 @@
+"""
+Peak detection and the initial station cutoffs derived from it.
+
+`detect_stations` is what STEP 3 and the start of STEP 4 of the high quality
+peak detection template do: detect peaks on the smoothed HR at the chosen
+threshold, then turn every peak region into a station trimmed by half a
+minute on each side, falling back to evenly spaced stations when nothing is
+found.
+"""
+
+from peak_detection import SAMPLES_PER_MIN, SMOOTH_WINDOW, detect_hr_peaks, smooth_hr
+
+# Template defaults (PEAK_THRESHOLD_RATIO can be overridden per user in the registry)
+PEAK_THRESHOLD_RATIO = 0.70
+MIN_PROMINENCE = 8
+MIN_DISTANCE_MIN = 1.5
+
+# Minutes trimmed from each side of a peak region to get a station
+REGION_MARGIN_MIN = 0.5
+
+# Number of evenly spaced stations used when no peaks are found
+DEFAULT_STATIONS = 6
+
+__all__ = [
+    'SAMPLES_PER_MIN',
+    'SMOOTH_WINDOW',
+    'PEAK_THRESHOLD_RATIO',
+    'detect_hr_peaks',
+    'smooth_hr',
+    'regions_to_cutoffs',
+    'default_cutoffs',
+    'detect_stations',
+]
+
+
+def regions_to_cutoffs(elapsed_min, peak_regions, margin=REGION_MARGIN_MIN):
+    """
+    Convert peak regions (sample index pairs) to station cutoffs in minutes.
+
+    Regions shorter than twice `margin` are dropped.
+    """
+    cutoffs = []
+    for start_idx, end_idx in peak_regions:
+        start = float(elapsed_min.iloc[start_idx]) + margin
+        end = float(elapsed_min.iloc[end_idx]) - margin
+        if end > start:
+            cutoffs.append((start, end))
+    return cutoffs
+
+
+def default_cutoffs(session_max_min, num_stations=DEFAULT_STATIONS):
+    """Evenly spaced stations with a one minute gap on each side."""
+    station_duration = session_max_min / num_stations
+    return [(i * station_duration + 1, (i + 1) * station_duration - 1) for i in range(num_stations)]
+
+
+def detect_stations(df, session_max_hr, ratio=PEAK_THRESHOLD_RATIO,
+                    min_prominence=MIN_PROMINENCE, min_distance_min=MIN_DISTANCE_MIN):
+    """
+    Detect peaks on a session and derive initial station cutoffs.
+
+    Args:
+        df: Session DataFrame with elapsed_min and heart_rate columns
+        session_max_hr: Session maximum heart rate
+        ratio: Peak threshold as a fraction of session_max_hr
+
+    Returns:
+        (peaks, peak_regions, threshold, cutoffs) where cutoffs is a list of
+        (start, end) pairs in elapsed minutes
+    """
+    hr_smooth = df['hr_smooth'] if 'hr_smooth' in df else smooth_hr(df['heart_rate'])
+    peaks, peak_regions, threshold = detect_hr_peaks(hr_smooth, session_max_hr, min_height_ratio=ratio,
+                                                     min_prominence=min_prominence,
+                                                     min_distance_min=min_distance_min)
+    if peak_regions:
+        cutoffs = regions_to_cutoffs(df['elapsed_min'], peak_regions)
+    else:
+        cutoffs = default_cutoffs(float(df['elapsed_min'].max()))
+    return peaks, peak_regions, threshold, cutoffs
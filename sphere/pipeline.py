@@ -0,0 +1,100 @@
+"""
+Batch pipeline: run the analysis stages for many users without Jupyter.
+
+Stages, in order:
+    parse   load the session through the hash-keyed session cache
+    detect  detect peaks and derive initial station cutoffs
+    export  write the station CSV from the committed cutoffs (registry, else
+            the existing CSV), or the detected ones for users never reviewed;
+            station rows the cutoffs no longer define are only removed with
+            drop_stations=True
+    plot    render the standard plots with render_plots
+
+Each user runs in its own worker process; a failing user is reported and
+does not stop the others.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from render_plots import find_users, load_cutoffs, render_user
+from session_cache import load_session
+from user_registry import get_parameters
+
+from sphere.export import PROCESSED_DIR, export_user
+from sphere.peaks import MIN_DISTANCE_MIN, MIN_PROMINENCE, PEAK_THRESHOLD_RATIO, detect_stations
+
+STAGES = ('parse', 'detect', 'export', 'plot')
+
+
+def process_user(user_id, stages=STAGES, data_dir='data', processed_dir=PROCESSED_DIR, tier='preview',
+                 drop_stations=False):
+    """
+    Run `stages` for one user.
+
+    Returns:
+        {stage: status message} in stage order
+    """
+    results = {}
+    session = load_session(user_id, data_dir)
+    df, _, _, session_max_hr, _ = session
+    if 'parse' in stages:
+        results['parse'] = f'{len(df)} points'
+
+    cutoffs = load_cutoffs(user_id, processed_dir)
+    if 'detect' in stages:
+        parameters = get_parameters(user_id)
+        ratio = parameters.get('PEAK_THRESHOLD_RATIO', PEAK_THRESHOLD_RATIO)
+        peaks, regions, _, detected = detect_stations(
+            df, session_max_hr, ratio,
+            min_prominence=parameters.get('MIN_PROMINENCE', MIN_PROMINENCE),
+            min_distance_min=parameters.get('MIN_DISTANCE_MIN', MIN_DISTANCE_MIN))
+        results['detect'] = f'{len(peaks)} peaks, {len(regions)} regions at {ratio:.0%}'
+        if cutoffs is None:
+            # Same precision as cutoffs read back from the registry or the CSV
+            cutoffs = [(round(start, 4), round(end, 4)) for start, end in detected]
+            results['detect'] += f' -> {len(cutoffs)} detected stations'
+
+    if 'export' in stages:
+        if cutoffs is None:
+            results['export'] = 'skipped (no committed cutoffs; add the detect stage)'
+        else:
+            results['export'] = export_user(user_id, session, cutoffs, processed_dir,
+                                            drop_stations=drop_stations)
+
+    if 'plot' in stages:
+        rendered = render_user(user_id, tier=tier, data_dir=data_dir, processed_dir=processed_dir)
+        written = sum(status == 'written' for status in rendered.values())
+        skipped = [name for name, status in rendered.items() if status.startswith('skipped')]
+        results['plot'] = f'{written} written' + (f", skipped {', '.join(skipped)}" if skipped else '')
+    return results
+
+
+def run(user_ids=None, stages=STAGES, jobs=None, data_dir='data', **kwargs):
+    """Process users across a process pool; returns {user_id: results or {'error': message}}."""
+    if user_ids is None:
+        user_ids = find_users(data_dir)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {user_id: pool.submit(process_user, user_id, stages, data_dir, **kwargs) for user_id in user_ids}
+        for user_id, future in futures.items():
+            try:
+                results[user_id] = future.result()
+            except Exception as e:
+                results[user_id] = {'error': str(e)}
+    return results
+
+
+def print_summary(results):
+    """Print one line per user; returns the number of users with errors."""
+    errors = 0
+    for user_id, user_results in sorted(results.items()):
+        if 'error' in user_results:
+            errors += 1
+            print(f"❌ User {user_id:2d}: {user_results['error']}")
+            continue
+        skipped = any(status.startswith('skipped') for status in user_results.values())
+        symbol = '⚠️ ' if skipped else '✅'
+        print(f"{symbol} User {user_id:2d}: " + '; '.join(f'{stage} {status}' for stage, status in user_results.items()))
+    print(f"\nUsers processed: {len(results)}, errors: {errors}")
+    return errors
@@ -0,0 +1,113 @@
+"""
+Station slicing: per-station timing and heart rate statistics from cutoffs.
+
+Samples are never rescanned per station. Session samples are time-ordered,
+so one np.searchsorted of every cutoff against the sample times gives each
+station's [first, last] sample range, and the per-station sums, counts,
+maxima and minima come from one cumulative sum and one reduceat over the
+heart rate array. Several users are handled in the same call by laying
+their sessions end to end.
+"""
+
+import numpy as np
+import pandas as pd
+
+STATION_STATS_COLUMNS = [
+    'user_id', 'station_number', 'start_min', 'end_min', 'station_start_time', 'station_end_time',
+    'station_duration_min', 'station_avg_hr', 'station_max_hr', 'station_min_hr', 'data_points',
+]
+
+
+def station_stats(sessions):
+    """
+    Summarise the stations of many sessions in one vectorised pass.
+
+    A station covers the samples with start <= elapsed_min <= end; stations
+    with no samples are left out (the remaining stations keep their numbers).
+
+    Args:
+        sessions: {user_id: (df, cutoffs)} with df holding timestamp,
+            elapsed_min and heart_rate columns (in time order) and cutoffs
+            as [(start, end), ...] in elapsed minutes
+
+    Returns:
+        DataFrame with STATION_STATS_COLUMNS, one row per non-empty station,
+        ordered by user then station number
+    """
+    heart_rate, heart_rate_dtypes, ranges, keys = [], [], [], []
+    offset = 0
+    for user_id, (df, cutoffs) in sessions.items():
+        if not len(cutoffs) or df.empty:
+            continue
+        minutes = df['elapsed_min'].to_numpy(dtype=float)
+        bounds = np.asarray(cutoffs, dtype=float).reshape(-1, 2)
+        first = np.searchsorted(minutes, bounds[:, 0], side='left')
+        last = np.searchsorted(minutes, bounds[:, 1], side='right')
+        ranges.append(np.column_stack([first, last]) + offset)
+        keys.append((user_id, df['timestamp'].iloc[0], bounds))
+        heart_rate.append(df['heart_rate'].to_numpy(dtype=float))
+        heart_rate_dtypes.append(df['heart_rate'].dtype)
+        offset += len(minutes)
+    if not ranges:
+        return pd.DataFrame(columns=STATION_STATS_COLUMNS)
+
+    hr = np.concatenate(heart_rate)
+    bounds = np.concatenate(ranges)
+    first, last = bounds[:, 0], bounds[:, 1]
+    counts = last - first
+    # Sums from one cumulative sum; max/min from one reduceat over [first, last) pairs
+    # (a trailing sentinel keeps `last == len(hr)` a valid index)
+    sums = np.concatenate([[0.0], np.cumsum(hr)])
+    padded = np.append(hr, np.nan)
+    pairs = bounds.ravel()
+    maxima = np.maximum.reduceat(padded, pairs)[::2]
+    minima = np.minimum.reduceat(padded, pairs)[::2]
+
+    user_ids, session_starts, starts, ends, numbers = [], [], [], [], []
+    for user_id, session_start, user_bounds in keys:
+        n = len(user_bounds)
+        user_ids.extend([user_id] * n)
+        session_starts.extend([session_start] * n)
+        starts.append(user_bounds[:, 0])
+        ends.append(user_bounds[:, 1])
+        numbers.append(np.arange(1, n + 1))
+    starts, ends = np.concatenate(starts), np.concatenate(ends)
+
+    stats = pd.DataFrame({
+        'user_id': user_ids,
+        'station_number': np.concatenate(numbers),
+        'start_min': starts,
+        'end_min': ends,
+        # Rounded to microseconds like datetime.timedelta(minutes=...)
+        'station_start_time': pd.Series(session_starts) + pd.to_timedelta(starts, unit='m').round('us'),
+        'station_end_time': pd.Series(session_starts) + pd.to_timedelta(ends, unit='m').round('us'),
+        'station_duration_min': ends - starts,
+        'station_avg_hr': (sums[last] - sums[first]) / np.where(counts > 0, counts, 1),
+        'station_max_hr': maxima,
+        'station_min_hr': minima,
+        'data_points': counts,
+    }, columns=STATION_STATS_COLUMNS)
+    stats = stats[stats['data_points'] > 0].reset_index(drop=True)
+    if np.issubdtype(np.result_type(*heart_rate_dtypes), np.integer):
+        stats[['station_max_hr', 'station_min_hr']] = stats[['station_max_hr', 'station_min_hr']].astype(int)
+    return stats
+
+
+def slice_stations(df, cutoffs):
+    """
+    Summarise each station of one session.
+
+    Args:
+        df: Session DataFrame with timestamp, elapsed_min and heart_rate columns
+        cutoffs: [(start, end), ...] in elapsed minutes
+
+    Returns:
+        List of dicts with station_number, start_min, end_min,
+        station_start_time, station_end_time, station_duration_min,
+        station_avg_hr, station_max_hr, station_min_hr and data_points
+    """
+    stats = station_stats({None: (df, cutoffs)}).drop(columns='user_id')
+    return [
+        {column: value.item() if isinstance(value, np.generic) else value for column, value in row.items()}
+        for row in stats.to_dict('records')
+    ]